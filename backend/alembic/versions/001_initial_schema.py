@@ -23,19 +23,19 @@ def upgrade() -> None:
         sa.Column('incentive_id', postgresql.UUID(as_uuid=True), primary_key=True),
         sa.Column('title', sa.String(500), nullable=False),
         sa.Column('description', sa.Text),
-        sa.Column('ai_description', postgresql.JSON),  # JSON field for structured data
-        sa.Column('document_urls', postgresql.JSON),
+        sa.Column('ai_description', postgresql.JSONB),  # JSONB field for structured data
+        sa.Column('document_urls', postgresql.JSONB),
         sa.Column('publication_date', sa.DateTime),
         sa.Column('start_date', sa.DateTime),
         sa.Column('end_date', sa.DateTime),
         sa.Column('total_budget', sa.Numeric(15, 2)),
         sa.Column('source_link', sa.String(1000)),
-        sa.Column('raw_csv_data', postgresql.JSON),  # All CSV fields for matching
+        sa.Column('raw_csv_data', postgresql.JSONB),  # All CSV fields for matching
         
         # AI Processing metadata
         sa.Column('ai_processing_status', sa.String(50), server_default='pending'),
         sa.Column('ai_processing_date', sa.DateTime),
-        sa.Column('fields_completed_by_ai', postgresql.JSON),
+        sa.Column('fields_completed_by_ai', postgresql.JSONB),
         sa.Column('ai_processing_error', sa.Text),
         
         # Timestamps
@@ -64,7 +64,7 @@ def upgrade() -> None:
         sa.Column('incentive_id', postgresql.UUID(as_uuid=True), nullable=False),
         sa.Column('company_id', postgresql.UUID(as_uuid=True), nullable=False),
         sa.Column('match_score', sa.Numeric(5, 4)),
-        sa.Column('match_reasons', postgresql.JSON),
+        sa.Column('match_reasons', postgresql.JSONB),
         sa.Column('ranking_position', sa.Integer),
         sa.Column('created_at', sa.DateTime, server_default=sa.text('CURRENT_TIMESTAMP')),
         sa.ForeignKeyConstraint(['incentive_id'], ['incentives.incentive_id']),
@@ -6,7 +6,7 @@ Create Date: 2025-10-21 12:00:00.000000
 
 Changes:
 1. Create incentives_metadata table
-2. Migrate data from incentives to incentives_metadata
+2. Migrate data from incentives to incentives_metadata (batched by incentive_id)
 3. Remove extra columns from incentives table
 4. Update companies table with proper schema
 
@@ -25,29 +25,27 @@ down_revision = '001'
 branch_labels = None
 depends_on = None
 
+# Linhas copiadas por transação na migração de incentives -> incentives_metadata
+METADATA_BATCH_SIZE = 50000
 
-def upgrade() -> None:
-    # 1. Create incentives_metadata table
-    op.create_table(
-        'incentives_metadata',
-        sa.Column('metadata_id', postgresql.UUID(as_uuid=True), primary_key=True),
-        sa.Column('incentive_id', postgresql.UUID(as_uuid=True), nullable=False, unique=True),
-        sa.Column('raw_csv_data', postgresql.JSON, nullable=False),
-        sa.Column('ai_processing_status', sa.String(50), server_default='pending'),
-        sa.Column('ai_processing_date', sa.DateTime),
-        sa.Column('fields_completed_by_ai', postgresql.JSON),
-        sa.Column('ai_processing_error', sa.Text),
-        sa.Column('created_at', sa.DateTime, server_default=sa.text('CURRENT_TIMESTAMP')),
-        sa.Column('updated_at', sa.DateTime, server_default=sa.text('CURRENT_TIMESTAMP')),
-        sa.ForeignKeyConstraint(['incentive_id'], ['incentives.incentive_id'], ondelete='CASCADE')
-    )
-    
-    # Create indexes for metadata
-    op.create_index('idx_metadata_incentive', 'incentives_metadata', ['incentive_id'])
-    op.create_index('idx_metadata_status', 'incentives_metadata', ['ai_processing_status'])
-    
-    # 2. Migrate data from incentives to incentives_metadata
-    op.execute("""
+METADATA_BATCH_INSERT = """
+    WITH batch AS (
+        SELECT
+            incentive_id,
+            raw_csv_data,
+            ai_processing_status,
+            ai_processing_date,
+            fields_completed_by_ai,
+            ai_processing_error,
+            created_at,
+            updated_at
+        FROM incentives
+        WHERE raw_csv_data IS NOT NULL
+          AND incentive_id > CAST(:last_id AS uuid)
+        ORDER BY incentive_id
+        LIMIT :batch_size
+    ),
+    inserted AS (
         INSERT INTO incentives_metadata (
             metadata_id,
             incentive_id,
@@ -59,7 +57,7 @@ def upgrade() -> None:
             created_at,
             updated_at
         )
-        SELECT 
+        SELECT
             gen_random_uuid(),
             incentive_id,
             raw_csv_data,
@@ -69,9 +67,46 @@ def upgrade() -> None:
             ai_processing_error,
             created_at,
             updated_at
-        FROM incentives
-        WHERE raw_csv_data IS NOT NULL
-    """)
+        FROM batch
+        RETURNING incentive_id
+    )
+    SELECT count(*), max(incentive_id::text) FROM inserted
+"""
+
+
+def upgrade() -> None:
+    # 1. Create incentives_metadata table
+    op.create_table(
+        'incentives_metadata',
+        sa.Column('metadata_id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('incentive_id', postgresql.UUID(as_uuid=True), nullable=False, unique=True),
+        sa.Column('raw_csv_data', postgresql.JSONB, nullable=False),
+        sa.Column('ai_processing_status', sa.String(50), server_default='pending'),
+        sa.Column('ai_processing_date', sa.DateTime),
+        sa.Column('fields_completed_by_ai', postgresql.JSONB),
+        sa.Column('ai_processing_error', sa.Text),
+        sa.Column('created_at', sa.DateTime, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('updated_at', sa.DateTime, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.ForeignKeyConstraint(['incentive_id'], ['incentives.incentive_id'], ondelete='CASCADE')
+    )
+    
+    # Create indexes for metadata
+    op.create_index('idx_metadata_incentive', 'incentives_metadata', ['incentive_id'])
+    op.create_index('idx_metadata_status', 'incentives_metadata', ['ai_processing_status'])
+    
+    # 2. Migrate data from incentives to incentives_metadata
+    # Copied in keyset-ordered batches, each committed on its own, so a large
+    # incentives table never turns into one long transaction / WAL burst
+    bind = op.get_bind()
+    last_id = '00000000-0000-0000-0000-000000000000'
+    with op.get_context().autocommit_block():
+        while True:
+            copied, last_id = bind.execute(
+                sa.text(METADATA_BATCH_INSERT),
+                {'last_id': last_id, 'batch_size': METADATA_BATCH_SIZE}
+            ).one()
+            if not copied:
+                break
     
     # 3. Remove migrated columns from incentives table
     op.drop_column('incentives', 'raw_csv_data')
@@ -94,10 +129,10 @@ def downgrade() -> None:
     # Reverse the migration
     
     # 1. Add columns back to incentives
-    op.add_column('incentives', sa.Column('raw_csv_data', postgresql.JSON))
+    op.add_column('incentives', sa.Column('raw_csv_data', postgresql.JSONB))
     op.add_column('incentives', sa.Column('ai_processing_status', sa.String(50), server_default='pending'))
     op.add_column('incentives', sa.Column('ai_processing_date', sa.DateTime))
-    op.add_column('incentives', sa.Column('fields_completed_by_ai', postgresql.JSON))
+    op.add_column('incentives', sa.Column('fields_completed_by_ai', postgresql.JSONB))
     op.add_column('incentives', sa.Column('ai_processing_error', sa.Text))
     op.add_column('incentives', sa.Column('created_at', sa.DateTime, server_default=sa.text('CURRENT_TIMESTAMP')))
     op.add_column('incentives', sa.Column('updated_at', sa.DateTime, server_default=sa.text('CURRENT_TIMESTAMP')))
@@ -0,0 +1,64 @@
+"""Convert JSON columns to JSONB
+
+Revision ID: 003
+Revises: e881bbc2a67b
+Create Date: 2025-10-27 10:00:00.000000
+
+Changes:
+1. Convert every JSON column to JSONB (binary format, no re-parse on read)
+2. Add GIN index (jsonb_path_ops) on incentives_metadata.raw_csv_data
+   so that containment queries (@>) used by matching are index-backed
+   (CREATE INDEX CONCURRENTLY, outside the migration transaction)
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = 'e881bbc2a67b'
+branch_labels = None
+depends_on = None
+
+
+# (tabela, coluna) convertidas de JSON para JSONB
+JSON_COLUMNS = [
+    ('incentives', 'ai_description'),
+    ('incentives', 'document_urls'),
+    ('incentives_metadata', 'raw_csv_data'),
+    ('incentives_metadata', 'fields_completed_by_ai'),
+    ('incentive_company_matches', 'match_reasons'),
+]
+
+
+def upgrade() -> None:
+    # 1. Convert JSON -> JSONB
+    for table, column in JSON_COLUMNS:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb")
+
+    # 2. GIN index for containment queries on raw CSV data (built without blocking writes)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_metadata_raw_csv_data_gin',
+            'incentives_metadata',
+            ['raw_csv_data'],
+            postgresql_using='gin',
+            postgresql_ops={'raw_csv_data': 'jsonb_path_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    # Drop GIN index
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'idx_metadata_raw_csv_data_gin',
+            table_name='incentives_metadata',
+            postgresql_concurrently=True,
+            if_exists=True
+        )
+
+    # Convert JSONB -> JSON
+    for table, column in JSON_COLUMNS:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE json USING {column}::json")
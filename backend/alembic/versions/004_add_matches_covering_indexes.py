@@ -0,0 +1,68 @@
+"""Add composite/covering indexes for matches lookups
+
+Revision ID: 004
+Revises: 003
+Create Date: 2025-10-27 11:00:00.000000
+
+Changes:
+1. (company_id, match_score DESC) covering index for /companies/{id}/incentives
+2. (incentive_id, match_score DESC) covering index for the incentive-side lookup
+3. Drop the single-column idx_matches_company / idx_matches_incentive,
+   now redundant (they are left-prefixes of the new indexes)
+All index DDL runs CONCURRENTLY outside the migration transaction
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can't run inside a transaction block; matches is the biggest
+    # table and a plain CREATE INDEX would block writers for the whole build
+    with op.get_context().autocommit_block():
+        # 1. Company-side: filter by company_id, order by score (index-only scan)
+        op.create_index(
+            'idx_matches_company_score',
+            'incentive_company_matches',
+            ['company_id', sa.text('match_score DESC')],
+            postgresql_include=['incentive_id', 'ranking_position', 'match_reasons'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+        # 2. Incentive-side mirror
+        op.create_index(
+            'idx_matches_incentive_score',
+            'incentive_company_matches',
+            ['incentive_id', sa.text('match_score DESC')],
+            postgresql_include=['company_id', 'ranking_position', 'match_reasons'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+        # 3. Drop redundant single-column indexes
+        op.drop_index('idx_matches_company', table_name='incentive_company_matches',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('idx_matches_incentive', table_name='incentive_company_matches',
+                      postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        # Recreate single-column indexes
+        op.create_index('idx_matches_incentive', 'incentive_company_matches', ['incentive_id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('idx_matches_company', 'incentive_company_matches', ['company_id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+        # Drop covering indexes
+        op.drop_index('idx_matches_incentive_score', table_name='incentive_company_matches',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('idx_matches_company_score', table_name='incentive_company_matches',
+                      postgresql_concurrently=True, if_exists=True)
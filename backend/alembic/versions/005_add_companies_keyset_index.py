@@ -0,0 +1,37 @@
+"""Add composite index for keyset pagination of companies
+
+Revision ID: 005
+Revises: 004
+Create Date: 2025-10-27 12:00:00.000000
+
+Changes:
+1. (company_name, company_id) index backing ORDER BY + row-value comparison
+   used by the cursor pagination in GET /companies/
+2. Drop idx_companies_name (left-prefix of the new index)
+Both run CONCURRENTLY outside the migration transaction
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('idx_companies_name_id', 'companies', ['company_name', 'company_id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('idx_companies_name', table_name='companies',
+                      postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('idx_companies_name', 'companies', ['company_name'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('idx_companies_name_id', table_name='companies',
+                      postgresql_concurrently=True, if_exists=True)
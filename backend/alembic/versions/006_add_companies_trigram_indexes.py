@@ -0,0 +1,55 @@
+"""Add trigram GIN indexes for company substring searches
+
+Revision ID: 006
+Revises: 005
+Create Date: 2025-10-27 13:00:00.000000
+
+Changes:
+1. Enable pg_trgm extension
+2. GIN (gin_trgm_ops) indexes on the columns searched with ILIKE '%term%'
+   by /companies/ and /companies/search/by-activity (leading % can't use B-tree)
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+# (nome do índice, coluna) em companies
+TRIGRAM_INDEXES = [
+    ('idx_companies_name_trgm', 'company_name'),
+    ('idx_companies_trade_description_trgm', 'trade_description_native'),
+    ('idx_companies_cae_label_trgm', 'cae_primary_label'),
+    ('idx_companies_sector_trgm', 'activity_sector'),
+]
+
+
+def upgrade() -> None:
+    # 1. Enable trigram support
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # 2. Trigram indexes (GIN builds are slow: don't hold a write lock on companies)
+    with op.get_context().autocommit_block():
+        for index_name, column in TRIGRAM_INDEXES:
+            op.create_index(
+                index_name,
+                'companies',
+                [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    # Drop trigram indexes (extension is kept, other objects may depend on it)
+    with op.get_context().autocommit_block():
+        for index_name, _ in reversed(TRIGRAM_INDEXES):
+            op.drop_index(index_name, table_name='companies',
+                          postgresql_concurrently=True, if_exists=True)
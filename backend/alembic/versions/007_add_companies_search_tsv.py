@@ -0,0 +1,50 @@
+"""Add full-text search column to companies
+
+Revision ID: 007
+Revises: 006
+Create Date: 2025-10-27 14:00:00.000000
+
+Changes:
+1. Generated column search_tsv (portuguese tsvector over name, CAE label,
+   trade description and activity sector), maintained by PostgreSQL
+2. GIN index on search_tsv so /companies/search/by-activity is a single
+   indexed @@ lookup instead of three OR'd ILIKE scans
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 1. Generated tsvector column
+    op.execute("""
+        ALTER TABLE companies
+        ADD COLUMN search_tsv tsvector
+        GENERATED ALWAYS AS (
+            to_tsvector(
+                'portuguese',
+                coalesce(company_name, '') || ' ' ||
+                coalesce(cae_primary_label, '') || ' ' ||
+                coalesce(trade_description_native, '') || ' ' ||
+                coalesce(activity_sector, '')
+            )
+        ) STORED
+    """)
+
+    # 2. GIN index (concurrent build, outside the migration transaction)
+    with op.get_context().autocommit_block():
+        op.create_index('idx_companies_search_tsv', 'companies', ['search_tsv'], postgresql_using='gin',
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_companies_search_tsv', table_name='companies',
+                      postgresql_concurrently=True, if_exists=True)
+    op.drop_column('companies', 'search_tsv')
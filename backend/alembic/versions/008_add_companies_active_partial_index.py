@@ -0,0 +1,39 @@
+"""Add partial index over active companies
+
+Revision ID: 008
+Revises: 007
+Create Date: 2025-10-27 15:00:00.000000
+
+Changes:
+1. Partial (company_name, company_id) index WHERE is_active = true, backing the
+   keyset-ordered listing in GET /companies/ now that it defaults to active_only
+   (only live rows are indexed, so it is smaller than idx_companies_name_id)
+Built CONCURRENTLY outside the migration transaction
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_companies_active_name_id',
+            'companies',
+            ['company_name', 'company_id'],
+            postgresql_where=sa.text('is_active = true'),
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_companies_active_name_id', table_name='companies',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,37 @@
+"""Add composite index for keyset pagination of incentives
+
+Revision ID: 009
+Revises: 008
+Create Date: 2025-10-27 16:00:00.000000
+
+Changes:
+1. (publication_date DESC NULLS LAST, incentive_id DESC) index backing the
+   ORDER BY + cursor filter used by the pagination in GET /incentives/
+Built CONCURRENTLY outside the migration transaction
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_incentives_publication_id',
+            'incentives',
+            [sa.text('publication_date DESC NULLS LAST'), sa.text('incentive_id DESC')],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_incentives_publication_id', table_name='incentives',
+                      postgresql_concurrently=True, if_exists=True)
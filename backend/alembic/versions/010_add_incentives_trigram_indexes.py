@@ -0,0 +1,54 @@
+"""Add trigram GIN indexes for incentive substring searches
+
+Revision ID: 010
+Revises: 009
+Create Date: 2025-10-27 17:00:00.000000
+
+Changes:
+1. Enable pg_trgm extension (no-op if 006 already did)
+2. GIN (gin_trgm_ops) indexes on incentives.title / incentives.description,
+   searched with ILIKE '%term%' by GET /incentives/ (leading % can't use B-tree)
+Built CONCURRENTLY outside the migration transaction
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+# (nome do índice, coluna) em incentives
+TRIGRAM_INDEXES = [
+    ('idx_incentives_title_trgm', 'title'),
+    ('idx_incentives_description_trgm', 'description'),
+]
+
+
+def upgrade() -> None:
+    # 1. Enable trigram support
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # 2. Trigram indexes
+    with op.get_context().autocommit_block():
+        for index_name, column in TRIGRAM_INDEXES:
+            op.create_index(
+                index_name,
+                'incentives',
+                [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    # Drop trigram indexes (extension is kept, other objects depend on it)
+    with op.get_context().autocommit_block():
+        for index_name, _ in reversed(TRIGRAM_INDEXES):
+            op.drop_index(index_name, table_name='incentives',
+                          postgresql_concurrently=True, if_exists=True)
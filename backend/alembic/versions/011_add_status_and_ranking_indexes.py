@@ -0,0 +1,59 @@
+"""Add composite indexes for AI batch selection and incentive match ranking
+
+Revision ID: 011
+Revises: 010
+Create Date: 2025-10-28 10:00:00.000000
+
+Changes:
+1. (ai_processing_status, incentive_id) on incentives_metadata for the
+   pending/failed selection of the AI batch jobs (index-only scan + join key)
+2. Drop idx_metadata_status, now a left-prefix of the new index
+3. (incentive_id, ranking_position) on incentive_company_matches for
+   GET /incentives/{id}/matches (filter + ORDER BY without a sort step)
+ai_cost_tracking.created_at already has a btree index, which PostgreSQL scans
+backwards for ORDER BY created_at DESC LIMIT n (/data/costs/recent)
+All index DDL runs CONCURRENTLY outside the migration transaction
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # 1. Status filter -> incentive ids
+        op.create_index(
+            'idx_metadata_status_incentive',
+            'incentives_metadata',
+            ['ai_processing_status', 'incentive_id'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+        # 2. Drop redundant single-column index
+        op.drop_index('idx_metadata_status', table_name='incentives_metadata',
+                      postgresql_concurrently=True, if_exists=True)
+
+        # 3. Matches of one incentive in ranking order
+        op.create_index(
+            'idx_matches_incentive_rank',
+            'incentive_company_matches',
+            ['incentive_id', 'ranking_position'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_matches_incentive_rank', table_name='incentive_company_matches',
+                      postgresql_concurrently=True, if_exists=True)
+        op.create_index('idx_metadata_status', 'incentives_metadata', ['ai_processing_status'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('idx_metadata_status_incentive', table_name='incentives_metadata',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,30 @@
+"""Add OpenAI Batch API tracking columns to incentives_metadata
+
+Revision ID: 012
+Revises: 011
+Create Date: 2025-10-28 11:00:00.000000
+
+Changes:
+1. ai_batch_id / ai_batch_custom_id on incentives_metadata: the OpenAI batch
+   and the request (group of incentives) a "submitted" incentive belongs to
+   (nullable, no default: metadata-only change, no table rewrite)
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('incentives_metadata', sa.Column('ai_batch_id', sa.String(64), nullable=True))
+    op.add_column('incentives_metadata', sa.Column('ai_batch_custom_id', sa.String(64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('incentives_metadata', 'ai_batch_custom_id')
+    op.drop_column('incentives_metadata', 'ai_batch_id')
@@ -0,0 +1,52 @@
+"""Index ai_cost_tracking.incentive_id as (incentive_id, created_at) and drop redundant FK indexes
+
+Revision ID: 013
+Revises: 012
+Create Date: 2025-10-28 14:00:00.000000
+
+Changes:
+1. (incentive_id, created_at) on ai_cost_tracking: FK lookups (ON DELETE of an
+   incentive) plus the cost history of one incentive in date order
+2. Drop idx_ai_cost_tracking_incentive_id, now a left-prefix of the new index
+3. Drop idx_metadata_incentive: incentives_metadata.incentive_id is UNIQUE and
+   the constraint's own index already covers the FK
+The matches FKs are already the leading columns of idx_matches_*_score (004)
+and idx_matches_incentive_rank (011); all indexes are now declared in models.py
+All index DDL runs CONCURRENTLY outside the migration transaction
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # 1. FK + per-incentive cost history
+        op.create_index(
+            'idx_ai_cost_tracking_incentive_created',
+            'ai_cost_tracking',
+            ['incentive_id', 'created_at'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+        # 2./3. Drop redundant indexes
+        op.drop_index('idx_ai_cost_tracking_incentive_id', table_name='ai_cost_tracking',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('idx_metadata_incentive', table_name='incentives_metadata',
+                      postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('idx_metadata_incentive', 'incentives_metadata', ['incentive_id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('idx_ai_cost_tracking_incentive_id', 'ai_cost_tracking', ['incentive_id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('idx_ai_cost_tracking_incentive_created', table_name='ai_cost_tracking',
+                      postgresql_concurrently=True, if_exists=True)
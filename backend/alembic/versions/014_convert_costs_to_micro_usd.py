@@ -0,0 +1,52 @@
+"""Store ai_cost_tracking costs as BIGINT micro-USD
+
+Revision ID: 014
+Revises: 013
+Create Date: 2025-10-28 15:00:00.000000
+
+Changes:
+1. input_cost/output_cost/total_cost NUMERIC(10,6) -> input_cost_micro_usd/
+   output_cost_micro_usd/total_cost_micro_usd BIGINT (millionths of a dollar):
+   same precision, fixed-width 8 bytes and integer SUM() in /data/costs
+   instead of numeric arithmetic
+The type change rewrites ai_cost_tracking (append-only log, small next to the
+other tables) under an exclusive lock
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '014'
+down_revision = '013'
+branch_labels = None
+depends_on = None
+
+
+COST_COLUMNS = ('input_cost', 'output_cost', 'total_cost')
+
+
+def upgrade() -> None:
+    for column in COST_COLUMNS:
+        op.alter_column(
+            'ai_cost_tracking',
+            column,
+            type_=sa.BigInteger(),
+            existing_type=sa.Numeric(10, 6),
+            existing_nullable=False,
+            postgresql_using=f'round({column} * 1000000)::bigint'
+        )
+        op.alter_column('ai_cost_tracking', column, new_column_name=f'{column}_micro_usd')
+
+
+def downgrade() -> None:
+    for column in COST_COLUMNS:
+        op.alter_column('ai_cost_tracking', f'{column}_micro_usd', new_column_name=column)
+        op.alter_column(
+            'ai_cost_tracking',
+            column,
+            type_=sa.Numeric(10, 6),
+            existing_type=sa.BigInteger(),
+            existing_nullable=False,
+            postgresql_using=f'{column} / 1000000.0'
+        )
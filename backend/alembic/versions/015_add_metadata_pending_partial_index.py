@@ -0,0 +1,41 @@
+"""Add a partial index over the pending AI processing queue
+
+Revision ID: 015
+Revises: 014
+Create Date: 2025-10-28 16:00:00.000000
+
+Changes:
+1. (created_at, incentive_id) on incentives_metadata WHERE ai_processing_status = 'pending':
+   the AI batch job reads the next N pending incentives oldest first with an
+   index-only range scan; the index only holds the backlog, so it stays tiny
+   once processing has caught up
+idx_metadata_status_incentive (011) still serves the failed/status breakdown queries
+All index DDL runs CONCURRENTLY outside the migration transaction
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '015'
+down_revision = '014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_metadata_pending',
+            'incentives_metadata',
+            ['created_at', 'incentive_id'],
+            postgresql_where=sa.text("ai_processing_status = 'pending'"),
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_metadata_pending', table_name='incentives_metadata',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,56 @@
+"""Store companies.cae_primary_code as a JSONB list with a GIN index
+
+Revision ID: 016
+Revises: 015
+Create Date: 2025-10-28 17:00:00.000000
+
+Changes:
+1. companies.cae_primary_code VARCHAR(10) -> JSONB list of codes, as the model
+   (and the LLM CAE inference) already treat it; existing single codes become
+   one-element lists
+2. Drop the B-tree idx_companies_cae (002), useless for list lookups
+3. GIN (jsonb_path_ops) index so cae_primary_code @> '["62010"]' is index-backed
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '016'
+down_revision = '015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 1./2. Type change (rewrites companies) after dropping the old index
+    op.drop_index('idx_companies_cae', table_name='companies', if_exists=True)
+    op.execute(
+        "ALTER TABLE companies ALTER COLUMN cae_primary_code TYPE jsonb "
+        "USING CASE WHEN cae_primary_code IS NULL THEN NULL ELSE jsonb_build_array(cae_primary_code) END"
+    )
+
+    # 3. Containment index, built without blocking writes
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_companies_cae_gin',
+            'companies',
+            ['cae_primary_code'],
+            postgresql_using='gin',
+            postgresql_ops={'cae_primary_code': 'jsonb_path_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_companies_cae_gin', table_name='companies',
+                      postgresql_concurrently=True, if_exists=True)
+
+    # Only the first code fits back into the old column
+    op.execute(
+        "ALTER TABLE companies ALTER COLUMN cae_primary_code TYPE varchar(10) "
+        "USING left(cae_primary_code->>0, 10)"
+    )
+    op.create_index('idx_companies_cae', 'companies', ['cae_primary_code'])
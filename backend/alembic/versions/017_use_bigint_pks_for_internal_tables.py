@@ -0,0 +1,44 @@
+"""Use BIGSERIAL primary keys for matches, AI cost tracking and incentive metadata
+
+Revision ID: 017
+Revises: 016
+Create Date: 2025-10-28 18:00:00.000000
+
+Changes:
+1. incentive_company_matches.match_id, ai_cost_tracking.tracking_id and
+   incentives_metadata.metadata_id UUID -> BIGSERIAL: none of them is
+   referenced by a foreign key or exposed as a lookup key, and an 8-byte
+   sequential key halves the PK index next to a 16-byte UUID
+   (incentives_metadata is still addressed by its UNIQUE incentive_id)
+Dropping the old column also drops its primary key constraint; existing rows
+are numbered by the new sequence. Each table is rewritten under an exclusive lock
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '017'
+down_revision = '016'
+branch_labels = None
+depends_on = None
+
+
+# (tabela, coluna PK)
+PK_COLUMNS = [
+    ('incentive_company_matches', 'match_id'),
+    ('ai_cost_tracking', 'tracking_id'),
+    ('incentives_metadata', 'metadata_id'),
+]
+
+
+def upgrade() -> None:
+    for table, column in PK_COLUMNS:
+        op.execute(f"ALTER TABLE {table} DROP COLUMN {column}, ADD COLUMN {column} BIGSERIAL PRIMARY KEY")
+
+
+def downgrade() -> None:
+    for table, column in reversed(PK_COLUMNS):
+        op.execute(
+            f"ALTER TABLE {table} DROP COLUMN {column}, "
+            f"ADD COLUMN {column} UUID PRIMARY KEY DEFAULT gen_random_uuid()"
+        )
@@ -0,0 +1,73 @@
+"""Add unique constraints on incentive_company_matches
+
+Revision ID: 018
+Revises: 017
+Create Date: 2025-10-28 19:00:00.000000
+
+Changes:
+1. Remove duplicate rows (same incentive + ranking position, or same incentive
+   + company), keeping the best-scored one
+2. uq_matches_incentive_rank (incentive_id, ranking_position) and
+   uq_matches_incentive_company (incentive_id, company_id): the matcher inserts
+   with ON CONFLICT DO NOTHING instead of deduplicating in Python
+3. Drop idx_matches_incentive_rank (011), same columns as the new unique index
+The unique indexes are built CONCURRENTLY and then attached as constraints
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '018'
+down_revision = '017'
+branch_labels = None
+depends_on = None
+
+
+# (constraint/índice, colunas)
+UNIQUE_CONSTRAINTS = [
+    ('uq_matches_incentive_rank', ['incentive_id', 'ranking_position']),
+    ('uq_matches_incentive_company', ['incentive_id', 'company_id']),
+]
+
+
+def upgrade() -> None:
+    # 1. Deduplicate
+    for _, columns in UNIQUE_CONSTRAINTS:
+        partition = ", ".join(columns)
+        op.execute(f"""
+            DELETE FROM incentive_company_matches
+            WHERE match_id IN (
+                SELECT match_id FROM (
+                    SELECT match_id, row_number() OVER (
+                        PARTITION BY {partition}
+                        ORDER BY match_score DESC NULLS LAST, match_id
+                    ) AS rn
+                    FROM incentive_company_matches
+                ) ranked
+                WHERE rn > 1
+            )
+        """)
+
+    # 2. Unique indexes without blocking writers
+    with op.get_context().autocommit_block():
+        for name, columns in UNIQUE_CONSTRAINTS:
+            op.create_index(name, 'incentive_company_matches', columns, unique=True,
+                            postgresql_concurrently=True, if_not_exists=True)
+
+    for name, _ in UNIQUE_CONSTRAINTS:
+        op.execute(f"ALTER TABLE incentive_company_matches ADD CONSTRAINT {name} UNIQUE USING INDEX {name}")
+
+    # 3. Drop redundant index
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_matches_incentive_rank', table_name='incentive_company_matches',
+                      postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('idx_matches_incentive_rank', 'incentive_company_matches',
+                        ['incentive_id', 'ranking_position'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+    for name, _ in reversed(UNIQUE_CONSTRAINTS):
+        op.drop_constraint(name, 'incentive_company_matches', type_='unique')
@@ -0,0 +1,59 @@
+"""Store incentives_metadata.ai_processing_status as a native ENUM
+
+Revision ID: 019
+Revises: 018
+Create Date: 2025-10-28 20:00:00.000000
+
+Changes:
+1. CREATE TYPE ai_processing_status AS ENUM (pending, processing, submitted,
+   completed, failed)
+2. incentives_metadata.ai_processing_status VARCHAR(50) -> ai_processing_status
+   (4 bytes per value and per index entry instead of a varlena string)
+3. Recreate idx_metadata_pending (015): its predicate was stored as a text
+   comparison and would no longer match WHERE ai_processing_status = 'pending'
+The type change rewrites incentives_metadata and its indexes under an exclusive lock
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '019'
+down_revision = '018'
+branch_labels = None
+depends_on = None
+
+
+AI_PROCESSING_STATUSES = ('pending', 'processing', 'submitted', 'completed', 'failed')
+
+
+def _create_pending_index() -> None:
+    op.execute(
+        "CREATE INDEX idx_metadata_pending ON incentives_metadata (created_at, incentive_id) "
+        "WHERE ai_processing_status = 'pending'"
+    )
+
+
+def upgrade() -> None:
+    labels = ", ".join(f"'{status}'" for status in AI_PROCESSING_STATUSES)
+    op.execute(f"CREATE TYPE ai_processing_status AS ENUM ({labels})")
+
+    op.drop_index('idx_metadata_pending', table_name='incentives_metadata', if_exists=True)
+    op.execute("ALTER TABLE incentives_metadata ALTER COLUMN ai_processing_status DROP DEFAULT")
+    op.execute(
+        "ALTER TABLE incentives_metadata ALTER COLUMN ai_processing_status TYPE ai_processing_status "
+        "USING ai_processing_status::ai_processing_status"
+    )
+    op.execute("ALTER TABLE incentives_metadata ALTER COLUMN ai_processing_status SET DEFAULT 'pending'")
+    _create_pending_index()
+
+
+def downgrade() -> None:
+    op.drop_index('idx_metadata_pending', table_name='incentives_metadata', if_exists=True)
+    op.execute("ALTER TABLE incentives_metadata ALTER COLUMN ai_processing_status DROP DEFAULT")
+    op.execute(
+        "ALTER TABLE incentives_metadata ALTER COLUMN ai_processing_status TYPE varchar(50) "
+        "USING ai_processing_status::text"
+    )
+    op.execute("ALTER TABLE incentives_metadata ALTER COLUMN ai_processing_status SET DEFAULT 'pending'")
+    _create_pending_index()
+    op.execute("DROP TYPE ai_processing_status")
@@ -0,0 +1,118 @@
+"""Add a trigger-maintained analytics_summary row
+
+Revision ID: 020
+Revises: 019
+Create Date: 2025-10-28 21:00:00.000000
+
+Changes:
+1. analytics_summary table with a single row (id = 1): total incentives,
+   companies, matches and total budget, seeded from the current data
+2. Statement-level AFTER INSERT/UPDATE/DELETE/TRUNCATE triggers with transition
+   tables on incentives, companies and incentive_company_matches apply the
+   delta of each statement with an UPDATE of the summary row (one per
+   statement, not per row). Every writing transaction still holds that row's
+   lock until it commits, so concurrent writers serialize on it; 027 replaces
+   the UPDATE with an append-only delta table
+The chatbot statistics read this row instead of COUNT(*)/SUM() over whole tables
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '020'
+down_revision = '019'
+branch_labels = None
+depends_on = None
+
+
+# (tabela, contador, expressão somada a total_budget por linha ou None)
+COUNTED_TABLES = [
+    ('incentives', 'total_incentives', 'coalesce(sum(total_budget), 0)'),
+    ('companies', 'total_companies', None),
+    ('incentive_company_matches', 'total_matches', None),
+]
+
+
+def _delta_sql(counter: str, budget_sum: str, rows: str, sign: str) -> str:
+    assignments = [f"{counter} = {counter} {sign} (SELECT count(*) FROM {rows})"]
+    if budget_sum:
+        assignments.append(f"total_budget = total_budget {sign} (SELECT {budget_sum} FROM {rows})")
+    return f"UPDATE analytics_summary SET {', '.join(assignments)}, updated_at = now() WHERE id = 1;"
+
+
+def upgrade() -> None:
+    # 1. Summary row
+    op.create_table(
+        'analytics_summary',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('total_incentives', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('total_companies', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('total_matches', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('total_budget', sa.Numeric(18, 2), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()')),
+        sa.CheckConstraint('id = 1', name='ck_analytics_summary_single_row')
+    )
+    op.execute("""
+        INSERT INTO analytics_summary (id, total_incentives, total_companies, total_matches, total_budget)
+        SELECT 1,
+               (SELECT count(*) FROM incentives),
+               (SELECT count(*) FROM companies),
+               (SELECT count(*) FROM incentive_company_matches),
+               (SELECT coalesce(sum(total_budget), 0) FROM incentives)
+    """)
+
+    # 2. Delta triggers
+    for table, counter, budget_sum in COUNTED_TABLES:
+        reset = [f"{counter} = 0"] + (["total_budget = 0"] if budget_sum else [])
+        update_delta = (
+            f"UPDATE analytics_summary SET total_budget = total_budget "
+            f"+ (SELECT {budget_sum} FROM new_rows) - (SELECT {budget_sum} FROM old_rows), "
+            f"updated_at = now() WHERE id = 1;"
+            if budget_sum else "NULL;"
+        )
+        op.execute(f"""
+            CREATE FUNCTION analytics_summary_{table}() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    {_delta_sql(counter, budget_sum, 'new_rows', '+')}
+                ELSIF TG_OP = 'DELETE' THEN
+                    {_delta_sql(counter, budget_sum, 'old_rows', '-')}
+                ELSIF TG_OP = 'UPDATE' THEN
+                    {update_delta}
+                ELSE
+                    UPDATE analytics_summary SET {', '.join(reset)}, updated_at = now() WHERE id = 1;
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute(f"""
+            CREATE TRIGGER analytics_summary_{table}_insert AFTER INSERT ON {table}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION analytics_summary_{table}()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER analytics_summary_{table}_delete AFTER DELETE ON {table}
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION analytics_summary_{table}()
+        """)
+        if budget_sum:
+            op.execute(f"""
+                CREATE TRIGGER analytics_summary_{table}_update AFTER UPDATE ON {table}
+                REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION analytics_summary_{table}()
+            """)
+        op.execute(f"""
+            CREATE TRIGGER analytics_summary_{table}_truncate AFTER TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION analytics_summary_{table}()
+        """)
+
+
+def downgrade() -> None:
+    for table, _, _ in reversed(COUNTED_TABLES):
+        for event in ('truncate', 'update', 'delete', 'insert'):
+            op.execute(f"DROP TRIGGER IF EXISTS analytics_summary_{table}_{event} ON {table}")
+        op.execute(f"DROP FUNCTION IF EXISTS analytics_summary_{table}()")
+
+    op.drop_table('analytics_summary')
@@ -0,0 +1,28 @@
+"""Default incentives_metadata.fields_completed_by_ai to an empty JSONB list
+
+Revision ID: 021
+Revises: 020
+Create Date: 2025-10-29 09:00:00.000000
+
+Changes:
+1. SET DEFAULT '[]'::jsonb on fields_completed_by_ai (JSONB since 003), so rows
+   inserted outside the importer (bulk loads, scripts) get a list, not NULL
+2. Backfill existing NULLs
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '021'
+down_revision = '020'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE incentives_metadata ALTER COLUMN fields_completed_by_ai SET DEFAULT '[]'::jsonb")
+    op.execute("UPDATE incentives_metadata SET fields_completed_by_ai = '[]'::jsonb WHERE fields_completed_by_ai IS NULL")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE incentives_metadata ALTER COLUMN fields_completed_by_ai DROP DEFAULT")
@@ -0,0 +1,49 @@
+"""Add trigram GIN expression indexes on the ai_description keys the chatbot searches
+
+Revision ID: 022
+Revises: 021
+Create Date: 2025-10-29 10:00:00.000000
+
+Changes:
+1. GIN (gin_trgm_ops) on (ai_description ->> 'summary') and
+   (ai_description ->> 'eligible_sectors'): the chatbot filters both with
+   ILIKE '%term%', which a B-tree expression index can't serve
+The queries use the same ->> expressions, so the planner matches the indexes
+All index DDL runs CONCURRENTLY outside the migration transaction
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '022'
+down_revision = '021'
+branch_labels = None
+depends_on = None
+
+
+# (nome do índice, chave de incentives.ai_description)
+AI_DESCRIPTION_INDEXES = [
+    ('idx_incentives_ai_summary_trgm', 'summary'),
+    ('idx_incentives_ai_sectors_trgm', 'eligible_sectors'),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name, key in AI_DESCRIPTION_INDEXES:
+            op.create_index(
+                index_name,
+                'incentives',
+                [sa.text(f"(ai_description ->> '{key}') gin_trgm_ops")],
+                postgresql_using='gin',
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name, _ in reversed(AI_DESCRIPTION_INDEXES):
+            op.drop_index(index_name, table_name='incentives',
+                          postgresql_concurrently=True, if_exists=True)
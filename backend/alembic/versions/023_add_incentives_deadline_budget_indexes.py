@@ -0,0 +1,51 @@
+"""Add B-tree indexes for the deadline and budget filters on incentives
+
+Revision ID: 023
+Revises: 022
+Create Date: 2025-10-29 11:00:00.000000
+
+Changes:
+1. end_date index: deadline lookups ("still open", "closing before X") and
+   ORDER BY end_date; the (start_date, end_date) index from 001 only serves
+   them when start_date is also constrained
+2. total_budget index for the chatbot's minimum budget filter (>=)
+publication_date is already covered by idx_incentives_publication_id (009)
+No partial "end_date >= CURRENT_DATE" index: index predicates must be
+immutable, so a plain end_date index serves the open-incentives range scan
+All index DDL runs CONCURRENTLY outside the migration transaction
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '023'
+down_revision = '022'
+branch_labels = None
+depends_on = None
+
+
+# (nome do índice, coluna)
+INCENTIVE_INDEXES = [
+    ('idx_incentives_end_date', 'end_date'),
+    ('idx_incentives_total_budget', 'total_budget'),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name, column in INCENTIVE_INDEXES:
+            op.create_index(
+                index_name,
+                'incentives',
+                [column],
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name, _ in reversed(INCENTIVE_INDEXES):
+            op.drop_index(index_name, table_name='incentives',
+                          postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,51 @@
+"""Convert the timestamp columns to timestamptz
+
+Revision ID: 024
+Revises: 023
+Create Date: 2025-10-29 12:00:00.000000
+
+Changes:
+1. timestamp without time zone -> timestamptz on every date/instant column.
+   The CSV dates carry an offset ("+00") that the naive columns dropped, and
+   the app mixed datetime.now() / datetime.utcnow() when writing them
+2. Existing values are read as UTC (the server/container timezone)
+Same 8-byte storage; the ALTER rewrites each table and rebuilds its indexes
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '024'
+down_revision = '023'
+branch_labels = None
+depends_on = None
+
+
+# (tabela, colunas)
+TIMESTAMP_COLUMNS = [
+    ('incentives', ['publication_date', 'start_date', 'end_date']),
+    ('incentives_metadata', ['ai_processing_date', 'created_at', 'updated_at']),
+    ('companies', ['created_at', 'updated_at']),
+    ('incentive_company_matches', ['created_at']),
+    ('ai_cost_tracking', ['created_at']),
+    ('analytics_summary', ['updated_at']),
+]
+
+
+def upgrade() -> None:
+    for table, columns in TIMESTAMP_COLUMNS:
+        alterations = ", ".join(
+            f"ALTER COLUMN {column} TYPE timestamptz USING {column} AT TIME ZONE 'UTC'"
+            for column in columns
+        )
+        op.execute(f"ALTER TABLE {table} {alterations}")
+
+
+def downgrade() -> None:
+    for table, columns in reversed(TIMESTAMP_COLUMNS):
+        alterations = ", ".join(
+            f"ALTER COLUMN {column} TYPE timestamp USING {column} AT TIME ZONE 'UTC'"
+            for column in columns
+        )
+        op.execute(f"ALTER TABLE {table} {alterations}")
@@ -0,0 +1,45 @@
+"""Convert the free-text varchar(n) columns to text
+
+Revision ID: 025
+Revises: 024
+Create Date: 2025-10-29 13:00:00.000000
+
+Changes:
+1. incentives.title / source_link and companies.company_name /
+   cae_primary_label / website / activity_sector: varchar(n) -> text.
+   The limits were arbitrary (no product rule behind 200/500/1000) and would
+   only reject a longer CSV value at import
+varchar -> text is binary-coercible: no table rewrite, the indexes are kept
+The short bounded columns (company_size, region, batch ids, cost tracking
+labels) stay varchar(n)
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '025'
+down_revision = '024'
+branch_labels = None
+depends_on = None
+
+
+# (tabela, coluna, tamanho anterior)
+TEXT_COLUMNS = [
+    ('incentives', 'title', 500),
+    ('incentives', 'source_link', 1000),
+    ('companies', 'company_name', 500),
+    ('companies', 'cae_primary_label', 500),
+    ('companies', 'website', 500),
+    ('companies', 'activity_sector', 200),
+]
+
+
+def upgrade() -> None:
+    for table, column, _ in TEXT_COLUMNS:
+        op.alter_column(table, column, type_=sa.Text())
+
+
+def downgrade() -> None:
+    for table, column, length in reversed(TEXT_COLUMNS):
+        op.alter_column(table, column, type_=sa.String(length))
@@ -0,0 +1,53 @@
+"""Cascade deletes from incentives/companies to incentive_company_matches
+
+Revision ID: 026
+Revises: 025
+Create Date: 2025-10-29 14:00:00.000000
+
+Changes:
+1. Recreate the two incentive_company_matches foreign keys with ON DELETE
+   CASCADE (incentives_metadata already cascades since 002), so deleting an
+   incentive or company no longer fails on its matches
+The new constraints are added NOT VALID and validated after the migration
+transaction commits: VALIDATE only takes a SHARE UPDATE EXCLUSIVE lock, so
+writers aren't blocked while the existing rows are checked
+The (company_id) covering index (idx_matches_company_score, 004) and the
+partial index over active companies (008) already exist
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '026'
+down_revision = '025'
+branch_labels = None
+depends_on = None
+
+
+# (constraint, coluna, tabela/coluna referenciada)
+MATCH_FOREIGN_KEYS = [
+    ('incentive_company_matches_incentive_id_fkey', 'incentive_id', 'incentives(incentive_id)'),
+    ('incentive_company_matches_company_id_fkey', 'company_id', 'companies(company_id)'),
+]
+
+
+def _recreate_foreign_keys(on_delete: str) -> None:
+    for name, column, referenced in MATCH_FOREIGN_KEYS:
+        op.execute(f"ALTER TABLE incentive_company_matches DROP CONSTRAINT IF EXISTS {name}")
+        op.execute(
+            f"ALTER TABLE incentive_company_matches ADD CONSTRAINT {name} "
+            f"FOREIGN KEY ({column}) REFERENCES {referenced}{on_delete} NOT VALID"
+        )
+
+    # Validação fora da transação da migração: o lock do ADD CONSTRAINT já foi libertado
+    with op.get_context().autocommit_block():
+        for name, _, _ in MATCH_FOREIGN_KEYS:
+            op.execute(f"ALTER TABLE incentive_company_matches VALIDATE CONSTRAINT {name}")
+
+
+def upgrade() -> None:
+    _recreate_foreign_keys(" ON DELETE CASCADE")
+
+
+def downgrade() -> None:
+    _recreate_foreign_keys("")
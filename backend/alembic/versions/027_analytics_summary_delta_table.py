@@ -0,0 +1,159 @@
+"""Maintain analytics_summary through an append-only delta table
+
+Revision ID: 027
+Revises: 026
+Create Date: 2025-10-29 15:00:00.000000
+
+Changes:
+1. analytics_summary_deltas table: the 020 triggers now INSERT one delta row per
+   statement instead of UPDATEing the single analytics_summary row, so concurrent
+   writers (AI groups, matcher, importer) no longer wait on that row's lock until
+   they commit
+2. The incentives UPDATE trigger only fires on UPDATE OF total_budget, per row and
+   only when the value changes (transition tables can't be combined with a column
+   list): AI writes of dates/ai_description no longer touch the summary
+3. analytics_summary_fold() moves the pending deltas into the summary row; run
+   periodically by the Celery beat task data.fold_analytics_summary (the only
+   writer of the row). Readers add the pending deltas, so totals stay exact
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '027'
+down_revision = '026'
+branch_labels = None
+depends_on = None
+
+
+# (tabela, coluna de analytics_summary, coluna de analytics_summary_deltas, soma do orçamento por linha ou None)
+COUNTED_TABLES = [
+    ('incentives', 'total_incentives', 'incentives', 'coalesce(sum(total_budget), 0)'),
+    ('companies', 'total_companies', 'companies', None),
+    ('incentive_company_matches', 'total_matches', 'matches', None),
+]
+
+
+def _delta_insert(delta: str, budget_sum: str, rows: str, sign: str) -> str:
+    columns = [delta] + (['budget'] if budget_sum else [])
+    values = [f"{sign}count(*)"] + ([f"{sign}{budget_sum}"] if budget_sum else [])
+    return f"INSERT INTO analytics_summary_deltas ({', '.join(columns)}) SELECT {', '.join(values)} FROM {rows};"
+
+
+def _truncate_delta(counter: str, delta: str, budget_sum: str) -> str:
+    # TRUNCATE: delta que anula o total atual (linha de resumo + deltas ainda por aplicar)
+    columns = [delta] + (['budget'] if budget_sum else [])
+    values = [f"-(s.{counter} + (SELECT coalesce(sum({delta}), 0) FROM analytics_summary_deltas))"]
+    if budget_sum:
+        values.append("-(s.total_budget + (SELECT coalesce(sum(budget), 0) FROM analytics_summary_deltas))")
+    return (
+        f"INSERT INTO analytics_summary_deltas ({', '.join(columns)}) "
+        f"SELECT {', '.join(values)} FROM analytics_summary s WHERE s.id = 1;"
+    )
+
+
+def upgrade() -> None:
+    # 1. Delta table
+    op.create_table(
+        'analytics_summary_deltas',
+        sa.Column('id', sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column('incentives', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('companies', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('matches', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('budget', sa.Numeric(18, 2), nullable=False, server_default='0')
+    )
+
+    # INSERT/DELETE/TRUNCATE triggers of 020 keep calling these functions (same names)
+    for table, counter, delta, budget_sum in COUNTED_TABLES:
+        op.execute(f"""
+            CREATE OR REPLACE FUNCTION analytics_summary_{table}() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    {_delta_insert(delta, budget_sum, 'new_rows', '')}
+                ELSIF TG_OP = 'DELETE' THEN
+                    {_delta_insert(delta, budget_sum, 'old_rows', '-')}
+                ELSE
+                    {_truncate_delta(counter, delta, budget_sum)}
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+
+    # 2. Budget changes only
+    op.execute("DROP TRIGGER IF EXISTS analytics_summary_incentives_update ON incentives")
+    op.execute("""
+        CREATE FUNCTION analytics_summary_incentives_budget() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO analytics_summary_deltas (budget)
+            VALUES (coalesce(NEW.total_budget, 0) - coalesce(OLD.total_budget, 0));
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER analytics_summary_incentives_budget AFTER UPDATE OF total_budget ON incentives
+        FOR EACH ROW WHEN (OLD.total_budget IS DISTINCT FROM NEW.total_budget)
+        EXECUTE FUNCTION analytics_summary_incentives_budget()
+    """)
+
+    # 3. Fold
+    op.execute("""
+        CREATE FUNCTION analytics_summary_fold() RETURNS void AS $$
+            WITH folded AS (DELETE FROM analytics_summary_deltas RETURNING *)
+            UPDATE analytics_summary SET
+                total_incentives = total_incentives + (SELECT coalesce(sum(incentives), 0) FROM folded),
+                total_companies = total_companies + (SELECT coalesce(sum(companies), 0) FROM folded),
+                total_matches = total_matches + (SELECT coalesce(sum(matches), 0) FROM folded),
+                total_budget = total_budget + (SELECT coalesce(sum(budget), 0) FROM folded),
+                updated_at = now()
+            WHERE id = 1
+        $$ LANGUAGE sql
+    """)
+
+
+def downgrade() -> None:
+    op.execute("SELECT analytics_summary_fold()")
+    op.execute("DROP FUNCTION IF EXISTS analytics_summary_fold()")
+    op.execute("DROP TRIGGER IF EXISTS analytics_summary_incentives_budget ON incentives")
+    op.execute("DROP FUNCTION IF EXISTS analytics_summary_incentives_budget()")
+
+    # Funções de 020: UPDATE direto da linha de resumo por statement
+    for table, counter, _, budget_sum in COUNTED_TABLES:
+        def direct(rows: str, sign: str) -> str:
+            assignments = [f"{counter} = {counter} {sign} (SELECT count(*) FROM {rows})"]
+            if budget_sum:
+                assignments.append(f"total_budget = total_budget {sign} (SELECT {budget_sum} FROM {rows})")
+            return f"UPDATE analytics_summary SET {', '.join(assignments)}, updated_at = now() WHERE id = 1;"
+
+        reset = [f"{counter} = 0"] + (["total_budget = 0"] if budget_sum else [])
+        update_delta = (
+            f"UPDATE analytics_summary SET total_budget = total_budget "
+            f"+ (SELECT {budget_sum} FROM new_rows) - (SELECT {budget_sum} FROM old_rows), "
+            f"updated_at = now() WHERE id = 1;"
+            if budget_sum else "NULL;"
+        )
+        op.execute(f"""
+            CREATE OR REPLACE FUNCTION analytics_summary_{table}() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    {direct('new_rows', '+')}
+                ELSIF TG_OP = 'DELETE' THEN
+                    {direct('old_rows', '-')}
+                ELSIF TG_OP = 'UPDATE' THEN
+                    {update_delta}
+                ELSE
+                    UPDATE analytics_summary SET {', '.join(reset)}, updated_at = now() WHERE id = 1;
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+    op.execute("""
+        CREATE TRIGGER analytics_summary_incentives_update AFTER UPDATE ON incentives
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION analytics_summary_incentives()
+    """)
+
+    op.drop_table('analytics_summary_deltas')
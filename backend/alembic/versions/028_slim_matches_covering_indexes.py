@@ -0,0 +1,54 @@
+"""Drop match_reasons from the matches covering indexes
+
+Revision ID: 028
+Revises: 027
+Create Date: 2025-10-29 16:00:00.000000
+
+Changes:
+1. Rebuild idx_matches_company_score / idx_matches_incentive_score (004) with only
+   small scalar columns in INCLUDE (ids, ranking_position): the jsonb match_reasons
+   copied every reason list into both indexes, bloating them and every match write;
+   it is now read from the heap
+Each index is built CONCURRENTLY under a temporary name, the old one dropped
+CONCURRENTLY and the new one renamed, so lookups always have an index
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '028'
+down_revision = '027'
+branch_labels = None
+depends_on = None
+
+
+# (índice, coluna de filtro, colunas INCLUDE sem match_reasons)
+COVERING_INDEXES = [
+    ('idx_matches_company_score', 'company_id', ['incentive_id', 'ranking_position']),
+    ('idx_matches_incentive_score', 'incentive_id', ['company_id', 'ranking_position']),
+]
+
+
+def _rebuild_indexes(with_reasons: bool) -> None:
+    with op.get_context().autocommit_block():
+        for name, column, include in COVERING_INDEXES:
+            op.create_index(
+                f'{name}_new',
+                'incentive_company_matches',
+                [column, sa.text('match_score DESC')],
+                postgresql_include=include + (['match_reasons'] if with_reasons else []),
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+            op.drop_index(name, table_name='incentive_company_matches',
+                          postgresql_concurrently=True, if_exists=True)
+            op.execute(f"ALTER INDEX {name}_new RENAME TO {name}")
+
+
+def upgrade() -> None:
+    _rebuild_indexes(with_reasons=False)
+
+
+def downgrade() -> None:
+    _rebuild_indexes(with_reasons=True)
@@ -8,14 +8,18 @@ Endpoints para o sistema de chatbot que permite aos utilizadores:
 - Obter estatísticas do chatbot
 """
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request, Response
+from sqlalchemy import text
 from sqlalchemy.orm import Session
-from app.db.database import SessionLocal
-from app.services.chatbot_service import ChatbotService
-from app.services.ai_processor import AIProcessor
+from app.db.database import SessionLocal, engine
+from app.services.chatbot_service import ChatbotService, get_analytics_totals
+from app.services.ai_processor import get_ai_processor
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
+import hashlib
+import json
 import os
+import time
 import logging
 
 router = APIRouter(prefix="/chatbot", tags=["chatbot"])
@@ -48,6 +52,48 @@ class ChatHistoryResponse(BaseModel):
     total_count: int
 
 
+# Cache em memória das estatísticas (agregados sobre tabelas inteiras a cada pedido)
+STATS_CACHE_TTL_SECONDS = 60
+_stats_cache: Dict[str, Any] = {"response": None, "expires_at": 0.0}
+
+# Último health check à BD bem-sucedido: probes dentro da janela não tocam na pool
+HEALTH_CACHE_TTL_SECONDS = 5
+_last_ok_at = 0.0
+
+# Conteúdo de ajuda é estático: serializado uma única vez no import
+CHATBOT_HELP = {
+    "success": True,
+    "help": {
+        "description": "Chatbot especializado em incentivos públicos portugueses",
+        "capabilities": [
+            "Consultar informações sobre incentivos",
+            "Explorar dados sobre empresas",
+            "Analisar correspondências entre incentivos e empresas",
+            "Obter estatísticas e análises"
+        ],
+        "example_queries": [
+            "Quais incentivos existem para empresas de software?",
+            "Mostra-me empresas do setor tecnológico",
+            "Que empresas são adequadas para o incentivo X?",
+            "Quantos incentivos temos na base de dados?",
+            "Qual o orçamento total disponível?"
+        ],
+        "tips": [
+            "Pode mencionar setores específicos (tecnologia, agricultura, etc.)",
+            "Pode pedir informações por região (Lisboa, Porto, etc.)",
+            "Pode usar IDs específicos de incentivos ou empresas",
+            "Pode fazer perguntas sobre orçamentos e datas"
+        ]
+    }
+}
+CHATBOT_HELP_BODY = json.dumps(CHATBOT_HELP, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+CHATBOT_HELP_ETAG = f'"{hashlib.md5(CHATBOT_HELP_BODY).hexdigest()}"'
+CHATBOT_HELP_HEADERS = {
+    "Cache-Control": "public, max-age=3600",
+    "ETag": CHATBOT_HELP_ETAG
+}
+
+
 # Dependency para obter sessão da BD
 def get_db():
     db = SessionLocal()
@@ -63,8 +109,8 @@ def get_chatbot_service(db: Session = Depends(get_db)) -> ChatbotService:
     if not api_key:
         raise HTTPException(status_code=500, detail="OpenAI API key not configured")
     
-    ai_processor = AIProcessor(api_key, db)
-    return ChatbotService(ai_processor, db)
+    # Cliente OpenAI/cache do processo (get_ai_processor); só o estado por sessão é novo
+    return ChatbotService(get_ai_processor(db, api_key), db)
 
 
 @router.post("/message", response_model=ChatResponse)
@@ -96,7 +142,7 @@ async def send_message(
 
 
 @router.get("/history/{user_id}", response_model=ChatHistoryResponse)
-async def get_chat_history(
+def get_chat_history(
     user_id: str,
     limit: int = 20,
     chatbot: ChatbotService = Depends(get_chatbot_service)
@@ -152,7 +198,7 @@ async def quick_search(
 
 
 @router.delete("/history/{user_id}")
-async def clear_chat_history(
+def clear_chat_history(
     user_id: str,
     chatbot: ChatbotService = Depends(get_chatbot_service)
 ):
@@ -179,25 +225,25 @@ async def clear_chat_history(
 
 
 @router.get("/stats")
-async def get_chatbot_stats(db: Session = Depends(get_db)):
+def get_chatbot_stats(db: Session = Depends(get_db)):
     """
     Obtém estatísticas do chatbot
     
     Returns:
-        Estatísticas de uso e performance
+        Estatísticas de uso e performance (em cache durante STATS_CACHE_TTL_SECONDS)
     """
+    now = time.monotonic()
+    if _stats_cache["response"] is not None and now < _stats_cache["expires_at"]:
+        return _stats_cache["response"]
+    
     try:
-        from app.db.models import Incentive, Company, IncentiveCompanyMatch
-        from sqlalchemy import func
-        
-        # Estatísticas gerais
-        total_incentives = db.query(func.count(Incentive.incentive_id)).scalar()
-        total_companies = db.query(func.count(Company.company_id)).scalar()
-        total_matches = db.query(func.count(IncentiveCompanyMatch.match_id)).scalar()
+        # Estatísticas gerais + orçamento total (linha de analytics_summary)
+        totals = get_analytics_totals(db)
         
-        # Orçamento total
-        total_budget_result = db.query(func.sum(Incentive.total_budget)).scalar()
-        total_budget = float(total_budget_result) if total_budget_result else 0
+        total_incentives = totals.total_incentives
+        total_companies = totals.total_companies
+        total_matches = totals.total_matches
+        total_budget = float(totals.total_budget) if totals.total_budget else 0
         
         # Estatísticas de custos (se disponível)
         try:
@@ -207,7 +253,7 @@ async def get_chatbot_stats(db: Session = Depends(get_db)):
         except:
             cost_stats = None
         
-        return {
+        response = {
             "success": True,
             "data": {
                 "total_incentives": total_incentives,
@@ -220,48 +266,35 @@ async def get_chatbot_stats(db: Session = Depends(get_db)):
             "message": "Chatbot statistics retrieved successfully"
         }
         
+        _stats_cache["response"] = response
+        _stats_cache["expires_at"] = now + STATS_CACHE_TTL_SECONDS
+        return response
+        
     except Exception as e:
         logger.error(f"Error getting chatbot stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/help")
-async def get_chatbot_help():
+async def get_chatbot_help(request: Request):
     """
     Retorna informações de ajuda sobre como usar o chatbot
     
     Returns:
-        Guia de uso do chatbot
+        Guia de uso do chatbot (pré-serializado, com ETag para respostas 304)
     """
-    return {
-        "success": True,
-        "help": {
-            "description": "Chatbot especializado em incentivos públicos portugueses",
-            "capabilities": [
-                "Consultar informações sobre incentivos",
-                "Explorar dados sobre empresas",
-                "Analisar correspondências entre incentivos e empresas",
-                "Obter estatísticas e análises"
-            ],
-            "example_queries": [
-                "Quais incentivos existem para empresas de software?",
-                "Mostra-me empresas do setor tecnológico",
-                "Que empresas são adequadas para o incentivo X?",
-                "Quantos incentivos temos na base de dados?",
-                "Qual o orçamento total disponível?"
-            ],
-            "tips": [
-                "Pode mencionar setores específicos (tecnologia, agricultura, etc.)",
-                "Pode pedir informações por região (Lisboa, Porto, etc.)",
-                "Pode usar IDs específicos de incentivos ou empresas",
-                "Pode fazer perguntas sobre orçamentos e datas"
-            ]
-        }
-    }
+    if request.headers.get("if-none-match") == CHATBOT_HELP_ETAG:
+        return Response(status_code=304, headers=CHATBOT_HELP_HEADERS)
+    
+    return Response(
+        content=CHATBOT_HELP_BODY,
+        media_type="application/json",
+        headers=CHATBOT_HELP_HEADERS
+    )
 
 
 @router.get("/health")
-async def chatbot_health():
+def chatbot_health():
     """
     Verifica saúde do serviço de chatbot
     
@@ -278,15 +311,19 @@ async def chatbot_health():
                 "timestamp": "2024-01-01T00:00:00Z"
             }
         
-        # Verificar conexão à BD
-        db = SessionLocal()
-        try:
-            db.execute("SELECT 1")
+        # Verificar conexão à BD (reutiliza o último resultado OK durante alguns segundos)
+        global _last_ok_at
+        if time.monotonic() - _last_ok_at < HEALTH_CACHE_TTL_SECONDS:
             db_status = "healthy"
-        except:
-            db_status = "unhealthy"
-        finally:
-            db.close()
+        else:
+            try:
+                # Conexão emprestada da pool, sem criar sessão ORM
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+                _last_ok_at = time.monotonic()
+                db_status = "healthy"
+            except Exception:
+                db_status = "unhealthy"
         
         overall_status = "healthy" if db_status == "healthy" else "unhealthy"
         
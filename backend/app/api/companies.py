@@ -1,14 +1,114 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, func, text, tuple_, select, bindparam
 from app.db.database import SessionLocal
-from app.db.models import Company, IncentiveCompanyMatch
-from typing import List, Optional
+from app.db.models import Company, Incentive, IncentiveCompanyMatch, company_search_tsv
+from pydantic import BaseModel, ConfigDict, field_serializer, field_validator
+from typing import Any, List, Optional
+from cachetools import TTLCache
+from datetime import datetime
+from uuid import UUID
+import base64
+import json
+import threading
 import logging
 
 router = APIRouter(prefix="/companies", tags=["companies"])
 logger = logging.getLogger(__name__)
 
+# Hot point lookup built once at import: every request reuses the same statement object,
+# so SQLAlchemy's compiled cache is hit directly and PostgreSQL always receives the same SQL shape
+COMPANY_BY_ID = select(Company).where(Company.company_id == bindparam("company_id"))
+
+# Rows fetched per round-trip by GET /companies/stream
+STREAM_CHUNK_SIZE = 500
+
+# Cache em memória dos totais de list_companies, por filtro (active_only é o default, por isso
+# sem cache cada página fazia um count(*) exato); mesmo esquema de count_incentives
+COUNT_CACHE_TTL_SECONDS = 30
+COUNT_CACHE_MAX_ENTRIES = 1024
+_count_cache = TTLCache(maxsize=COUNT_CACHE_MAX_ENTRIES, ttl=COUNT_CACHE_TTL_SECONDS)
+_count_cache_lock = threading.Lock()
+
+
+# Pydantic models para responses (lidos diretamente dos objetos ORM / Rows)
+class CompanyOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    company_id: UUID
+    company_name: str
+    cae_primary_label: Optional[str] = None
+    trade_description_native: Optional[str] = None
+    website: Optional[str] = None
+    cae_primary_code: Optional[Any] = None
+    company_size: Optional[str] = None
+    region: Optional[str] = None
+    is_active: Optional[bool] = None
+
+
+class CompanyDetailOut(CompanyOut):
+    created_at: Optional[datetime] = None
+
+    @field_serializer("created_at")
+    def created_at_isoformat(self, value: Optional[datetime]) -> Optional[str]:
+        # Mesmo formato de antes ("+00:00", não o "Z" do Pydantic)
+        return value.isoformat() if value else None
+
+
+class CompanyListResponse(BaseModel):
+    companies: List[CompanyOut]
+    total: Optional[int]
+    skip: int
+    limit: int
+    next_cursor: Optional[str]
+
+
+class CompanyIncentiveOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    incentive_id: UUID
+    incentive_title: str
+    match_score: Optional[float] = None
+    reasons: Any = []
+    ranking_position: Optional[int] = None
+    total_budget: Optional[float] = None
+
+    @field_validator("reasons", mode="before")
+    @classmethod
+    def empty_reasons(cls, value):
+        return value or []
+
+    @field_validator("total_budget", mode="before")
+    @classmethod
+    def empty_budget(cls, value):
+        # Orçamento 0/ausente -> null, como antes
+        return value or None
+
+
+class CompanyIncentivesResponse(BaseModel):
+    company_id: UUID
+    company_name: str
+    incentives: List[CompanyIncentiveOut]
+    total_incentives: int
+
+
+class ActivitySearchCompanyOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    company_id: UUID
+    company_name: str
+    cae_primary_label: Optional[str] = None
+    trade_description_native: Optional[str] = None
+    website: Optional[str] = None
+    activity_sector: Optional[str] = None
+
+
+class ActivitySearchResponse(BaseModel):
+    search_term: str
+    companies: List[ActivitySearchCompanyOut]
+    total_found: int
+
 
 def get_db():
     db = SessionLocal()
@@ -18,85 +118,156 @@ def get_db():
         db.close()
 
 
-@router.get("/")
-async def list_companies(
+def encode_cursor(company: Company) -> str:
+    """Encode the (company_name, company_id) sort key of the last row as an opaque cursor"""
+    payload = json.dumps([company.company_name, str(company.company_id)])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decode a cursor produced by encode_cursor back into (company_name, company_id)"""
+    try:
+        company_name, company_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return company_name, UUID(company_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def count_all_companies(db: Session) -> int:
+    """
+    Total number of companies for unfiltered listings.
+    
+    On PostgreSQL uses the planner estimate (pg_class.reltuples, O(1)) instead of a full
+    count(*); falls back to an exact count when the table was never analyzed.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        estimate = db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'companies'")
+        ).scalar()
+        if estimate is not None and estimate >= 0:
+            return estimate
+    return db.query(func.count(Company.company_id)).scalar()
+
+
+def count_companies(db: Session, query, search: Optional[str], activity_sector: Optional[str], active_only: bool) -> int:
+    """count() over the primary key only, cached per filter for COUNT_CACHE_TTL_SECONDS"""
+    if not (search or activity_sector or active_only):
+        return count_all_companies(db)
+    
+    key = (search, activity_sector, active_only)
+    with _count_cache_lock:
+        cached = _count_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    total = query.with_entities(func.count(Company.company_id)).scalar()
+    with _count_cache_lock:
+        _count_cache[key] = total
+    return total
+
+
+def filter_companies(query, search: Optional[str], activity_sector: Optional[str], active_only: bool):
+    """Apply the listing filters shared by GET /companies/ and GET /companies/stream"""
+    # `== True` (not IS TRUE) so PostgreSQL can use the partial index WHERE is_active = true
+    if active_only:
+        query = query.filter(Company.is_active == True)
+    
+    if search:
+        query = query.filter(
+            or_(
+                Company.company_name.ilike(f"%{search}%"),
+                Company.trade_description_native.ilike(f"%{search}%"),
+                Company.cae_primary_label.ilike(f"%{search}%")
+            )
+        )
+    
+    if activity_sector:
+        query = query.filter(Company.cae_primary_label.ilike(f"%{activity_sector}%"))
+    
+    return query
+
+
+@router.get("/", response_model=CompanyListResponse)
+def list_companies(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     search: Optional[str] = None,
     activity_sector: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (keyset pagination, replaces skip)"),
+    include_total: bool = Query(True, description="Set to false to skip counting matching rows"),
+    active_only: bool = Query(True, description="Only return active companies"),
     db: Session = Depends(get_db)
 ):
     """List companies with optional filtering"""
     try:
-        query = db.query(Company)
-        
         # Apply filters
-        if search:
-            query = query.filter(
-                or_(
-                    Company.company_name.ilike(f"%{search}%"),
-                    Company.trade_description_native.ilike(f"%{search}%"),
-                    Company.cae_primary_label.ilike(f"%{search}%")
-                )
-            )
-        
-        if activity_sector:
-            query = query.filter(Company.cae_primary_label.ilike(f"%{activity_sector}%"))
+        query = filter_companies(db.query(Company), search, activity_sector, active_only)
         
         # Get total count
-        total = query.count()
+        total = None
+        if include_total:
+            total = count_companies(db, query, search, activity_sector, active_only)
         
-        # Apply pagination
-        companies = query.offset(skip).limit(limit).all()
+        # Apply pagination: keyset on (company_name, company_id) when a cursor is given,
+        # so deep pages don't have to walk over `skip` rows
+        query = query.order_by(Company.company_name, Company.company_id)
+        if cursor:
+            query = query.filter(tuple_(Company.company_name, Company.company_id) > decode_cursor(cursor))
+        else:
+            query = query.offset(skip)
+        companies = query.limit(limit).all()
         
-        return {
-            "companies": [
-                {
-                    "company_id": str(company.company_id),
-                    "company_name": company.company_name,
-                    "cae_primary_label": company.cae_primary_label,
-                    "trade_description_native": company.trade_description_native,
-                    "website": company.website,
-                    "cae_primary_code": company.cae_primary_code,
-                    "company_size": company.company_size,
-                    "region": company.region,
-                    "is_active": company.is_active
-                }
-                for company in companies
-            ],
-            "total": total,
-            "skip": skip,
-            "limit": limit
-        }
+        return CompanyListResponse(
+            companies=[CompanyOut.model_validate(company) for company in companies],
+            total=total,
+            skip=skip,
+            limit=limit,
+            next_cursor=encode_cursor(companies[-1]) if len(companies) == limit else None
+        )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing companies: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/{company_id}")
-async def get_company(company_id: str, db: Session = Depends(get_db)):
+@router.get("/stream")
+def stream_companies(
+    search: Optional[str] = None,
+    activity_sector: Optional[str] = None,
+    active_only: bool = Query(True, description="Only return active companies"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of companies (default: all)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream companies as NDJSON (one JSON object per line).
+    
+    Rows are fetched in chunks of STREAM_CHUNK_SIZE (server-side cursor on PostgreSQL) and
+    written as they are read, so memory stays flat regardless of how many companies match.
+    """
+    query = filter_companies(db.query(Company), search, activity_sector, active_only)
+    query = query.order_by(Company.company_name, Company.company_id)
+    if limit:
+        query = query.limit(limit)
+    
+    def generate():
+        for company in query.yield_per(STREAM_CHUNK_SIZE):
+            yield CompanyOut.model_validate(company).model_dump_json().encode("utf-8") + b"\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@router.get("/{company_id}", response_model=CompanyDetailOut)
+def get_company(company_id: UUID, db: Session = Depends(get_db)):
     """Get detailed information about a specific company"""
     try:
-        company = db.query(Company).filter(
-            Company.company_id == company_id
-        ).first()
+        company = db.execute(COMPANY_BY_ID, {"company_id": company_id}).scalar_one_or_none()
         
         if not company:
             raise HTTPException(status_code=404, detail="Company not found")
         
-        return {
-            "company_id": str(company.company_id),
-            "company_name": company.company_name,
-            "cae_primary_label": company.cae_primary_label,
-            "trade_description_native": company.trade_description_native,
-            "website": company.website,
-            "cae_primary_code": company.cae_primary_code,
-            "company_size": company.company_size,
-            "region": company.region,
-            "is_active": company.is_active,
-            "created_at": company.created_at.isoformat() if company.created_at else None
-        }
+        return CompanyDetailOut.model_validate(company)
         
     except HTTPException:
         raise
@@ -105,39 +276,36 @@ async def get_company(company_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/{company_id}/incentives")
-async def get_company_incentives(company_id: str, db: Session = Depends(get_db)):
+@router.get("/{company_id}/incentives", response_model=CompanyIncentivesResponse)
+def get_company_incentives(company_id: UUID, db: Session = Depends(get_db)):
     """Get incentives that match a specific company"""
     try:
         # Check if company exists
-        company = db.query(Company).filter(
-            Company.company_id == company_id
-        ).first()
+        company = db.execute(COMPANY_BY_ID, {"company_id": company_id}).scalar_one_or_none()
         
         if not company:
             raise HTTPException(status_code=404, detail="Company not found")
         
-        # Get matches
-        matches = db.query(IncentiveCompanyMatch).filter(
+        # Get matches + incentive columns in a single JOIN (no lazy load per match)
+        matches = db.query(
+            IncentiveCompanyMatch.match_score,
+            IncentiveCompanyMatch.match_reasons.label("reasons"),
+            IncentiveCompanyMatch.ranking_position,
+            Incentive.incentive_id,
+            Incentive.title.label("incentive_title"),
+            Incentive.total_budget
+        ).join(
+            Incentive, IncentiveCompanyMatch.incentive_id == Incentive.incentive_id
+        ).filter(
             IncentiveCompanyMatch.company_id == company_id
         ).order_by(IncentiveCompanyMatch.match_score.desc()).all()
         
-        return {
-            "company_id": company_id,
-            "company_name": company.company_name,
-            "incentives": [
-                {
-                    "incentive_id": str(match.incentive.incentive_id),
-                    "incentive_title": match.incentive.title,
-                    "match_score": float(match.match_score),
-                    "reasons": match.match_reasons or [],
-                    "ranking_position": match.ranking_position,
-                    "total_budget": float(match.incentive.total_budget) if match.incentive.total_budget else None
-                }
-                for match in matches
-            ],
-            "total_incentives": len(matches)
-        }
+        return CompanyIncentivesResponse(
+            company_id=company_id,
+            company_name=company.company_name,
+            incentives=[CompanyIncentiveOut.model_validate(match) for match in matches],
+            total_incentives=len(matches)
+        )
         
     except HTTPException:
         raise
@@ -146,37 +314,29 @@ async def get_company_incentives(company_id: str, db: Session = Depends(get_db))
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/search/by-activity")
-async def search_companies_by_activity(
+@router.get("/search/by-activity", response_model=ActivitySearchResponse)
+def search_companies_by_activity(
     activity: str = Query(..., description="Activity or sector to search for"),
     limit: int = Query(50, ge=1, le=200),
+    active_only: bool = Query(True, description="Only return active companies"),
     db: Session = Depends(get_db)
 ):
     """Search companies by activity or sector"""
     try:
-        companies = db.query(Company).filter(
-            or_(
-                Company.cae_primary_label.ilike(f"%{activity}%"),
-                Company.trade_description_native.ilike(f"%{activity}%"),
-                Company.activity_sector.ilike(f"%{activity}%")
-            )
+        # Full-text search over the GIN-indexed search_tsv column, best matches first
+        ts_query = func.plainto_tsquery('portuguese', activity)
+        query = db.query(Company).filter(company_search_tsv.op('@@')(ts_query))
+        if active_only:
+            query = query.filter(Company.is_active == True)
+        companies = query.order_by(
+            func.ts_rank(company_search_tsv, ts_query).desc()
         ).limit(limit).all()
         
-        return {
-            "search_term": activity,
-            "companies": [
-                {
-                    "company_id": str(company.company_id),
-                    "company_name": company.company_name,
-                    "cae_primary_label": company.cae_primary_label,
-                    "trade_description_native": company.trade_description_native,
-                    "website": company.website,
-                    "activity_sector": company.activity_sector
-                }
-                for company in companies
-            ],
-            "total_found": len(companies)
-        }
+        return ActivitySearchResponse(
+            search_term=activity,
+            companies=[ActivitySearchCompanyOut.model_validate(company) for company in companies],
+            total_found=len(companies)
+        )
         
     except Exception as e:
         logger.error(f"Error searching companies by activity {activity}: {e}")
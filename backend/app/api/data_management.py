@@ -1,16 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query
+from celery.result import AsyncResult
+from sqlalchemy import update, select, func, literal, text
 from sqlalchemy.orm import Session
 from app.db.database import SessionLocal
-from app.db.models import Incentive, IncentiveMetadata
+from app.db.models import Incentive, IncentiveMetadata, AICostTracking, AI_PROCESSING_STATUSES
 from app.services.data_importer import DataImporter
-from app.services.ai_processor import AIProcessor
+from app.services.ai_processor import get_ai_processor
+from app.services.cost_tracker import CostTracker, MICRO_USD_PER_USD
+from app.services.incentive_cache import incentive_cache
+from app.celery_app import celery_app
 from app.services.company_matcher_unified import CompanyMatcherUnified
+from typing import Any, Dict
+import asyncio
 import os
+import time
 import logging
 
 router = APIRouter(prefix="/data", tags=["data-management"])
 logger = logging.getLogger(__name__)
 
+# Incentivos processados em simultâneo nos batches de IA (chamadas OpenAI são I/O-bound)
+AI_BATCH_CONCURRENCY = int(os.getenv("AI_BATCH_CONCURRENCY", "10"))
+# Incentivos por pedido OpenAI (1 pedido do limite RPM por grupo em vez de até 3 por incentivo)
+AI_GROUP_SIZE = int(os.getenv("AI_GROUP_SIZE", "8"))
+# Pedidos (grupos) por ficheiro da OpenAI Batch API (limites: 50 000 pedidos / 200 MB por ficheiro)
+OPENAI_BATCH_MAX_REQUESTS = 5000
+# mode=async_batch nos endpoints de batch: OpenAI Batch API (metade do preço, resultados em até 24h)
+AI_BATCH_MODE_PATTERN = "^(realtime|async_batch)$"
+# to_char para /costs/recent: "0.000123" (FM remove o padding à esquerda)
+RECENT_COST_FORMAT = "FM999990.000000"
+
+# Cache em memória do /processing-status (dashboards fazem polling; a query agrega a tabela inteira)
+PROCESSING_STATUS_CACHE_TTL_SECONDS = 30
+_processing_status_cache: Dict[str, Any] = {"response": None, "expires_at": 0.0}
+
 
 def get_db():
     db = SessionLocal()
@@ -21,8 +44,7 @@ def get_db():
 
 
 @router.post("/import")
-async def import_data(
-    background_tasks: BackgroundTasks,
+def import_data(
     companies_file: str = "companies.csv",
     incentives_file: str = "incentives.csv"
 ):
@@ -45,11 +67,12 @@ async def import_data(
                 detail=f"Incentives CSV not found: {incentives_path}. Please place your CSV file in the data/ directory."
             )
         
-        # Import data in background
-        background_tasks.add_task(import_data_task, companies_path, incentives_path)
+        # Import data in the worker
+        task = celery_app.send_task("data.import", args=[companies_path, incentives_path])
         
         return {
             "message": "Data import started in background",
+            "task_id": task.id,
             "companies_file": companies_path,
             "incentives_file": incentives_path
         }
@@ -62,28 +85,74 @@ async def import_data(
 
 
 def import_data_task(companies_path: str, incentives_path: str):
-    """Background task to import data from local files"""
+    """Background task to import data from local files (errors propagate: the Celery task is marked FAILURE)"""
+    importer = DataImporter()
     try:
-        importer = DataImporter()
         result = importer.import_from_local_files(companies_path, incentives_path)
-        importer.close()
+        incentive_cache.clear()
         
         logger.info(f"Data import completed: {result}")
+        return result
         
     except Exception as e:
         logger.error(f"Error in background data import: {e}")
+        raise
+    finally:
+        importer.close()
+
+
+# Registada antes de /process-ai/{incentive_id}, senão "batch" seria capturado como incentive_id
+@router.post("/process-ai/batch")
+def process_ai_batch(
+    limit: int = None,
+    only_pending: bool = True,
+    mode: str = Query("realtime", pattern=AI_BATCH_MODE_PATTERN)
+):
+    """
+    Process AI for multiple incentives in batch.
+    
+    Parameters:
+    - limit: Maximum number of incentives to process (None = all)
+    - only_pending: Only process incentives with status 'pending' (default: True)
+    - mode: 'realtime' (default) or 'async_batch' to go through the OpenAI Batch API
+      (half price; incentives stay 'submitted' until the periodic poller applies the results)
+    """
+    try:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
+        
+        # Start batch in the worker
+        task = celery_app.send_task(
+            "data.process_ai_batch",
+            kwargs={"limit": limit, "only_pending": only_pending, "mode": mode}
+        )
+        
+        return {
+            "message": "Batch AI processing started in background",
+            "task_id": task.id,
+            "limit": limit,
+            "only_pending": only_pending,
+            "mode": mode
+        }
+        
+    except Exception as e:
+        logger.error(f"Error starting batch AI processing: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/process-ai/{incentive_id}")
-async def process_incentive_ai(incentive_id: str, db: Session = Depends(get_db)):
+def process_incentive_ai(incentive_id: str, db: Session = Depends(get_db)):
     """Process AI analysis for a specific incentive (complete processing)"""
     try:
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise HTTPException(status_code=500, detail="OpenAI API key not configured")
         
-        ai_processor = AIProcessor(api_key, db)
+        ai_processor = get_ai_processor(db, api_key)
         success = ai_processor.process_incentive_complete(db, incentive_id)
+        incentive_cache.invalidate(incentive_id)
+        _processing_status_cache["expires_at"] = 0.0
         
         if success:
             return {"message": f"AI processing completed for incentive {incentive_id}"}
@@ -96,17 +165,17 @@ async def process_incentive_ai(incentive_id: str, db: Session = Depends(get_db))
 
 
 @router.post("/match-companies/{incentive_id}")
-async def match_companies(incentive_id: str, db: Session = Depends(get_db)):
+def match_companies(incentive_id: str, db: Session = Depends(get_db)):
     """Find and save company matches for a specific incentive"""
     try:
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise HTTPException(status_code=500, detail="OpenAI API key not configured")
         
-        ai_processor = AIProcessor(api_key, db)
-        matcher = CompanyMatcherUnified(ai_processor)
+        matcher = CompanyMatcherUnified(get_ai_processor(db, api_key))
         
         result = matcher.process_incentive_matches(db, incentive_id)
+        incentive_cache.invalidate(incentive_id)
         
         return {
             "message": f"Company matching completed for incentive {incentive_id}",
@@ -119,17 +188,17 @@ async def match_companies(incentive_id: str, db: Session = Depends(get_db)):
 
 
 @router.post("/process-all-matches")
-async def process_all_matches(background_tasks: BackgroundTasks):
+def process_all_matches():
     """Process company matches for all incentives"""
     try:
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise HTTPException(status_code=500, detail="OpenAI API key not configured")
         
-        # Process in background
-        background_tasks.add_task(process_all_matches_task, api_key)
+        # Process in the worker
+        task = celery_app.send_task("data.process_all_matches")
         
-        return {"message": "Company matching started for all incentives"}
+        return {"message": "Company matching started for all incentives", "task_id": task.id}
         
     except Exception as e:
         logger.error(f"Error starting company matching: {e}")
@@ -138,22 +207,25 @@ async def process_all_matches(background_tasks: BackgroundTasks):
 
 def process_all_matches_task(api_key: str):
     """Background task to process all matches"""
+    db = SessionLocal()
     try:
-        db = SessionLocal()
-        ai_processor = AIProcessor(api_key, db)
-        matcher = CompanyMatcherUnified(ai_processor)
+        matcher = CompanyMatcherUnified(get_ai_processor(db, api_key))
         
         result = matcher.process_all_incentives(db)
-        db.close()
+        incentive_cache.clear()
         
         logger.info(f"All matches processing completed: {result}")
+        return result
         
     except Exception as e:
         logger.error(f"Error in background matches processing: {e}")
+        raise
+    finally:
+        db.close()
 
 
 @router.get("/files/status")
-async def check_data_files():
+def check_data_files():
     """Check if required data files exist"""
     companies_path = "data/companies.csv"
     incentives_path = "data/incentives.csv"
@@ -176,133 +248,221 @@ async def check_data_files():
     }
 
 
-@router.post("/process-ai/batch")
-async def process_ai_batch(
-    background_tasks: BackgroundTasks,
-    limit: int = None,
-    only_pending: bool = True
-):
+def run_ai_batch(api_key: str, incentive_ids: list) -> tuple:
     """
-    Process AI for multiple incentives in batch.
+    Run AI processing for many incentives concurrently, AI_GROUP_SIZE incentives per OpenAI request.
     
-    Parameters:
-    - limit: Maximum number of incentives to process (None = all)
-    - only_pending: Only process incentives with status 'pending' (default: True)
+    Each group runs process_incentive_group in a worker thread with its own Session/AIProcessor
+    (sessions are not thread-safe); all workers share the process-wide OpenAI client and RPM/TPM
+    token bucket (get_ai_processor), and at most AI_BATCH_CONCURRENCY groups run at once.
+    Returns (success_count, failed_count).
     """
-    try:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-        
-        # Start background task
-        background_tasks.add_task(
-            process_ai_batch_task,
-            api_key,
-            limit,
-            only_pending
-        )
+    counts = {"success": 0, "failed": 0}
+    groups = [incentive_ids[i:i + AI_GROUP_SIZE] for i in range(0, len(incentive_ids), AI_GROUP_SIZE)]
+    
+    def process_group(group) -> dict:
+        db = SessionLocal()
+        try:
+            ai_processor = get_ai_processor(db, api_key)
+            return ai_processor.process_incentive_group(db, [str(incentive_id) for incentive_id in group])
+        finally:
+            db.close()
+    
+    async def run():
+        semaphore = asyncio.Semaphore(AI_BATCH_CONCURRENCY)
+        lock = asyncio.Lock()
+        
+        async def worker(group):
+            async with semaphore:
+                try:
+                    results = await asyncio.to_thread(process_group, group)
+                except Exception as e:
+                    logger.error(f"Error processing group of {len(group)} incentives: {e}")
+                    results = {str(incentive_id): False for incentive_id in group}
+            
+            async with lock:
+                for success in results.values():
+                    counts["success" if success else "failed"] += 1
+                logger.info(f"Batch progress: {counts['success']} success, {counts['failed']} failed")
         
-        return {
-            "message": "Batch AI processing started in background",
-            "limit": limit,
-            "only_pending": only_pending
-        }
+        await asyncio.gather(*(worker(group) for group in groups), return_exceptions=True)
+    
+    try:
+        asyncio.run(run())
+    finally:
+        incentive_cache.clear()
+    
+    return counts["success"], counts["failed"]
+
+
+def submit_ai_batch(api_key: str, incentive_ids: list) -> list:
+    """
+    Submit incentives to the OpenAI Batch API, AI_GROUP_SIZE incentives per request and at most
+    OPENAI_BATCH_MAX_REQUESTS requests per batch. Returns the OpenAI batch ids.
+    """
+    db = SessionLocal()
+    try:
+        ai_processor = get_ai_processor(db, api_key)
+        chunk_size = OPENAI_BATCH_MAX_REQUESTS * AI_GROUP_SIZE
+        
+        batch_ids = []
+        for start in range(0, len(incentive_ids), chunk_size):
+            chunk = [str(incentive_id) for incentive_id in incentive_ids[start:start + chunk_size]]
+            batch_id = ai_processor.submit_batch(db, chunk, AI_GROUP_SIZE)
+            if batch_id:
+                batch_ids.append(batch_id)
+        return batch_ids
+    finally:
+        db.close()
+        incentive_cache.clear()
+
+
+def poll_ai_batches_task(api_key: str):
+    """Periodic task: apply the results of every finished OpenAI batch"""
+    db = SessionLocal()
+    try:
+        ai_processor = get_ai_processor(db, api_key)
+        
+        batch_ids = [
+            batch_id for (batch_id,) in db.query(IncentiveMetadata.ai_batch_id).filter(
+                IncentiveMetadata.ai_processing_status == "submitted"
+            ).distinct().all()
+        ]
+        
+        summary = {"running": 0, "collected": 0, "success": 0, "failed": 0}
+        for batch_id in batch_ids:
+            results = ai_processor.collect_batch(db, batch_id)
+            if results is None:
+                summary["running"] += 1
+                continue
+            summary["collected"] += 1
+            summary["success"] += sum(results.values())
+            summary["failed"] += len(results) - sum(results.values())
+        
+        if summary["collected"]:
+            incentive_cache.clear()
+        logger.info(f"OpenAI batch poll: {summary}")
+        return summary
         
     except Exception as e:
-        logger.error(f"Error starting batch AI processing: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Error polling OpenAI batches: {e}")
+        raise
+    finally:
+        db.close()
+
+
+def fold_analytics_summary_task():
+    """Periodic task: add the pending analytics_summary_deltas to the summary row (migration 027)"""
+    db = SessionLocal()
+    try:
+        if db.bind.dialect.name != "postgresql":
+            return
+        db.execute(text("SELECT analytics_summary_fold()"))
+        db.commit()
+    except Exception as e:
+        logger.error(f"Error folding analytics summary: {e}")
+        raise
+    finally:
+        db.close()
 
 
-def process_ai_batch_task(api_key: str, limit: int = None, only_pending: bool = True):
+def process_ai_batch_task(api_key: str, limit: int = None, only_pending: bool = True, mode: str = "realtime"):
     """Background task to process AI for multiple incentives"""
+    db = SessionLocal()
     try:
-        db = SessionLocal()
-        ai_processor = AIProcessor(api_key, db)
-        
-        # Build query - filter by metadata status
-        query = db.query(Incentive).join(IncentiveMetadata)
+        # Build query - filter by metadata status (pending: index-only scan of the partial
+        # idx_metadata_pending, oldest first)
+        query = db.query(IncentiveMetadata.incentive_id)
         if only_pending:
             query = query.filter(IncentiveMetadata.ai_processing_status == "pending")
+        query = query.order_by(IncentiveMetadata.created_at, IncentiveMetadata.incentive_id)
         
         if limit:
             query = query.limit(limit)
         
-        incentives = query.all()
-        
-        logger.info(f"Starting batch processing for {len(incentives)} incentives")
-        
-        success_count = 0
-        failed_count = 0
-        
-        for incentive in incentives:
-            try:
-                success = ai_processor.process_incentive_complete(db, str(incentive.incentive_id))
-                if success:
-                    success_count += 1
-                else:
-                    failed_count += 1
-                
-                # Log progress every 10 incentives
-                if (success_count + failed_count) % 10 == 0:
-                    logger.info(f"Batch progress: {success_count} success, {failed_count} failed")
-                    
-            except Exception as e:
-                logger.error(f"Error processing incentive {incentive.incentive_id}: {e}")
-                failed_count += 1
-        
+        incentive_ids = [incentive_id for (incentive_id,) in query.all()]
         db.close()
+        
+        if mode == "async_batch":
+            batch_ids = submit_ai_batch(api_key, incentive_ids)
+            logger.info(f"Submitted {len(incentive_ids)} incentives to the OpenAI Batch API: {batch_ids}")
+            return {"submitted": len(incentive_ids), "batch_ids": batch_ids}
+        
+        logger.info(f"Starting batch processing for {len(incentive_ids)} incentives "
+                    f"(concurrency: {AI_BATCH_CONCURRENCY}, group size: {AI_GROUP_SIZE})")
+        
+        success_count, failed_count = run_ai_batch(api_key, incentive_ids)
+        
         logger.info(f"Batch processing completed: {success_count} success, {failed_count} failed")
+        return {"success": success_count, "failed": failed_count}
         
     except Exception as e:
         logger.error(f"Error in batch AI processing task: {e}")
+        raise
+    finally:
+        db.close()
 
 
 @router.get("/processing-status")
-async def get_processing_status(db: Session = Depends(get_db)):
-    """Get detailed AI processing status for all incentives"""
+def get_processing_status(db: Session = Depends(get_db)):
+    """Get detailed AI processing status for all incentives (cached for PROCESSING_STATUS_CACHE_TTL_SECONDS)"""
+    now = time.monotonic()
+    if _processing_status_cache["response"] is not None and now < _processing_status_cache["expires_at"]:
+        return _processing_status_cache["response"]
+    
     try:
-        from sqlalchemy import func
-        
-        # Count by status (from metadata table)
-        status_counts = db.query(
-            IncentiveMetadata.ai_processing_status,
-            func.count(IncentiveMetadata.metadata_id).label('count')
-        ).group_by(IncentiveMetadata.ai_processing_status).all()
+        # Os mesmos valores do ENUM ai_processing_status (migração 019), incluindo "submitted"
+        statuses = AI_PROCESSING_STATUSES
+        
+        # Contagem por status + até 5 exemplos por status numa só query:
+        # count(*) e row_number() sobre a mesma partição (status)
+        ranked = select(
+            IncentiveMetadata.ai_processing_status.label('status'),
+            Incentive.incentive_id,
+            Incentive.title,
+            IncentiveMetadata.fields_completed_by_ai,
+            func.count().over(
+                partition_by=IncentiveMetadata.ai_processing_status
+            ).label('status_count'),
+            func.row_number().over(
+                partition_by=IncentiveMetadata.ai_processing_status,
+                order_by=Incentive.incentive_id
+            ).label('rn')
+        ).join(
+            IncentiveMetadata, IncentiveMetadata.incentive_id == Incentive.incentive_id
+        ).where(
+            IncentiveMetadata.ai_processing_status.in_(statuses)
+        ).cte('ranked')
+        
+        rows = db.execute(
+            select(ranked).where(ranked.c.rn <= 5).order_by(ranked.c.status, ranked.c.rn)
+        ).all()
         
         # Total count
         total = db.query(func.count(Incentive.incentive_id)).scalar()
         
         # Build response
-        status_dict = {status: count for status, count in status_counts}
-        
-        # Get some example IDs for each status
-        examples = {}
-        for status in ['pending', 'processing', 'completed', 'failed']:
-            results = db.query(Incentive, IncentiveMetadata).join(IncentiveMetadata).filter(
-                IncentiveMetadata.ai_processing_status == status
-            ).limit(5).all()
-            
-            examples[status] = [
-                {
-                    "incentive_id": str(i.incentive_id),
-                    "title": i.title,
-                    "fields_completed": m.fields_completed_by_ai or []
-                }
-                for i, m in results
-            ]
+        status_dict = {}
+        examples = {status: [] for status in statuses}
+        for row in rows:
+            status_dict[row.status] = row.status_count
+            examples[row.status].append({
+                "incentive_id": str(row.incentive_id),
+                "title": row.title,
+                "fields_completed": row.fields_completed_by_ai or []
+            })
         
-        return {
+        response = {
             "total": total,
-            "status_counts": {
-                "pending": status_dict.get("pending", 0),
-                "processing": status_dict.get("processing", 0),
-                "completed": status_dict.get("completed", 0),
-                "failed": status_dict.get("failed", 0)
-            },
+            "status_counts": {status: status_dict.get(status, 0) for status in statuses},
             "completion_percentage": (status_dict.get("completed", 0) / total * 100) if total > 0 else 0,
             "examples": examples
         }
         
+        _processing_status_cache["response"] = response
+        _processing_status_cache["expires_at"] = now + PROCESSING_STATUS_CACHE_TTL_SECONDS
+        return response
+        
     except Exception as e:
         logger.error(f"Error getting processing status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -323,24 +483,43 @@ async def get_import_status():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/tasks/{task_id}")
+def get_task_status(task_id: str):
+    """Get the state (and result, once finished) of a background job started by this API"""
+    try:
+        task = AsyncResult(task_id, app=celery_app)
+        
+        response = {"task_id": task_id, "state": task.state}
+        if task.successful():
+            response["result"] = task.result
+        elif task.failed():
+            response["error"] = str(task.result)
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error getting task {task_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/reprocess-failed")
-async def reprocess_failed_incentives(background_tasks: BackgroundTasks, limit: int = None):
-    """Reprocess incentives that failed AI processing"""
+def reprocess_failed_incentives(
+    limit: int = None,
+    mode: str = Query("realtime", pattern=AI_BATCH_MODE_PATTERN)
+):
+    """Reprocess incentives that failed AI processing (mode=async_batch: OpenAI Batch API)"""
     try:
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise HTTPException(status_code=500, detail="OpenAI API key not configured")
         
-        # Start background task to reprocess failed
-        background_tasks.add_task(
-            reprocess_failed_task,
-            api_key,
-            limit
-        )
+        # Start reprocessing in the worker
+        task = celery_app.send_task("data.reprocess_failed", kwargs={"limit": limit, "mode": mode})
         
         return {
             "message": "Reprocessing failed incentives started in background",
-            "limit": limit
+            "task_id": task.id,
+            "limit": limit,
+            "mode": mode
         }
         
     except Exception as e:
@@ -348,62 +527,57 @@ async def reprocess_failed_incentives(background_tasks: BackgroundTasks, limit:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def reprocess_failed_task(api_key: str, limit: int = None):
+def reprocess_failed_task(api_key: str, limit: int = None, mode: str = "realtime"):
     """Background task to reprocess failed incentives"""
+    db = SessionLocal()
     try:
-        db = SessionLocal()
-        ai_processor = AIProcessor(api_key, db)
-        
         # Get failed incentives (check metadata table)
-        query = db.query(Incentive).join(IncentiveMetadata).filter(
+        query = db.query(Incentive.incentive_id).join(IncentiveMetadata).filter(
             IncentiveMetadata.ai_processing_status == "failed"
         )
         if limit:
             query = query.limit(limit)
         
-        failed_incentives = query.all()
+        incentive_ids = [incentive_id for (incentive_id,) in query.all()]
         
-        logger.info(f"Reprocessing {len(failed_incentives)} failed incentives")
+        # Reset status to pending in metadata (single UPDATE instead of one per row)
+        if incentive_ids:
+            db.execute(
+                update(IncentiveMetadata)
+                .where(IncentiveMetadata.incentive_id.in_(incentive_ids))
+                .values(ai_processing_status="pending", ai_processing_error=None)
+            )
+            db.commit()
+        db.close()
         
-        success_count = 0
-        still_failed = 0
+        logger.info(f"Reprocessing {len(incentive_ids)} failed incentives")
         
-        for incentive in failed_incentives:
-            # Reset status to pending in metadata
-            metadata = db.query(IncentiveMetadata).filter(
-                IncentiveMetadata.incentive_id == incentive.incentive_id
-            ).first()
-            
-            if metadata:
-                metadata.ai_processing_status = "pending"
-                metadata.ai_processing_error = None
-                db.commit()
-            
-            # Try processing again
-            success = ai_processor.process_incentive_complete(db, str(incentive.incentive_id))
-            if success:
-                success_count += 1
-            else:
-                still_failed += 1
+        if mode == "async_batch":
+            batch_ids = submit_ai_batch(api_key, incentive_ids)
+            return {"submitted": len(incentive_ids), "batch_ids": batch_ids}
+        
+        success_count, still_failed = run_ai_batch(api_key, incentive_ids)
         
-        db.close()
         logger.info(f"Reprocessing completed: {success_count} recovered, {still_failed} still failed")
+        return {"recovered": success_count, "still_failed": still_failed}
         
     except Exception as e:
         logger.error(f"Error in reprocessing task: {e}")
+        raise
+    finally:
+        db.close()
 
 
 @router.get("/cache/stats")
-async def get_cache_stats():
+def get_cache_stats():
     """
-    Get memory cache statistics.
+    Get prompt cache statistics.
     Shows cache hits, misses, hit rate, and estimated savings.
     
-    Note: Statistics are per AIProcessor instance (resets on restart).
+    Note: The cache lives in Redis (REDIS_URL), so stats are shared by the API and
+    the worker and survive restarts.
     """
     try:
-        # Create temporary processor to get stats
-        # In production, you'd want to maintain a singleton instance
         api_key = os.getenv("OPENAI_API_KEY", "")
         if not api_key:
             return {
@@ -411,13 +585,7 @@ async def get_cache_stats():
                 "stats": None
             }
         
-        # Note: This creates a new instance, so stats will be empty
-        # For real stats, need to track across the actual processor instance used in processing
-        return {
-            "message": "Cache statistics are tracked during batch processing",
-            "note": "Stats reset on each new AIProcessor instance",
-            "recommendation": "Check logs during batch processing to see cache hits/misses"
-        }
+        return {"stats": get_ai_processor(None, api_key).get_cache_stats()}
         
     except Exception as e:
         logger.error(f"Error getting cache stats: {e}")
@@ -425,7 +593,7 @@ async def get_cache_stats():
 
 
 @router.get("/costs/stats")
-async def get_cost_stats(db: Session = Depends(get_db)):
+def get_cost_stats(db: Session = Depends(get_db)):
     """
     Get detailed cost statistics from OpenAI API usage.
     
@@ -437,8 +605,6 @@ async def get_cost_stats(db: Session = Depends(get_db)):
         - Average cost per call
     """
     try:
-        from app.services.cost_tracker import CostTracker
-        
         cost_tracker = CostTracker(db)
         stats = cost_tracker.get_total_stats()
         
@@ -454,7 +620,7 @@ async def get_cost_stats(db: Session = Depends(get_db)):
 
 
 @router.get("/costs/recent")
-async def get_recent_costs(limit: int = 20, db: Session = Depends(get_db)):
+def get_recent_costs(limit: int = 20, db: Session = Depends(get_db)):
     """
     Get recent API calls with cost details.
     
@@ -465,15 +631,38 @@ async def get_recent_costs(limit: int = 20, db: Session = Depends(get_db)):
         List of recent API calls with timestamps, costs, and tokens
     """
     try:
-        from app.db.models import AICostTracking
-        
-        recent_calls = db.query(AICostTracking)\
-            .order_by(AICostTracking.created_at.desc())\
-            .limit(limit)\
-            .all()
+        # Só as colunas necessárias (sem instanciar objetos ORM); o valor formatado
+        # é calculado pelo PostgreSQL em vez de um f-string por linha
+        if db.bind.dialect.name == "postgresql":
+            formatted_cost = func.concat("$", func.to_char(AICostTracking.total_cost_micro_usd / float(MICRO_USD_PER_USD), RECENT_COST_FORMAT))
+        else:
+            formatted_cost = literal(None)
+        
+        recent_calls = db.execute(
+            select(
+                AICostTracking.tracking_id,
+                AICostTracking.incentive_id,
+                AICostTracking.operation_type,
+                AICostTracking.model_name,
+                AICostTracking.input_tokens,
+                AICostTracking.output_tokens,
+                AICostTracking.total_tokens,
+                AICostTracking.input_cost_micro_usd,
+                AICostTracking.output_cost_micro_usd,
+                AICostTracking.total_cost_micro_usd,
+                formatted_cost.label("formatted_cost"),
+                AICostTracking.cache_hit,
+                AICostTracking.success,
+                AICostTracking.error_message,
+                AICostTracking.created_at
+            )
+            .order_by(AICostTracking.created_at.desc())
+            .limit(limit)
+        ).all()
         
         results = []
         for call in recent_calls:
+            total_cost = call.total_cost_micro_usd / MICRO_USD_PER_USD
             results.append({
                 "tracking_id": str(call.tracking_id),
                 "incentive_id": str(call.incentive_id) if call.incentive_id else None,
@@ -485,10 +674,10 @@ async def get_recent_costs(limit: int = 20, db: Session = Depends(get_db)):
                     "total": call.total_tokens
                 },
                 "cost": {
-                    "input": float(call.input_cost),
-                    "output": float(call.output_cost),
-                    "total": float(call.total_cost),
-                    "formatted": f"${float(call.total_cost):.6f}"
+                    "input": call.input_cost_micro_usd / MICRO_USD_PER_USD,
+                    "output": call.output_cost_micro_usd / MICRO_USD_PER_USD,
+                    "total": total_cost,
+                    "formatted": call.formatted_cost or f"${total_cost:.6f}"
                 },
                 "cache_hit": call.cache_hit,
                 "success": call.success,
@@ -1,14 +1,51 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.orm import Session, selectinload, raiseload
+from sqlalchemy import and_, or_, func, cast, literal_column, Float, Text
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
 from app.db.database import SessionLocal
 from app.db.models import Incentive, IncentiveCompanyMatch
-from typing import List, Optional
+from app.services.incentive_cache import incentive_cache
+from app.api.responses import ORJSONResponse, orjson_default
+from typing import Any, Dict, List, Optional
+from cachetools import TTLCache
+from datetime import datetime
+from uuid import UUID
+import base64
+import json
+import threading
+import orjson
 import logging
 
 router = APIRouter(prefix="/incentives", tags=["incentives"])
 logger = logging.getLogger(__name__)
 
+# Cache em memória dos totais de list_incentives, por filtro (evita count(*) a cada página);
+# limitado a COUNT_CACHE_MAX_ENTRIES termos de pesquisa, entradas expiradas removidas pelo TTLCache
+COUNT_CACHE_TTL_SECONDS = 30
+COUNT_CACHE_MAX_ENTRIES = 1024
+_count_cache = TTLCache(maxsize=COUNT_CACHE_MAX_ENTRIES, ttl=COUNT_CACHE_TTL_SECONDS)
+_count_cache_lock = threading.Lock()
+
+# Rows fetched per round-trip by GET /incentives/stream
+STREAM_CHUNK_SIZE = 500
+
+# Columns exposed by the list/stream endpoints (document_urls, timestamps, ... stay in the DB)
+LIST_COLUMNS = (
+    Incentive.incentive_id,
+    Incentive.title,
+    Incentive.description,
+    Incentive.ai_description,
+    # float8 from the database: no Decimal per row (the value is only ever shown / serialized);
+    # budget 0 is "unknown" -> null, as in GET /incentives/{id}
+    cast(func.nullif(Incentive.total_budget, 0), Float).label("total_budget"),
+    Incentive.publication_date,
+    Incentive.start_date,
+    Incentive.end_date,
+    Incentive.source_link,
+)
+LIST_TIMESTAMP_COLUMNS = {"publication_date", "start_date", "end_date"}
+
 
 def get_db():
     db = SessionLocal()
@@ -18,63 +55,199 @@ def get_db():
         db.close()
 
 
+def encode_cursor(publication_date: Optional[datetime], incentive_id) -> str:
+    """Encode the (publication_date, incentive_id) sort key of the last row as an opaque cursor"""
+    publication_date = publication_date.isoformat() if publication_date else None
+    payload = json.dumps([publication_date, str(incentive_id)])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decode a cursor produced by encode_cursor back into (publication_date, incentive_id)"""
+    try:
+        publication_date, incentive_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return (
+            datetime.fromisoformat(publication_date) if publication_date else None,
+            UUID(incentive_id)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def after_cursor(cursor: str):
+    """
+    WHERE clause for the rows after `cursor` in ORDER BY publication_date DESC NULLS LAST,
+    incentive_id DESC (NULL dates sort last, so they can't use a plain row-value comparison)
+    """
+    publication_date, incentive_id = decode_cursor(cursor)
+    if publication_date is None:
+        return and_(Incentive.publication_date.is_(None), Incentive.incentive_id < incentive_id)
+    return or_(
+        Incentive.publication_date < publication_date,
+        and_(Incentive.publication_date == publication_date, Incentive.incentive_id < incentive_id),
+        Incentive.publication_date.is_(None)
+    )
+
+
+def incentive_list_item(row) -> Dict[str, Any]:
+    """
+    LIST_COLUMNS row as raw column values: orjson serializes UUID/datetime natively
+    (and Decimal via orjson_default), so there is no str()/isoformat() pass per field
+    """
+    return row._asdict()
+
+
+def filter_incentives(query, search: Optional[str]):
+    """Apply the listing filters shared by GET /incentives/ and GET /incentives/stream"""
+    if search:
+        query = query.filter(
+            or_(
+                Incentive.title.ilike(f"%{search}%"),
+                Incentive.description.ilike(f"%{search}%")
+            )
+        )
+    return query
+
+
+def isoformat_utc(column):
+    """PostgreSQL timestamptz as datetime.isoformat() of the UTC value (microseconds only when non-zero)"""
+    return func.replace(
+        func.to_char(func.timezone("UTC", column), 'YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"'), ".000000+", "+"
+    )
+
+
+def page_json(db: Session, page_query) -> tuple:
+    """
+    PostgreSQL only: the page rendered by json_agg in the database, as JSON text that goes
+    into the response unparsed (no Python object per row), plus the row count and the sort
+    key of the last row for next_cursor.
+    
+    Each row is built with json_build_object so its fields match incentive_list_item
+    serialized by orjson (null budget for 0, isoformat timestamps), not PostgreSQL's row JSON
+    """
+    page = page_query.subquery("page")
+    newest_first = (page.c.publication_date.desc().nulls_last(), page.c.incentive_id.desc())
+    oldest_first = (page.c.publication_date.asc().nulls_first(), page.c.incentive_id.asc())
+    
+    fields = []
+    for column in page.c:
+        fields += [column.key, isoformat_utc(column) if column.key in LIST_TIMESTAMP_COLUMNS else column]
+    row = func.json_build_object(*fields)
+    
+    return db.query(
+        cast(func.coalesce(func.json_agg(aggregate_order_by(row, *newest_first)),
+                           literal_column("'[]'::json")), Text).label("items"),
+        func.count().label("count"),
+        array_agg(aggregate_order_by(page.c.publication_date, *oldest_first))[1].label("last_publication_date"),
+        array_agg(aggregate_order_by(page.c.incentive_id, *oldest_first))[1].label("last_incentive_id")
+    ).one()
+
+
+def count_incentives(db: Session, query, search: Optional[str]) -> int:
+    """count() over the primary key only, cached per filter for COUNT_CACHE_TTL_SECONDS"""
+    with _count_cache_lock:
+        cached = _count_cache.get(search)
+    if cached is not None:
+        return cached
+    
+    total = query.with_entities(func.count(Incentive.incentive_id)).scalar()
+    with _count_cache_lock:
+        _count_cache[search] = total
+    return total
+
+
 @router.get("/")
-async def list_incentives(
+def list_incentives(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     search: Optional[str] = None,
     status: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (keyset pagination, replaces skip)"),
+    include_total: bool = Query(True, description="Set to false to skip counting matching rows"),
     db: Session = Depends(get_db)
 ):
     """List incentives with optional filtering"""
     try:
-        query = db.query(Incentive)
-        
-        # Apply filters
-        if search:
-            query = query.filter(
-                or_(
-                    Incentive.title.ilike(f"%{search}%"),
-                    Incentive.description.ilike(f"%{search}%")
-                )
-            )
-        
+        query = filter_incentives(db.query(*LIST_COLUMNS), search)
         
         # Get total count
-        total = query.count()
+        total = count_incentives(db, query, search) if include_total else None
         
-        # Apply pagination
-        incentives = query.offset(skip).limit(limit).all()
+        # Apply pagination: newest first, keyset on (publication_date, incentive_id) when a
+        # cursor is given so deep pages don't have to walk over `skip` rows
+        query = query.order_by(Incentive.publication_date.desc().nulls_last(), Incentive.incentive_id.desc())
+        if cursor:
+            query = query.filter(after_cursor(cursor))
+        else:
+            query = query.offset(skip)
+        query = query.limit(limit)
         
-        return {
-            "incentives": [
-                {
-                    "incentive_id": str(incentive.incentive_id),
-                    "title": incentive.title,
-                    "description": incentive.description,
-                    "ai_description": incentive.ai_description,
-                    "total_budget": float(incentive.total_budget) if incentive.total_budget else None,
-                    "publication_date": incentive.publication_date.isoformat() if incentive.publication_date else None,
-                    "start_date": incentive.start_date.isoformat() if incentive.start_date else None,
-                    "end_date": incentive.end_date.isoformat() if incentive.end_date else None,
-                    "source_link": incentive.source_link
-                }
-                for incentive in incentives
-            ],
+        if db.bind.dialect.name == "postgresql":
+            # JSON of the rows assembled by PostgreSQL and spliced into the envelope as bytes
+            page = page_json(db, query)
+            envelope = orjson.dumps({
+                "total": total,
+                "skip": skip,
+                "limit": limit,
+                "next_cursor": encode_cursor(page.last_publication_date, page.last_incentive_id)
+                if page.count == limit else None
+            })
+            return Response(
+                content=b'{"incentives":' + page.items.encode("utf-8") + b"," + envelope[1:],
+                media_type="application/json"
+            )
+        
+        incentives = query.all()
+        
+        # Returning the Response directly skips FastAPI's jsonable_encoder pass over the rows
+        last = incentives[-1] if len(incentives) == limit else None
+        return ORJSONResponse({
+            "incentives": [incentive_list_item(incentive) for incentive in incentives],
             "total": total,
             "skip": skip,
-            "limit": limit
-        }
+            "limit": limit,
+            "next_cursor": encode_cursor(last.publication_date, last.incentive_id) if last else None
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing incentives: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/stream")
+def stream_incentives(
+    search: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of incentives (default: all)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream incentives as NDJSON (one JSON object per line), newest first.
+    
+    Rows are fetched in chunks of STREAM_CHUNK_SIZE (server-side cursor on PostgreSQL) and
+    written as they are read, so memory stays flat regardless of how many incentives match.
+    """
+    query = filter_incentives(db.query(*LIST_COLUMNS), search)
+    query = query.order_by(Incentive.publication_date.desc().nulls_last(), Incentive.incentive_id.desc())
+    if limit:
+        query = query.limit(limit)
+    
+    def generate():
+        for incentive in query.yield_per(STREAM_CHUNK_SIZE):
+            yield orjson.dumps(incentive_list_item(incentive), default=orjson_default) + b"\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 @router.get("/{incentive_id}")
-async def get_incentive(incentive_id: str, db: Session = Depends(get_db)):
+def get_incentive(incentive_id: UUID, db: Session = Depends(get_db)):
     """Get detailed information about a specific incentive"""
     try:
+        cached = incentive_cache.get("get", incentive_id)
+        if cached is not None:
+            return cached
+        
         incentive = db.query(Incentive).filter(
             Incentive.incentive_id == incentive_id
         ).first()
@@ -82,7 +255,7 @@ async def get_incentive(incentive_id: str, db: Session = Depends(get_db)):
         if not incentive:
             raise HTTPException(status_code=404, detail="Incentive not found")
         
-        return {
+        response = {
             "incentive_id": str(incentive.incentive_id),
             "title": incentive.title,
             "description": incentive.description,
@@ -94,6 +267,8 @@ async def get_incentive(incentive_id: str, db: Session = Depends(get_db)):
             "total_budget": float(incentive.total_budget) if incentive.total_budget else None,
             "source_link": incentive.source_link
         }
+        incentive_cache.set("get", incentive_id, response)
+        return response
         
     except HTTPException:
         raise
@@ -103,9 +278,13 @@ async def get_incentive(incentive_id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/{incentive_id}/matches")
-async def get_incentive_matches(incentive_id: str, db: Session = Depends(get_db)):
+def get_incentive_matches(incentive_id: UUID, db: Session = Depends(get_db)):
     """Get company matches for a specific incentive"""
     try:
+        cached = incentive_cache.get("matches", incentive_id)
+        if cached is not None:
+            return cached
+        
         # Check if incentive exists
         incentive = db.query(Incentive).filter(
             Incentive.incentive_id == incentive_id
@@ -114,13 +293,15 @@ async def get_incentive_matches(incentive_id: str, db: Session = Depends(get_db)
         if not incentive:
             raise HTTPException(status_code=404, detail="Incentive not found")
         
-        # Get matches
-        matches = db.query(IncentiveCompanyMatch).filter(
+        # Get matches (companies loaded in one extra SELECT ... IN, not one lazy load per match)
+        matches = db.query(IncentiveCompanyMatch).options(
+            selectinload(IncentiveCompanyMatch.company), raiseload("*")
+        ).filter(
             IncentiveCompanyMatch.incentive_id == incentive_id
         ).order_by(IncentiveCompanyMatch.ranking_position).all()
         
-        return {
-            "incentive_id": incentive_id,
+        response = {
+            "incentive_id": str(incentive_id),
             "incentive_title": incentive.title,
             "matches": [
                 {
@@ -136,6 +317,8 @@ async def get_incentive_matches(incentive_id: str, db: Session = Depends(get_db)
             ],
             "total_matches": len(matches)
         }
+        incentive_cache.set("matches", incentive_id, response)
+        return response
         
     except HTTPException:
         raise
@@ -145,9 +328,13 @@ async def get_incentive_matches(incentive_id: str, db: Session = Depends(get_db)
 
 
 @router.get("/{incentive_id}/summary")
-async def get_incentive_summary(incentive_id: str, db: Session = Depends(get_db)):
+def get_incentive_summary(incentive_id: UUID, db: Session = Depends(get_db)):
     """Get AI-generated summary of an incentive"""
     try:
+        cached = incentive_cache.get("summary", incentive_id)
+        if cached is not None:
+            return cached
+        
         incentive = db.query(Incentive).filter(
             Incentive.incentive_id == incentive_id
         ).first()
@@ -160,12 +347,14 @@ async def get_incentive_summary(incentive_id: str, db: Session = Depends(get_db)
         if incentive.all_data and "ai_summary" in incentive.all_data:
             ai_summary = incentive.all_data["ai_summary"]
         
-        return {
-            "incentive_id": incentive_id,
+        response = {
+            "incentive_id": str(incentive_id),
             "title": incentive.title,
             "ai_summary": ai_summary,
             "has_ai_summary": ai_summary is not None
         }
+        incentive_cache.set("summary", incentive_id, response)
+        return response
         
     except HTTPException:
         raise
@@ -0,0 +1,33 @@
+"""
+Respostas JSON serializadas com orjson
+
+orjson é 3-10x mais rápido que o json da stdlib e escreve bytes diretamente,
+evitando o encode str -> bytes extra do JSONResponse do Starlette.
+"""
+
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def orjson_default(obj: Any) -> Any:
+    """Serializa tipos que o orjson não suporta nativamente (Decimal das colunas Numeric)"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    # Contrato do orjson: tipo desconhecido -> TypeError (em vez de serializar o repr em silêncio)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse que usa orjson (UUID, datetime e numpy serializados nativamente)"""
+    
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=orjson_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
@@ -5,291 +5,39 @@ Interface web simples para o chatbot de incentivos que funciona dentro do contai
 Usa HTML/CSS/JavaScript vanilla para máxima compatibilidade.
 """
 
-from fastapi import APIRouter, Request
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
 import os
+import re
+import gzip
+import hashlib
+import rjsmin
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # opcional: sem brotli serve-se só gzip/identity
+    brotli = None
 
 router = APIRouter(prefix="/web", tags=["web-interface"])
 
-# Montar arquivos estáticos
-static_dir = os.path.join(os.path.dirname(__file__), "..", "..", "frontend", "static")
-if os.path.exists(static_dir):
-    router.mount("/static", StaticFiles(directory=static_dir), name="static")
+# Montar arquivos estáticos (caminho canónico resolvido uma vez; sem ".." para o StaticFiles resolver)
+static_dir = Path(__file__).resolve().parents[2] / "frontend" / "static"
+if static_dir.is_dir():
+    router.mount("/static", StaticFiles(directory=static_dir, check_dir=False), name="static")
 
 
-@router.get("/", response_class=HTMLResponse)
-async def chat_interface(request: Request):
-    """
-    Interface principal do chatbot
-    """
-    html_content = """
+# Página estática (só o HTML; CSS/JS em frontend/static): montada e codificada uma única vez
+# no import, cada pedido só copia os bytes
+CHAT_HTML = """
 <!DOCTYPE html>
 <html lang="pt">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Chatbot de Incentivos Públicos</title>
-    <style>
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            height: 100vh;
-            display: flex;
-            justify-content: center;
-            align-items: center;
-        }
-
-        .chat-container {
-            width: 90%;
-            max-width: 800px;
-            height: 80vh;
-            background: white;
-            border-radius: 20px;
-            box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-            display: flex;
-            flex-direction: column;
-            overflow: hidden;
-        }
-
-        .chat-header {
-            background: linear-gradient(135deg, #4f46e5 0%, #7c3aed 100%);
-            color: white;
-            padding: 20px;
-            text-align: center;
-        }
-
-        .chat-header h1 {
-            font-size: 1.5rem;
-            margin-bottom: 5px;
-        }
-
-        .chat-header p {
-            opacity: 0.9;
-            font-size: 0.9rem;
-        }
-
-        .chat-messages {
-            flex: 1;
-            padding: 20px;
-            overflow-y: auto;
-            background: #f8fafc;
-        }
-
-        .message {
-            margin-bottom: 15px;
-            display: flex;
-            align-items: flex-start;
-        }
-
-        .message.user {
-            justify-content: flex-end;
-        }
-
-        .message-content {
-            max-width: 70%;
-            padding: 12px 16px;
-            border-radius: 18px;
-            word-wrap: break-word;
-        }
-
-        .message.user .message-content {
-            background: #4f46e5;
-            color: white;
-            border-bottom-right-radius: 4px;
-        }
-
-        .message.bot .message-content {
-            background: white;
-            color: #374151;
-            border: 1px solid #e5e7eb;
-            border-bottom-left-radius: 4px;
-        }
-
-        .message-avatar {
-            width: 32px;
-            height: 32px;
-            border-radius: 50%;
-            margin: 0 8px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-weight: bold;
-            font-size: 0.8rem;
-        }
-
-        .message.user .message-avatar {
-            background: #4f46e5;
-            color: white;
-            order: 1;
-        }
-
-        .message.bot .message-avatar {
-            background: #10b981;
-            color: white;
-        }
-
-        .chat-input-container {
-            padding: 20px;
-            background: white;
-            border-top: 1px solid #e5e7eb;
-        }
-
-        .chat-input-form {
-            display: flex;
-            gap: 10px;
-        }
-
-        .chat-input {
-            flex: 1;
-            padding: 12px 16px;
-            border: 2px solid #e5e7eb;
-            border-radius: 25px;
-            font-size: 1rem;
-            outline: none;
-            transition: border-color 0.2s;
-        }
-
-        .chat-input:focus {
-            border-color: #4f46e5;
-        }
-
-        .send-button {
-            padding: 12px 20px;
-            background: #4f46e5;
-            color: white;
-            border: none;
-            border-radius: 25px;
-            cursor: pointer;
-            font-weight: 600;
-            transition: background-color 0.2s;
-        }
-
-        .send-button:hover {
-            background: #4338ca;
-        }
-
-        .send-button:disabled {
-            background: #9ca3af;
-            cursor: not-allowed;
-        }
-
-        .typing-indicator {
-            display: none;
-            padding: 12px 16px;
-            background: white;
-            border: 1px solid #e5e7eb;
-            border-radius: 18px;
-            border-bottom-left-radius: 4px;
-            margin-bottom: 15px;
-            max-width: 70%;
-        }
-
-        .typing-dots {
-            display: flex;
-            gap: 4px;
-        }
-
-        .typing-dot {
-            width: 8px;
-            height: 8px;
-            background: #9ca3af;
-            border-radius: 50%;
-            animation: typing 1.4s infinite;
-        }
-
-        .typing-dot:nth-child(2) {
-            animation-delay: 0.2s;
-        }
-
-        .typing-dot:nth-child(3) {
-            animation-delay: 0.4s;
-        }
-
-        @keyframes typing {
-            0%, 60%, 100% {
-                transform: translateY(0);
-            }
-            30% {
-                transform: translateY(-10px);
-            }
-        }
-
-        .data-display {
-            margin-top: 10px;
-            padding: 10px;
-            background: #f3f4f6;
-            border-radius: 8px;
-            font-size: 0.9rem;
-        }
-
-        .data-item {
-            margin-bottom: 5px;
-            padding: 5px 0;
-            border-bottom: 1px solid #e5e7eb;
-        }
-
-        .data-item:last-child {
-            border-bottom: none;
-        }
-
-        .quick-actions {
-            display: flex;
-            gap: 10px;
-            margin-bottom: 15px;
-            flex-wrap: wrap;
-        }
-
-        .quick-action {
-            padding: 8px 16px;
-            background: #f3f4f6;
-            border: 1px solid #e5e7eb;
-            border-radius: 20px;
-            cursor: pointer;
-            font-size: 0.9rem;
-            transition: all 0.2s;
-        }
-
-        .quick-action:hover {
-            background: #4f46e5;
-            color: white;
-        }
-
-        .error-message {
-            background: #fef2f2;
-            color: #dc2626;
-            border: 1px solid #fecaca;
-            padding: 12px 16px;
-            border-radius: 8px;
-            margin-bottom: 15px;
-        }
-
-        .success-message {
-            background: #f0fdf4;
-            color: #166534;
-            border: 1px solid #bbf7d0;
-            padding: 12px 16px;
-            border-radius: 8px;
-            margin-bottom: 15px;
-        }
-
-        @media (max-width: 768px) {
-            .chat-container {
-                width: 95%;
-                height: 90vh;
-            }
-            
-            .message-content {
-                max-width: 85%;
-            }
-        }
-    </style>
+    <link rel="stylesheet" href="__CHAT_CSS_URL__">
 </head>
 <body>
     <div class="chat-container">
@@ -346,162 +94,110 @@ async def chat_interface(request: Request):
         </div>
     </div>
 
-    <script>
-        const API_BASE = '/chatbot';
-        let isLoading = false;
-
-        // Elementos DOM
-        const chatMessages = document.getElementById('chatMessages');
-        const messageInput = document.getElementById('messageInput');
-        const sendButton = document.getElementById('sendButton');
-        const chatForm = document.getElementById('chatForm');
-        const typingIndicator = document.getElementById('typingIndicator');
+    <!-- Itens das listas de resultados (clonados e preenchidos com textContent em chat.js) -->
+    <template id="incentiveItemTpl">
+        <div class="data-item"><strong class="t"></strong><br><span class="d"></span><br><span class="b"></span></div>
+    </template>
+    <template id="companyItemTpl">
+        <div class="data-item"><strong class="t"></strong><br><span class="d"></span><br><span class="b"></span></div>
+    </template>
 
-        // Event listeners
-        chatForm.addEventListener('submit', handleSubmit);
-        messageInput.addEventListener('keypress', handleKeyPress);
+    <script src="__CHAT_JS_URL__"></script>
+</body>
+</html>
+"""
 
-        function handleKeyPress(e) {
-            if (e.key === 'Enter' && !e.shiftKey) {
-                e.preventDefault();
-                handleSubmit(e);
-            }
-        }
 
-        function handleSubmit(e) {
-            e.preventDefault();
-            const message = messageInput.value.trim();
-            if (message && !isLoading) {
-                sendMessage(message);
-                messageInput.value = '';
-            }
-        }
+def minify_css(css: str) -> str:
+    """Strip comments and the whitespace around CSS punctuation (values keep single spaces)"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
 
-        function sendQuickMessage(message) {
-            if (!isLoading) {
-                sendMessage(message);
-            }
-        }
 
-        async function sendMessage(message) {
-            if (isLoading) return;
-            
-            isLoading = true;
-            sendButton.disabled = true;
-            
-            // Adicionar mensagem do usuário
-            addMessage('user', message);
-            
-            // Mostrar indicador de digitação
-            showTypingIndicator();
-            
-            try {
-                const response = await fetch(`${API_BASE}/message`, {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify({
-                        message: message,
-                        user_id: 'web_user'
-                    })
-                });
-                
-                const data = await response.json();
-                
-                if (data.success) {
-                    addMessage('bot', data.response, data.data, data.intent);
-                } else {
-                    addMessage('bot', 'Desculpe, ocorreu um erro ao processar sua mensagem.', null, 'error');
-                }
-                
-            } catch (error) {
-                console.error('Error:', error);
-                addMessage('bot', 'Desculpe, ocorreu um erro de conexão. Tente novamente.', null, 'error');
-            } finally {
-                hideTypingIndicator();
-                isLoading = false;
-                sendButton.disabled = false;
-                messageInput.focus();
-            }
-        }
+def minify_html(html: str) -> str:
+    """Drop comments and collapse whitespace between tags to one space (no <pre>/<textarea> in these pages)"""
+    html = re.sub(r"<!--.*?-->", "", html, flags=re.S)
+    return re.sub(r">\s+<", "> <", html).strip()
 
-        function addMessage(sender, content, data = null, intent = null) {
-            const messageDiv = document.createElement('div');
-            messageDiv.className = `message ${sender}`;
-            
-            const avatar = document.createElement('div');
-            avatar.className = 'message-avatar';
-            avatar.textContent = sender === 'user' ? '👤' : '🤖';
-            
-            const contentDiv = document.createElement('div');
-            contentDiv.className = 'message-content';
-            contentDiv.textContent = content;
-            
-            // Adicionar dados relacionados se existirem
-            if (data && data.length > 0) {
-                const dataDiv = document.createElement('div');
-                dataDiv.className = 'data-display';
-                
-                if (intent === 'incentive_query' || intent === 'incentives_list') {
-                    dataDiv.innerHTML = '<strong>📋 Incentivos encontrados:</strong>';
-                    data.forEach(item => {
-                        const itemDiv = document.createElement('div');
-                        itemDiv.className = 'data-item';
-                        itemDiv.innerHTML = `
-                            <strong>${item.title}</strong><br>
-                            ${item.description ? item.description.substring(0, 100) + '...' : ''}<br>
-                            ${item.total_budget ? `💰 Orçamento: €${item.total_budget.toLocaleString()}` : ''}
-                        `;
-                        dataDiv.appendChild(itemDiv);
-                    });
-                } else if (intent === 'company_query' || intent === 'companies_list') {
-                    dataDiv.innerHTML = '<strong>🏢 Empresas encontradas:</strong>';
-                    data.forEach(item => {
-                        const itemDiv = document.createElement('div');
-                        itemDiv.className = 'data-item';
-                        itemDiv.innerHTML = `
-                            <strong>${item.company_name}</strong><br>
-                            ${item.cae_primary_label || ''}<br>
-                            ${item.website ? `🌐 ${item.website}` : ''}
-                        `;
-                        dataDiv.appendChild(itemDiv);
-                    });
-                } else if (intent === 'analytics') {
-                    dataDiv.innerHTML = `
-                        <strong>📊 Estatísticas:</strong><br>
-                        📋 Incentivos: ${data.total_incentives}<br>
-                        🏢 Empresas: ${data.total_companies}<br>
-                        🔗 Correspondências: ${data.total_matches}<br>
-                        💰 Orçamento Total: €${data.total_budget.toLocaleString()}
-                    `;
-                }
-                
-                contentDiv.appendChild(dataDiv);
-            }
-            
-            messageDiv.appendChild(avatar);
-            messageDiv.appendChild(contentDiv);
-            
-            chatMessages.appendChild(messageDiv);
-            chatMessages.scrollTop = chatMessages.scrollHeight;
-        }
 
-        function showTypingIndicator() {
-            typingIndicator.style.display = 'block';
-            chatMessages.scrollTop = chatMessages.scrollHeight;
-        }
+def precompress(content: bytes, etag: str) -> list:
+    """
+    (content-encoding, body, etag) variants of a static body, compressed once at import,
+    best first; identity last. Each encoding gets its own ETag (different bytes on the wire).
+    """
+    variants = []
+    if brotli is not None:
+        variants.append(("br", brotli.compress(content, quality=11), etag[:-1] + '-br"'))
+    variants.append(("gzip", gzip.compress(content, 9), etag[:-1] + '-gzip"'))
+    variants.append((None, content, etag))
+    return variants
+
+
+def pick_variant(variants: list, accept_encoding: str) -> tuple:
+    """First precompressed variant the client accepts (identity if none)"""
+    for encoding, body, etag in variants:
+        if encoding is None or encoding in accept_encoding:
+            return encoding, body, etag
+
+
+def static_response(request: Request, variants: list, media_type: str, cache_control: str) -> Response:
+    """Precompressed body negotiated on Accept-Encoding, 304 when If-None-Match matches"""
+    encoding, body, etag = pick_variant(variants, request.headers.get("accept-encoding", ""))
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+# CSS/JS da página: minificados uma vez e servidos em /web/assets/<nome>.<hash>.<ext>
+# (o hash do conteúdo no nome permite cache "immutable" de um ano no browser)
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
+_ASSETS = {}
+
+
+def register_asset(filename: str, minify, media_type: str) -> str:
+    """Minify + precompress a file from static_dir and return its fingerprinted URL"""
+    content = minify((static_dir / filename).read_text(encoding="utf-8")).encode("utf-8")
+    
+    digest = hashlib.md5(content).hexdigest()
+    name, ext = os.path.splitext(filename)
+    fingerprinted = f"{name}.{digest[:8]}{ext}"
+    _ASSETS[fingerprinted] = (media_type, precompress(content, f'"{digest}"'))
+    return f"{router.prefix}/assets/{fingerprinted}"
+
+
+_CHAT_HTML_BYTES = minify_html(
+    CHAT_HTML
+    .replace("__CHAT_CSS_URL__", register_asset("chat.css", minify_css, "text/css; charset=utf-8"))
+    .replace("__CHAT_JS_URL__", register_asset("chat.js", rjsmin.jsmin, "text/javascript; charset=utf-8"))
+).encode("utf-8")
+_CHAT_ETAG = '"' + hashlib.md5(_CHAT_HTML_BYTES).hexdigest() + '"'
+_CHAT_HTML_VARIANTS = precompress(_CHAT_HTML_BYTES, _CHAT_ETAG)
 
-        function hideTypingIndicator() {
-            typingIndicator.style.display = 'none';
-        }
 
-        // Focar no input quando a página carrega
-        window.addEventListener('load', () => {
-            messageInput.focus();
-        });
-    </script>
-</body>
-</html>
+@router.get("/", response_class=HTMLResponse)
+async def chat_interface(request: Request):
+    """
+    Interface principal do chatbot
+    
+    Conteúdo estático por deploy: clientes com a versão em cache (If-None-Match) recebem 304 sem corpo.
     """
-    return HTMLResponse(content=html_content)
+    return static_response(request, _CHAT_HTML_VARIANTS, "text/html; charset=utf-8",
+                           "public, max-age=3600, must-revalidate")
+
+
+@router.get("/assets/{filename}")
+async def chat_asset(filename: str, request: Request):
+    """CSS/JS fingerprinted da interface (cache de um ano: um novo deploy muda o nome)"""
+    asset = _ASSETS.get(filename)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    
+    media_type, variants = asset
+    return static_response(request, variants, media_type, ASSET_CACHE_CONTROL)
@@ -0,0 +1,57 @@
+"""
+Celery app para os jobs pesados (importação, processamento IA, matching).
+
+Os jobs correm no serviço `worker` e não no processo uvicorn que serve a API,
+por isso um batch longo não rouba CPU/threads aos pedidos HTTP.
+"""
+
+import os
+from celery import Celery
+from dotenv import load_dotenv
+
+load_dotenv()
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+AI_BATCH_POLL_SECONDS = float(os.getenv("AI_BATCH_POLL_SECONDS", "300"))
+ANALYTICS_FOLD_SECONDS = float(os.getenv("ANALYTICS_FOLD_SECONDS", "60"))
+# Duração máxima de um job (importação, batch IA, matching de todos os incentivos); o soft limit
+# dá 5 min para o job terminar/registar o erro antes de o processo ser morto
+TASK_TIME_LIMIT_SECONDS = int(os.getenv("CELERY_TASK_TIME_LIMIT", str(6 * 3600)))
+TASK_SOFT_TIME_LIMIT_SECONDS = TASK_TIME_LIMIT_SECONDS - 300
+# Com acks_late o Redis reentrega uma mensagem não confirmada após o visibility_timeout (default 1h):
+# tem de ficar acima do job mais longo, senão um segundo worker repete o job (e as chamadas OpenAI)
+BROKER_VISIBILITY_TIMEOUT_SECONDS = TASK_TIME_LIMIT_SECONDS + 3600
+
+celery_app = Celery(
+    "public_incentives",
+    broker=REDIS_URL,
+    backend=REDIS_URL,
+    include=["app.worker"]
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_track_started=True,
+    # Jobs longos: um de cada vez por processo e só confirmados no fim
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    task_time_limit=TASK_TIME_LIMIT_SECONDS,
+    task_soft_time_limit=TASK_SOFT_TIME_LIMIT_SECONDS,
+    broker_transport_options={"visibility_timeout": BROKER_VISIBILITY_TIMEOUT_SECONDS},
+    result_backend_transport_options={"visibility_timeout": BROKER_VISIBILITY_TIMEOUT_SECONDS},
+    result_expires=24 * 3600,
+    # Resultados da OpenAI Batch API (mode=async_batch) aplicados pelo serviço beat
+    beat_schedule={
+        "poll-ai-batches": {
+            "task": "data.poll_ai_batches",
+            "schedule": AI_BATCH_POLL_SECONDS
+        },
+        # Único writer da linha analytics_summary (os triggers só acrescentam deltas)
+        "fold-analytics-summary": {
+            "task": "data.fold_analytics_summary",
+            "schedule": ANALYTICS_FOLD_SECONDS
+        }
+    }
+)
@@ -1,4 +1,4 @@
 from .database import engine, SessionLocal, Base
-from .models import Incentive, Company, IncentiveMetadata, IncentiveCompanyMatch, AICostTracking
+from .models import Incentive, Company, IncentiveMetadata, IncentiveCompanyMatch, AICostTracking, AnalyticsSummary, AnalyticsSummaryDelta
 
-__all__ = ["engine", "SessionLocal", "Base", "Incentive", "Company", "IncentiveMetadata", "IncentiveCompanyMatch", "AICostTracking"]
+__all__ = ["engine", "SessionLocal", "Base", "Incentive", "Company", "IncentiveMetadata", "IncentiveCompanyMatch", "AICostTracking", "AnalyticsSummary", "AnalyticsSummaryDelta"]
@@ -1,28 +1,88 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Numeric, ForeignKey, JSON, Boolean, func, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, Numeric, ForeignKey, JSON, Boolean, BigInteger, func, Float, literal_column, Index, text, DDL, event, UniqueConstraint, Enum
 from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+import os
+import time
 import uuid
 from .database import Base
 
 
+# JSONB em PostgreSQL (formato binário, indexável com GIN); JSON genérico noutros dialetos (ex: SQLite nos testes)
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+# Estados do processamento IA: ENUM nativo em PostgreSQL (4 bytes, migração 019), VARCHAR noutros dialetos
+AI_PROCESSING_STATUSES = ("pending", "processing", "submitted", "completed", "failed")
+
+# PK sequencial de 8 bytes (bigserial) para tabelas internas; em SQLite só INTEGER PRIMARY KEY é autoincrement
+BigIntPK = BigInteger().with_variant(Integer(), "sqlite")
+
+# Instantes com fuso (timestamptz, migração 024): datas do CSV vêm com offset ("+00") e são normalizadas para UTC no insert
+TimestampTZ = DateTime(timezone=True)
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Gera um UUID versão 7 (RFC 9562): 48 bits de timestamp Unix em ms + bits aleatórios.
+    
+    Ao contrário do uuid4, os valores são ordenados no tempo, pelo que as inserções
+    caem no fim do índice B-tree da PK em vez de em páginas aleatórias.
+    """
+    unix_ts_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    
+    value = (unix_ts_ms & 0xFFFF_FFFF_FFFF) << 80   # unix_ts_ms (48 bits)
+    value |= 0x7 << 76                              # version (4 bits)
+    value |= (rand >> 62 & 0xFFF) << 64             # rand_a (12 bits)
+    value |= 0b10 << 62                             # variant (2 bits)
+    value |= rand & ((1 << 62) - 1)                 # rand_b (62 bits)
+    return uuid.UUID(int=value)
+
+
+def trigram_index(name: str, column: str) -> Index:
+    """GIN (gin_trgm_ops) index for ILIKE '%term%' searches; plain index outside PostgreSQL"""
+    return Index(name, column, postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"})
+
+
+def jsonb_containment_index(name: str, column: str) -> Index:
+    """GIN (jsonb_path_ops) index for @> containment queries; plain index outside PostgreSQL"""
+    return Index(name, column, postgresql_using="gin", postgresql_ops={column: "jsonb_path_ops"})
+
+
 class Incentive(Base):
     """
     Tabela principal de incentivos.
     Contém EXATAMENTE os 10 campos especificados no enunciado.
     """
     __tablename__ = "incentives"
+    __table_args__ = (
+        # Paginação keyset de GET /incentives/ (migração 009)
+        Index("idx_incentives_publication_id", text("publication_date DESC NULLS LAST"),
+              text("incentive_id DESC")).ddl_if(dialect="postgresql"),
+        # Prazos (end_date) e filtro por orçamento mínimo do chatbot (migrações 001 / 023)
+        Index("idx_incentives_dates", "start_date", "end_date"),
+        Index("idx_incentives_end_date", "end_date"),
+        Index("idx_incentives_total_budget", "total_budget"),
+        # Pesquisa por substring no título/descrição (migração 010)
+        trigram_index("idx_incentives_title_trgm", "title"),
+        trigram_index("idx_incentives_description_trgm", "description"),
+        # ai_description->>'summary' / ->>'eligible_sectors' pesquisados com ILIKE pelo chatbot (migração 022)
+        Index("idx_incentives_ai_summary_trgm", text("(ai_description ->> 'summary') gin_trgm_ops"),
+              postgresql_using="gin").ddl_if(dialect="postgresql"),
+        Index("idx_incentives_ai_sectors_trgm", text("(ai_description ->> 'eligible_sectors') gin_trgm_ops"),
+              postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
     
     # Campos conforme enunciado (10 campos)
-    incentive_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    title = Column(String(500), nullable=False)
+    incentive_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    title = Column(Text, nullable=False)
     description = Column(Text)
-    ai_description = Column(JSON)  # Descrição estruturada em JSON gerada por IA
-    document_urls = Column(JSON)  # Links para documentos associados
-    publication_date = Column(DateTime)  # Data de publicação
-    start_date = Column(DateTime)  # Data de início
-    end_date = Column(DateTime)  # Data de fim
+    ai_description = Column(JSONType)  # Descrição estruturada em JSON gerada por IA
+    document_urls = Column(JSONType)  # Links para documentos associados
+    publication_date = Column(TimestampTZ)  # Data de publicação
+    start_date = Column(TimestampTZ)  # Data de início
+    end_date = Column(TimestampTZ)  # Data de fim
     total_budget = Column(Numeric(15, 2))  # Orçamento total
-    source_link = Column(String(1000))  # Link para página oficial
+    source_link = Column(Text)  # Link para página oficial
     
     # Relationship com metadata (1:1)
     # Nota: não pode ser "metadata" pois é palavra reservada do SQLAlchemy
@@ -36,22 +96,34 @@ class IncentiveMetadata(Base):
     Relação 1:1 com Incentive.
     """
     __tablename__ = "incentives_metadata"
+    __table_args__ = (
+        # Seleção pending/failed dos jobs AI (migração 011); incentive_id já tem o índice da constraint UNIQUE
+        Index("idx_metadata_status_incentive", "ai_processing_status", "incentive_id"),
+        jsonb_containment_index("idx_metadata_raw_csv_data_gin", "raw_csv_data"),
+        # Fila do worker AI: só as linhas pending, pela ordem de chegada (migração 015)
+        Index("idx_metadata_pending", "created_at", "incentive_id",
+              postgresql_where=text("ai_processing_status = 'pending'")),
+    )
     
-    metadata_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    metadata_id = Column(BigIntPK, primary_key=True, autoincrement=True)  # chave real: incentive_id (UNIQUE)
     incentive_id = Column(UUID(as_uuid=True), ForeignKey("incentives.incentive_id", ondelete="CASCADE"), nullable=False, unique=True)
     
     # Dados completos do CSV (21 campos originais)
-    raw_csv_data = Column(JSON, nullable=False)
+    raw_csv_data = Column(JSONType, nullable=False)
     
     # Metadata de processamento IA
-    ai_processing_status = Column(String(50), default="pending")  # pending/processing/completed/failed
-    ai_processing_date = Column(DateTime)
-    fields_completed_by_ai = Column(JSON)  # Lista de campos preenchidos por IA
+    ai_processing_status = Column(Enum(*AI_PROCESSING_STATUSES, name="ai_processing_status"), default="pending")
+    ai_processing_date = Column(TimestampTZ)
+    fields_completed_by_ai = Column(JSONType, server_default=text("'[]'"))  # Lista de campos preenchidos por IA
     ai_processing_error = Column(Text)  # Mensagem de erro se falhar
     
+    # OpenAI Batch API (status "submitted"): batch e pedido (grupo de incentivos) dentro do batch
+    ai_batch_id = Column(String(64))
+    ai_batch_custom_id = Column(String(64))
+    
     # Timestamps
-    created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    created_at = Column(TimestampTZ, server_default=func.now())
+    updated_at = Column(TimestampTZ, server_default=func.now(), onupdate=func.now())
     
     # Relationship com incentive (1:1)
     incentive = relationship("Incentive", back_populates="incentive_metadata")
@@ -68,25 +140,49 @@ class Company(Base):
     - company_size: Requer API externa (eInforma/Racius) - maior impacto no matching
     """
     __tablename__ = "companies"
+    __table_args__ = (
+        # Pesquisa por substring em /companies/ e /companies/search/by-activity (migração 006)
+        trigram_index("idx_companies_name_trgm", "company_name"),
+        trigram_index("idx_companies_trade_description_trgm", "trade_description_native"),
+        trigram_index("idx_companies_cae_label_trgm", "cae_primary_label"),
+        trigram_index("idx_companies_sector_trgm", "activity_sector"),
+        # cae_primary_code @> '["62010"]' (migração 016)
+        jsonb_containment_index("idx_companies_cae_gin", "cae_primary_code"),
+        # Listagem keyset só das empresas ativas (migração 008)
+        Index("idx_companies_active_name_id", "company_name", "company_id",
+              postgresql_where=text("is_active = true")),
+    )
     
     # Primary key
-    company_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    company_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     
     # ✅ Campos do CSV (disponíveis e suficientes)
-    company_name = Column(String(500), nullable=False)
-    cae_primary_label = Column(String(500))  # Ex: "Software development" - usado para matching
-    cae_primary_code = Column(JSON)          # Ex: ["62010", "62020"] - múltiplos códigos inferidos por LLM
+    company_name = Column(Text, nullable=False)
+    cae_primary_label = Column(Text)  # Ex: "Software development" - usado para matching
+    cae_primary_code = Column(JSONType)          # Ex: ["62010", "62020"] - múltiplos códigos inferidos por LLM
     trade_description_native = Column(Text)  # Descrição atividade em PT
-    website = Column(String(500))
+    website = Column(Text)
     
     # ⚠️ Campos inferidos via LLM (NULL - requer dados externos)
     company_size = Column(String(50))  # micro/small/medium/large - +20% precisão se adicionado
     region = Column(String(100))       # Região NUTS II de Portugal
+    activity_sector = Column(Text)  # Setor de atividade (migração 001) - usado na pesquisa por atividade
     
     # Metadata
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    created_at = Column(TimestampTZ, server_default=func.now())
+    updated_at = Column(TimestampTZ, server_default=func.now(), onupdate=func.now())
+
+
+# Base.metadata.create_all (scripts de setup) precisa do pg_trgm antes dos índices trigram
+for _table in (Incentive.__table__, Company.__table__):
+    event.listen(_table, "before_create",
+                 DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
+
+
+# tsvector de pesquisa full-text (nome + CAE label + descrição + setor), coluna GENERATED
+# mantida pelo PostgreSQL (migração 007). Não é mapeada no ORM para nunca ser carregada nem escrita.
+company_search_tsv = literal_column("companies.search_tsv")
 
 
 # STUB para Fase 2 - apenas para evitar erros de importação
@@ -100,18 +196,31 @@ class IncentiveCompanyMatch(Base):
     - Posição no ranking (1-5)
     """
     __tablename__ = "incentive_company_matches"
+    __table_args__ = (
+        # Índices de FK (migrações 004/018): cada FK é o prefixo de um índice composto;
+        # INCLUDE só com colunas escalares pequenas, match_reasons (jsonb) lido do heap (migração 028)
+        Index("idx_matches_company_score", "company_id", text("match_score DESC"),
+              postgresql_include=["incentive_id", "ranking_position"]),
+        Index("idx_matches_incentive_score", "incentive_id", text("match_score DESC"),
+              postgresql_include=["company_id", "ranking_position"]),
+        # Um só match por (incentivo, posição) e por (incentivo, empresa) (migração 018)
+        UniqueConstraint("incentive_id", "ranking_position", name="uq_matches_incentive_rank"),
+        UniqueConstraint("incentive_id", "company_id", name="uq_matches_incentive_company"),
+        Index("idx_matches_score", "match_score"),
+    )
     
-    match_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    incentive_id = Column(UUID(as_uuid=True), ForeignKey("incentives.incentive_id"), nullable=False)
-    company_id = Column(UUID(as_uuid=True), ForeignKey("companies.company_id"), nullable=False)
+    match_id = Column(BigIntPK, primary_key=True, autoincrement=True)
+    # Apagar um incentivo/empresa apaga os seus matches no próprio PostgreSQL (migração 026)
+    incentive_id = Column(UUID(as_uuid=True), ForeignKey("incentives.incentive_id", ondelete="CASCADE"), nullable=False)
+    company_id = Column(UUID(as_uuid=True), ForeignKey("companies.company_id", ondelete="CASCADE"), nullable=False)
     
     # Match quality (from LLM)
     match_score = Column(Float)  # 0.0-1.0
-    match_reasons = Column(JSON)  # ["razão1", "razão2", ...]
+    match_reasons = Column(JSONType)  # ["razão1", "razão2", ...]
     ranking_position = Column(Integer)  # 1, 2, 3, 4, 5
     
     # Metadata
-    created_at = Column(DateTime, server_default=func.now())
+    created_at = Column(TimestampTZ, server_default=func.now())
     
     # Relationships
     incentive = relationship("Incentive", foreign_keys=[incentive_id])
@@ -124,8 +233,14 @@ class AICostTracking(Base):
     Registra tokens usados, custos e tipo de operação.
     """
     __tablename__ = "ai_cost_tracking"
+    __table_args__ = (
+        # FK + histórico de custos de um incentivo por data (migração 013)
+        Index("idx_ai_cost_tracking_incentive_created", "incentive_id", "created_at"),
+        Index("idx_ai_cost_tracking_operation_type", "operation_type"),
+        Index("idx_ai_cost_tracking_created_at", "created_at"),
+    )
     
-    tracking_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tracking_id = Column(BigIntPK, primary_key=True, autoincrement=True)
     
     # Referência ao incentivo processado (se aplicável)
     incentive_id = Column(UUID(as_uuid=True), ForeignKey("incentives.incentive_id"), nullable=True)
@@ -139,10 +254,10 @@ class AICostTracking(Base):
     output_tokens = Column(Integer, nullable=False)
     total_tokens = Column(Integer, nullable=False)
     
-    # Custos (em USD)
-    input_cost = Column(Numeric(10, 6), nullable=False)  # Custo dos tokens de input
-    output_cost = Column(Numeric(10, 6), nullable=False)  # Custo dos tokens de output
-    total_cost = Column(Numeric(10, 6), nullable=False)  # Custo total desta chamada
+    # Custos em micro-USD (milionésimos de dólar, inteiros de 8 bytes; migração 014)
+    input_cost_micro_usd = Column(BigInteger, nullable=False)  # Custo dos tokens de input
+    output_cost_micro_usd = Column(BigInteger, nullable=False)  # Custo dos tokens de output
+    total_cost_micro_usd = Column(BigInteger, nullable=False)  # Custo total desta chamada
     
     # Metadata
     cache_hit = Column(Boolean, default=False)  # Se foi cache hit (custo = 0)
@@ -150,7 +265,41 @@ class AICostTracking(Base):
     error_message = Column(Text)  # Mensagem de erro (se aplicável)
     
     # Timestamp
-    created_at = Column(DateTime, server_default=func.now())
+    created_at = Column(TimestampTZ, server_default=func.now())
     
     # Relationship
     incentive = relationship("Incentive", foreign_keys=[incentive_id])
+
+
+class AnalyticsSummary(Base):
+    """
+    Linha única (id = 1) com os totais globais usados nas estatísticas do chatbot.
+    
+    Os triggers de incentives, companies e incentive_company_matches (migrações 020/027)
+    só acrescentam linhas a analytics_summary_deltas; a função analytics_summary_fold()
+    (task periódica data.fold_analytics_summary) soma-as a esta linha. Ler as estatísticas
+    é esta linha + os deltas pendentes em vez de COUNT(*)/SUM() sobre as tabelas inteiras.
+    """
+    __tablename__ = "analytics_summary"
+    
+    id = Column(Integer, primary_key=True)
+    total_incentives = Column(BigInteger, nullable=False, default=0)
+    total_companies = Column(BigInteger, nullable=False, default=0)
+    total_matches = Column(BigInteger, nullable=False, default=0)
+    total_budget = Column(Numeric(18, 2), nullable=False, default=0)
+    updated_at = Column(TimestampTZ, server_default=func.now())
+
+
+class AnalyticsSummaryDelta(Base):
+    """
+    Delta de um statement (INSERT/DELETE/TRUNCATE) ou de uma alteração de total_budget,
+    escrito pelos triggers da migração 027. Append-only: os writers não disputam o lock
+    da linha de analytics_summary. Apagado quando é somado por analytics_summary_fold().
+    """
+    __tablename__ = "analytics_summary_deltas"
+    
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    incentives = Column(BigInteger, nullable=False, default=0)
+    companies = Column(BigInteger, nullable=False, default=0)
+    matches = Column(BigInteger, nullable=False, default=0)
+    budget = Column(Numeric(18, 2), nullable=False, default=0)
@@ -1,12 +1,39 @@
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
 from app.api import incentives_router, companies_router, data_management_router, chatbot_router, web_interface_router
+from app.api.responses import ORJSONResponse
+from app.services.ai_processor import get_ai_processor, close_ai_processors
+from app.services.incentive_cache import incentive_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Estado OpenAI partilhado (cliente thread-safe, rate limiter, cache de prompts) criado
+    # uma vez no arranque: um único pool HTTP para todos os pedidos
+    if os.getenv("OPENAI_API_KEY"):
+        get_ai_processor(None)
+    # Invalidações do cache de incentivos feitas pelos jobs no worker Celery
+    incentive_cache.start_listener()
+    yield
+    incentive_cache.stop_listener()
+    close_ai_processors()
+
 
 app = FastAPI(
     title="Public Incentives API",
     description="API para identificar empresas adequadas a incentivos públicos em Portugal",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
+# Listas/detalhes JSON (ai_description, document_urls, ...) comprimidos acima de 1 KiB; as
+# respostas já pré-comprimidas (Content-Encoding de /web) passam sem tocar
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Include routers
 app.include_router(incentives_router)
 app.include_router(companies_router)
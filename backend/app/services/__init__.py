@@ -1,6 +1,20 @@
-from .data_importer import DataImporter
-from .ai_processor import AIProcessor
-from .company_matcher_unified import CompanyMatcherUnified
-from .unified_scorer import UnifiedScorer
+import importlib
+
+# Importados só quando pedidos (PEP 562): importar um submódulo (ex: app.services.cost_tracker)
+# não arrasta pandas/openai dos restantes serviços
+_LAZY_EXPORTS = {
+    "DataImporter": "data_importer",
+    "AIProcessor": "ai_processor",
+    "CompanyMatcherUnified": "company_matcher_unified",
+    "UnifiedScorer": "unified_scorer",
+}
 
 __all__ = ["DataImporter", "AIProcessor", "CompanyMatcherUnified", "UnifiedScorer"]
+
+
+def __getattr__(name):
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_LAZY_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
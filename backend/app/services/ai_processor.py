@@ -1,26 +1,331 @@
+import os
+import re
 import openai
 import json
+import orjson
+import threading
+import itertools
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
 import logging
-import hashlib
 from typing import Dict, Any, List, Optional
-from datetime import datetime
+from datetime import datetime, timezone
 from app.db.models import Incentive, IncentiveMetadata, Company
 from app.services.cost_tracker import CostTracker
+from app.services.rate_limiter import TokenBucket
+from app.services.prompt_cache import PromptCache
 from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
 
+# Erros transitórios da OpenAI (rate limit, rede, timeout, 5xx): repetidos com backoff.
+# Erros de pedido/parsing (BadRequest, JSON inválido, ...) continuam a falhar logo.
+TRANSIENT_OPENAI_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+
+# Instruções fixas de cada operação, enviadas como mensagem "system" byte-idêntica em todas as
+# chamadas (nada interpolado): o prefixo repetido entra no prompt caching automático da OpenAI
+# e só os dados do incentivo (mensagem "user") mudam de chamada para chamada
+AI_DESCRIPTION_SCHEMA = """{
+  "summary": "Resumo executivo de 2-3 frases explicando o incentivo",
+  "objective": "Objetivo principal do incentivo",
+  "target_audience": ["Tipo de beneficiários - ex: PMEs", "Startups", "Grandes empresas"],
+  "eligible_sectors": ["Setores específicos compatíveis com CAE - ex: Computer programming", "Software development", "Information technology"],
+  "eligible_cae_codes": ["Códigos CAE elegíveis - ex: 62010", "62020", "63110"],
+  "eligible_regions": ["Regiões geográficas elegíveis - ex: Norte", "Centro", "Todo o país"],
+  "company_sizes": ["micro", "small", "medium", "large"],
+  "key_requirements": ["Requisito 1", "Requisito 2"],
+  "funding_details": {
+    "max_funding_percentage": 75,
+    "max_amount": 500000,
+    "min_amount": 10000,
+    "funding_type": "grant/loan/tax_benefit/mixed"
+  },
+  "supported_activities": ["Atividade 1", "Atividade 2"],
+  "application_process": "Descrição breve do processo de candidatura",
+  "important_notes": ["Nota importante 1", "Nota importante 2"]
+}"""
+
+CAE_INFERENCE_RULES = """- OBRIGATÓRIO: INFERE códigos CAE específicos baseados nos setores elegíveis
+- Exemplos: "Educação" → ["85520", "85530"], "Tecnologia" → ["62010", "62020"], "Construção" → ["41200", "41100"], "Mobilidade/Transporte" → ["49410", "49420", "49390"]
+- Se não conseguir inferir códigos específicos, usa códigos relacionados ao setor
+- OBRIGATÓRIO: INFERE tamanhos de empresa compatíveis (ex: ["small", "medium", "large"])"""
+
+SYSTEM_CONVERT_PROMPT = f"""Converte a descrição de um incentivo público português (TEXTO ORIGINAL) para JSON estruturado.
+
+Estrutura o texto em JSON:
+{AI_DESCRIPTION_SCHEMA}
+
+INSTRUÇÕES:
+- Usa [] ou null se faltar informação
+{CAE_INFERENCE_RULES}
+- Responde SÓ com JSON"""
+
+SYSTEM_GENERATE_PROMPT = f"""Analisa um incentivo público português e gera uma descrição estruturada em JSON.
+
+TAREFA:
+Extrai e estrutura a informação disponível em JSON com o seguinte formato:
+
+{AI_DESCRIPTION_SCHEMA}
+
+INSTRUÇÕES:
+- Se alguma informação não estiver disponível, usa [] para arrays ou null para valores
+- Sê específico e preciso
+- Mantém termos técnicos em português
+- INFERE setores elegíveis mesmo com descrições vagas (ex: "educação" → ["Educação", "Formação"])
+- Se não há setores explícitos, infere do título/objetivo
+{CAE_INFERENCE_RULES}
+- Responde APENAS com o JSON, sem texto adicional"""
+
+SYSTEM_DATES_PROMPT = """Analisa um incentivo português e extrai as datas indicadas em DATAS EM FALTA.
+
+Responde em JSON com formato ISO (YYYY-MM-DD):
+{
+  "publication_date": "2025-01-15",
+  "start_date": "2025-02-01",
+  "end_date": "2025-12-31"
+}
+
+Se não conseguires determinar uma data, usa null.
+Responde APENAS com JSON, sem texto adicional."""
+
+SYSTEM_BUDGET_PROMPT = """Analisa um incentivo português e extrai o ORÇAMENTO TOTAL (dotação total disponível) em euros.
+
+Responde em JSON:
+{
+  "total_budget": 1000000.50
+}
+
+Se não conseguires determinar, usa null.
+Responde APENAS com JSON, sem texto adicional."""
+
+SYSTEM_GROUP_PROMPT = f"""Analisa uma lista numerada de incentivos públicos portugueses. Para cada um, preenche APENAS os
+campos indicados entre parênteses.
+
+Responde com um objeto JSON {{"results": [...]}} com uma entrada por incentivo, pela mesma ordem:
+{{"results": [
+  {{
+    "index": 1,
+    "ai_description": {AI_DESCRIPTION_SCHEMA},
+    "publication_date": "2025-01-15",
+    "start_date": "2025-02-01",
+    "end_date": "2025-12-31",
+    "total_budget": 1000000.50
+  }}
+]}}
+
+INSTRUÇÕES:
+- Campos não pedidos ou que não consegues determinar: null
+- Datas em formato ISO (YYYY-MM-DD); total_budget em euros
+{CAE_INFERENCE_RULES}
+- Mantém termos técnicos em português"""
+
+
+# all_data enviado ao modelo sem o que não ajuda a descrever o incentivo: anexos (documentos,
+# metade do volume), proveniência do scraping, ids internos (*Id) e nulls; textos longos cortados
+ALL_DATA_IGNORED_KEYS = {"documentos", "scraped_at", "source_url", "extraction_method"}
+ALL_DATA_MAX_STRING = 500
+
+# Formatos tentados por _parse_datetime depois de datetime.fromisoformat
+NON_ISO_DATETIME_FORMATS = ("%d/%m/%Y",)
+
+
+def as_utc(value: datetime) -> datetime:
+    """Timezone-aware UTC datetime for the timestamptz columns (naive values are taken as UTC)"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def slim_all_data(value: Any) -> Any:
+    """Copy of all_data (recursively) reduced to the fields worth prompt tokens"""
+    if isinstance(value, dict):
+        return {
+            key: slim_all_data(item) for key, item in value.items()
+            if item is not None and key not in ALL_DATA_IGNORED_KEYS and not key.endswith("Id")
+        }
+    if isinstance(value, list):
+        return [slim_all_data(item) for item in value]
+    if isinstance(value, str) and len(value) > ALL_DATA_MAX_STRING:
+        return value[:ALL_DATA_MAX_STRING] + "…"
+    return value
+
+
+def all_data_prompt(all_data: Optional[Dict]) -> str:
+    """
+    slim_all_data as compact JSON (no spaces after , and :) for the prompts.
+    
+    orjson: same text as json.dumps(ensure_ascii=False) with compact separators, serialized in C.
+    Callers doing several AI calls for one incentive compute it once and pass it as all_data_json.
+    """
+    return orjson.dumps(
+        slim_all_data(all_data or {}), default=str, option=orjson.OPT_NON_STR_KEYS
+    ).decode()
+
+
+# Extração por regras (sem AI) de datas e dotação escritas no texto do aviso:
+# "Data de publicação: 12/09/2025", "candidaturas de 01/10/2025 a 31/12/2025",
+# "dotação de 1,5 milhões de euros". Só preenche quando há uma palavra-chave junto ao valor.
+MONTHS_PT = {
+    "janeiro": 1, "fevereiro": 2, "março": 3, "marco": 3, "abril": 4, "maio": 5, "junho": 6,
+    "julho": 7, "agosto": 8, "setembro": 9, "outubro": 10, "novembro": 11, "dezembro": 12,
+}
+DATE_PATTERN = (
+    r"(?:(?P<d>\d{1,2})[/.-](?P<m>\d{1,2})[/.-](?P<y>\d{4})"
+    r"|(?P<iy>\d{4})-(?P<im>\d{2})-(?P<id>\d{2})"
+    r"|(?P<td>\d{1,2})\s+de\s+(?P<tm>" + "|".join(MONTHS_PT) + r")\s+de\s+(?P<ty>\d{4}))"
+)
+DATE_RE = re.compile(DATE_PATTERN, re.IGNORECASE)
+DATE_RANGE_RE = re.compile(
+    r"\b(?:de|entre)\s+(?P<start>" + DATE_PATTERN.replace("?P<", "?P<s_") + r")"
+    r"\s+(?:a|e|até)\s+(?P<end>" + DATE_PATTERN.replace("?P<", "?P<e_") + r")",
+    re.IGNORECASE
+)
+# (campo, palavras-chave) procuradas nos DATE_KEYWORD_WINDOW caracteres antes da data; ganha a mais próxima
+DATE_KEYWORDS = [
+    ("publication_date", re.compile(r"publica", re.IGNORECASE)),
+    ("start_date", re.compile(r"in[íi]cio|abertura|a partir d", re.IGNORECASE)),
+    ("end_date", re.compile(r"\bfim\b|termo|encerramento|prazo|limite|\bat[ée]\b", re.IGNORECASE)),
+]
+DATE_KEYWORD_WINDOW = 40
+
+BUDGET_KEYWORD_RE = re.compile(r"dota[çc][ãa]o|or[çc]amento|montante global", re.IGNORECASE)
+BUDGET_KEYWORD_WINDOW = 80
+BUDGET_AMOUNT = r"(?P<int>\d{1,3}(?:[. \u00a0]\d{3})+|\d+)(?:[,.](?P<dec>\d{1,2})(?!\d))?"
+BUDGET_UNIT = r"(?:\s*(?P<unit>mil\s+milh[õo]es|milh[õo]es|milh[ãa]o|mil|M|k)\b)?"
+BUDGET_RE = re.compile(
+    r"(?:€|EUR)\s*" + BUDGET_AMOUNT.replace("?P<", "?P<p_") + BUDGET_UNIT.replace("?P<", "?P<p_")
+    + r"|" + BUDGET_AMOUNT + BUDGET_UNIT + r"\s*(?:de\s+)?(?:€|euros?\b|EUR\b)",
+    re.IGNORECASE
+)
+BUDGET_UNITS = {"mil": 1e3, "k": 1e3, "m": 1e6, "milhão": 1e6, "milhao": 1e6,
+                "milhões": 1e6, "milhoes": 1e6}
+
+
+def _date_from_match(groups: Dict[str, Optional[str]], prefix: str = "") -> Optional[datetime]:
+    """UTC datetime of a DATE_PATTERN match (group names optionally prefixed), None if not a valid date"""
+    group = lambda name: groups.get(prefix + name)
+    try:
+        if group("d"):
+            return datetime(int(group("y")), int(group("m")), int(group("d")), tzinfo=timezone.utc)
+        if group("iy"):
+            return datetime(int(group("iy")), int(group("im")), int(group("id")), tzinfo=timezone.utc)
+        return datetime(int(group("ty")), MONTHS_PT[group("tm").lower()], int(group("td")), tzinfo=timezone.utc)
+    except (ValueError, TypeError, KeyError):
+        return None
+
+
+def dates_from_text(text: Optional[str]) -> Dict[str, datetime]:
+    """publication_date/start_date/end_date written in a free text, first occurrence of each (no AI)"""
+    dates: Dict[str, datetime] = {}
+    if not text:
+        return dates
+    
+    for match in DATE_RANGE_RE.finditer(text):
+        start = _date_from_match(match.groupdict(), "s_")
+        end = _date_from_match(match.groupdict(), "e_")
+        if start and end and start <= end:
+            dates.setdefault('start_date', start)
+            dates.setdefault('end_date', end)
+    
+    for match in DATE_RE.finditer(text):
+        value = _date_from_match(match.groupdict())
+        if not value:
+            continue
+        window = text[max(0, match.start() - DATE_KEYWORD_WINDOW):match.start()]
+        closest = None
+        for field, keyword in DATE_KEYWORDS:
+            for found in keyword.finditer(window):
+                if closest is None or found.end() > closest[1]:
+                    closest = (field, found.end())
+        if closest:
+            dates.setdefault(closest[0], value)
+    
+    return dates
+
+
+def budget_from_text(text: Optional[str]) -> Optional[float]:
+    """Euro amount right after a dotação/orçamento keyword in a free text (no AI)"""
+    if not text:
+        return None
+    
+    for match in BUDGET_RE.finditer(text):
+        window = text[max(0, match.start() - BUDGET_KEYWORD_WINDOW):match.start()]
+        if not BUDGET_KEYWORD_RE.search(window):
+            continue
+        groups = {name.removeprefix("p_"): value for name, value in match.groupdict().items() if value}
+        amount = float(re.sub(r"[. \u00a0]", "", groups["int"]) + "." + groups.get("dec", "0"))
+        unit = " ".join(groups.get("unit", "").lower().split())
+        amount *= 1e9 if unit.startswith("mil ") else BUDGET_UNITS.get(unit, 1)
+        if amount > 0:
+            return amount
+    
+    return None
+
+
+# Estado por processo (e por API key) reutilizado por todos os AIProcessor criados
+# com get_ai_processor: cliente OpenAI (pool HTTP), token bucket RPM/TPM e cache de prompts.
+# A Session e o CostTracker continuam por pedido/task (Sessions não são thread-safe).
+_shared_state: Dict[str, Dict[str, Any]] = {}
+_shared_state_lock = threading.Lock()
+
 
 class AIProcessor:
-    def __init__(self, api_key: str, session: Session):
-        self.client = openai.OpenAI(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        session: Session,
+        client: Optional[openai.OpenAI] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        prompt_cache: Optional[PromptCache] = None
+    ):
+        # client partilhado (ex: get_ai_processor) evita novo pool HTTP por instância;
+        # max_retries=0: o único retry é o tenacity de _chat_completion, que passa pelo rate limiter
+        self.client = client or openai.OpenAI(api_key=api_key, max_retries=0)
+        # rate_limiter partilhado por todos os workers de um batch (None = sem throttle)
+        self.rate_limiter = rate_limiter
         self.session = session
         self.cost_tracker = CostTracker(session)
-        self._prompt_cache = {}  # Memory cache for identical prompts
-        self._cache_hits = 0
-        self._cache_misses = 0
+        # Cache de prompts idênticos (Redis partilhado via get_ai_processor; dict local por omissão)
+        self._prompt_cache = prompt_cache or PromptCache()
     
-    def generate_ai_description(self, incentive: Incentive, raw_csv_data: Dict) -> Optional[Dict[str, Any]]:
+    @retry(
+        retry=retry_if_exception_type(TRANSIENT_OPENAI_ERRORS),
+        wait=wait_random_exponential(min=1, max=60),
+        stop=stop_after_attempt(6),
+        reraise=True
+    )
+    def _chat_completion(self, **kwargs):
+        """
+        chat.completions.create behind the shared rate limiter (if any).
+        
+        Reserves an estimate (~4 chars per prompt token + max_tokens) before the call and
+        reconciles it with response.usage afterwards. Transient errors are retried with
+        exponential backoff + jitter (up to 6 attempts, each one going through the limiter).
+        """
+        if not self.rate_limiter:
+            return self.client.chat.completions.create(**kwargs)
+        
+        prompt_chars = sum(len(message["content"]) for message in kwargs["messages"])
+        estimated_tokens = prompt_chars // 4 + kwargs.get("max_tokens", 0)
+        self.rate_limiter.acquire(estimated_tokens)
+        
+        actual_tokens = estimated_tokens
+        try:
+            response = self.client.chat.completions.create(**kwargs)
+            if response.usage:
+                actual_tokens = response.usage.total_tokens
+            return response
+        finally:
+            self.rate_limiter.reconcile(estimated_tokens, actual_tokens)
+    
+    def generate_ai_description(
+        self, incentive: Incentive, raw_csv_data: Dict, all_data_json: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Generate structured AI description from text description and raw data.
         This is called when ai_description is missing or needs to be converted to JSON.
@@ -32,6 +337,8 @@ class AIProcessor:
         - If ai_description is empty → Full generation prompt
         
         This reduces costs for incentives with existing text descriptions.
+        
+        all_data_json: all_data_prompt(raw_csv_data['all_data']) if the caller already has it.
         """
         csv_data = raw_csv_data or {}
         
@@ -43,111 +350,40 @@ class AIProcessor:
         
         if has_existing_description:
             # OPTIMIZED PROMPT: Convert existing text to JSON (much shorter, cheaper)
-            prompt = f"""
-Converte esta descrição de incentivo para JSON estruturado.
-
-TEXTO ORIGINAL:
+            system_prompt = SYSTEM_CONVERT_PROMPT
+            prompt = f"""TEXTO ORIGINAL:
 {original_ai_desc}
 
 CONTEXTO ADICIONAL:
 Título: {incentive.title}
-Programa: {csv_data.get('incentive_program', '')}
-
-Estrutura o texto em JSON:
-{{
-  "summary": "Resumo de 2-3 frases",
-  "objective": "Objetivo principal",
-  "target_audience": ["PMEs", "Startups", etc],
-  "eligible_sectors": ["Tecnologia", etc],
-  "eligible_cae_codes": ["Códigos CAE elegíveis - ex: 62010", "62020", "63110"],
-  "eligible_regions": ["Norte", "Centro", etc],
-  "company_sizes": ["micro", "small", "medium", "large"],
-  "key_requirements": ["Requisito 1", etc],
-  "funding_details": {{
-    "max_funding_percentage": 75,
-    "max_amount": 500000,
-    "min_amount": 10000,
-    "funding_type": "grant/loan/tax_benefit/mixed"
-  }},
-  "supported_activities": ["Atividade 1", etc],
-  "application_process": "Breve descrição",
-  "important_notes": ["Nota 1", etc]
-}}
-
-INSTRUÇÕES:
-- Usa [] ou null se faltar informação
-- OBRIGATÓRIO: INFERE códigos CAE específicos baseados nos setores elegíveis
-- Exemplos: "Educação" → ["85520", "85530"], "Tecnologia" → ["62010", "62020"], "Construção" → ["41200", "41100"], "Mobilidade/Transporte" → ["49410", "49420", "49390"]
-- Se não conseguir inferir códigos específicos, usa códigos relacionados ao setor
-- OBRIGATÓRIO: INFERE tamanhos de empresa compatíveis (ex: ["small", "medium", "large"])
-- Responde SÓ com JSON:
-"""
+Programa: {csv_data.get('incentive_program', '')}"""
             max_tokens = 800  # Shorter response expected
             operation_tag = "convert_text"
             
         else:
             # FULL PROMPT: Generate from scratch (more expensive)
             eligibility = csv_data.get('eligibility_criteria', {})
-            all_data_content = csv_data.get('all_data', {})
+            if all_data_json is None:
+                all_data_json = all_data_prompt(csv_data.get('all_data'))
             
-            prompt = f"""
-Analisa este incentivo público português e gera uma descrição estruturada em JSON.
-
-INFORMAÇÃO DISPONÍVEL:
+            system_prompt = SYSTEM_GENERATE_PROMPT
+            prompt = f"""INFORMAÇÃO DISPONÍVEL:
 Título: {incentive.title}
 Descrição: {incentive.description}
 Programa: {csv_data.get('incentive_program', 'Desconhecido')}
 Estado: {csv_data.get('status', 'Desconhecido')}
 Orçamento Total: €{incentive.total_budget if incentive.total_budget else 'Não especificado'}
-Critérios de Elegibilidade: {json.dumps(eligibility, ensure_ascii=False)}
-Dados Completos: {json.dumps(all_data_content, ensure_ascii=False)}
-
-TAREFA:
-Extrai e estrutura a informação em JSON com o seguinte formato:
-
-{{
-  "summary": "Resumo executivo de 2-3 frases explicando o incentivo",
-  "objective": "Objetivo principal do incentivo",
-  "target_audience": ["Tipo de beneficiários - ex: PMEs", "Startups", "Grandes empresas"],
-  "eligible_sectors": ["Setores específicos compatíveis com CAE - ex: Computer programming", "Software development", "Information technology"],
-  "eligible_cae_codes": ["Códigos CAE elegíveis - ex: 62010", "62020", "63110"],
-  "eligible_regions": ["Regiões geográficas elegíveis - ex: Norte", "Centro", "Todo o país"],
-  "company_sizes": ["micro", "small", "medium", "large"],
-  "key_requirements": ["Requisito 1", "Requisito 2"],
-  "funding_details": {{
-    "max_funding_percentage": 75,
-    "max_amount": 500000,
-    "min_amount": 10000,
-    "funding_type": "grant/loan/tax_benefit/mixed"
-  }},
-  "supported_activities": ["Atividade 1", "Atividade 2"],
-  "application_process": "Descrição breve do processo de candidatura",
-  "important_notes": ["Nota importante 1", "Nota importante 2"]
-}}
-
-INSTRUÇÕES:
-- Se alguma informação não estiver disponível, usa [] para arrays ou null para valores
-- Sê específico e preciso
-- Mantém termos técnicos em português
-- INFERE setores elegíveis mesmo com descrições vagas (ex: "educação" → ["Educação", "Formação"])
-- Se não há setores explícitos, infere do título/objetivo
-- OBRIGATÓRIO: INFERE códigos CAE específicos baseados nos setores elegíveis
-- Exemplos: "Educação" → ["85520", "85530"], "Tecnologia" → ["62010", "62020"], "Construção" → ["41200", "41100"]
-- Se não conseguir inferir códigos específicos, usa códigos relacionados ao setor
-- OBRIGATÓRIO: INFERE tamanhos de empresa compatíveis (ex: ["small", "medium", "large"])
-- Responde APENAS com o JSON, sem texto adicional
-
-JSON:
-"""
+Critérios de Elegibilidade: {json.dumps(eligibility, ensure_ascii=False, separators=(",", ":"))}
+Dados Completos: {all_data_json}"""
             max_tokens = 1500  # Full response
             operation_tag = "generate_full"
         
-        # Memory cache: Check if we've seen this exact prompt before
-        cache_key = hashlib.md5(prompt.encode('utf-8')).hexdigest()
+        # Prompt cache: Check if we've seen this exact prompt before
+        cache_key = PromptCache.make_key("gpt-4o-mini", system_prompt + prompt, temperature=0.1, max_tokens=max_tokens)
+        cached = self._prompt_cache.get(cache_key)
         
-        if cache_key in self._prompt_cache:
-            self._cache_hits += 1
-            logger.info(f"💾 Cache HIT for '{incentive.title[:50]}...' (hits: {self._cache_hits}, misses: {self._cache_misses})")
+        if cached is not None:
+            logger.info(f"💾 Cache HIT for '{incentive.title[:50]}...'")
             
             # Track cache hit (custo = 0)
             self.cost_tracker.track_api_call(
@@ -159,32 +395,25 @@ JSON:
                 success=True
             )
             
-            return self._prompt_cache[cache_key]
+            return cached
         
         # Cache miss - need to call OpenAI API
-        self._cache_misses += 1
-        logger.info(f"🔍 Cache MISS for '{incentive.title[:50]}...' - calling OpenAI API (hits: {self._cache_hits}, misses: {self._cache_misses})")
+        logger.info(f"🔍 Cache MISS for '{incentive.title[:50]}...' - calling OpenAI API")
         
         try:
-            response = self.client.chat.completions.create(
+            response = self._chat_completion(
                 model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
                 temperature=0.1,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                response_format={"type": "json_object"}
             )
             
-            content = response.choices[0].message.content.strip()
-            
-            # Remove markdown code blocks if present
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.startswith("```"):
-                content = content[3:]
-            if content.endswith("```"):
-                content = content[:-3]
-            content = content.strip()
-            
-            result = json.loads(content)
+            # JSON mode: the answer is always one parseable object (no ``` fences to strip)
+            result = json.loads(response.choices[0].message.content)
             
             # Track API call cost
             usage_data = {
@@ -202,8 +431,8 @@ JSON:
             )
             
             # Store in cache for future use
-            self._prompt_cache[cache_key] = result
-            logger.info(f"✅ Cached result for '{incentive.title[:50]}...' (cache size: {len(self._prompt_cache)})")
+            self._prompt_cache.set(cache_key, result)
+            logger.info(f"✅ Cached result for '{incentive.title[:50]}...'")
             
             return result
             
@@ -223,15 +452,30 @@ JSON:
             
             return None
     
-    def extract_missing_dates(self, incentive: Incentive, raw_csv_data: Dict) -> Dict[str, Optional[datetime]]:
+    def extract_missing_dates(
+        self, incentive: Incentive, raw_csv_data: Dict, all_data_json: Optional[str] = None
+    ) -> Dict[str, Optional[datetime]]:
         """
         Extract missing dates from description or all_data using AI.
         Returns dict with publication_date, start_date, end_date.
         """
         csv_data = raw_csv_data or {}
-        all_data = csv_data.get('all_data', {})
         
-        # First try to extract from all_data (deterministic)
+        # First try to extract from all_data and the description text (deterministic)
+        dates = self._dates_from_all_data(csv_data.get('all_data', {}))
+        dates.update(self._dates_from_text(incentive, dates))
+        
+        # If still missing dates, use AI
+        missing_dates = self._missing_date_fields(incentive, dates)
+        
+        if missing_dates:
+            ai_dates = self._extract_dates_with_ai(incentive, missing_dates, csv_data, all_data_json)
+            dates.update(ai_dates)
+        
+        return dates
+    
+    def _dates_from_all_data(self, all_data: Dict) -> Dict[str, Optional[datetime]]:
+        """Dates available in the calendario field of all_data (no AI)"""
         dates = {}
         
         # Try calendario field in all_data
@@ -244,66 +488,49 @@ JSON:
             if 'dataFim' in calendario:
                 dates['end_date'] = self._parse_datetime(calendario['dataFim'])
         
-        # If still missing dates, use AI
-        missing_dates = []
-        if 'publication_date' not in dates and not incentive.publication_date:
-            missing_dates.append('publication_date')
-        if 'start_date' not in dates and not incentive.start_date:
-            missing_dates.append('start_date')
-        if 'end_date' not in dates and not incentive.end_date:
-            missing_dates.append('end_date')
-        
-        if missing_dates:
-            ai_dates = self._extract_dates_with_ai(incentive, missing_dates)
-            dates.update(ai_dates)
-        
         return dates
     
-    def _extract_dates_with_ai(self, incentive: Incentive, missing_fields: List[str]) -> Dict[str, Optional[datetime]]:
-        """Use AI to extract dates from text"""
-        csv_data = incentive.incentive_metadata.raw_csv_data if incentive.incentive_metadata else {}
+    def _dates_from_text(self, incentive: Incentive, found: Dict) -> Dict[str, datetime]:
+        """Dates written in the description for the fields still missing (no AI)"""
+        return {
+            field: value for field, value in dates_from_text(incentive.description).items()
+            if field not in found and not getattr(incentive, field)
+        }
+    
+    def _missing_date_fields(self, incentive: Incentive, dates: Dict) -> List[str]:
+        """Date fields neither set on the incentive nor found deterministically"""
+        return [
+            field for field in ('publication_date', 'start_date', 'end_date')
+            if field not in dates and not getattr(incentive, field)
+        ]
+    
+    def _extract_dates_with_ai(
+        self, incentive: Incentive, missing_fields: List[str], csv_data: Dict, all_data_json: Optional[str] = None
+    ) -> Dict[str, Optional[datetime]]:
+        """Use AI to extract dates from text (csv_data: the caller's raw_csv_data, no lazy load of incentive_metadata)"""
+        if all_data_json is None:
+            all_data_json = all_data_prompt(csv_data.get('all_data'))
         
-        prompt = f"""
-Analisa este incentivo português e extrai as datas em falta.
-
-INFORMAÇÃO:
+        prompt = f"""INFORMAÇÃO:
 Título: {incentive.title}
 Descrição: {incentive.description}
-Dados: {json.dumps(csv_data.get('all_data', {}), ensure_ascii=False)}
-
-DATAS EM FALTA: {', '.join(missing_fields)}
-
-Responde em JSON com formato ISO (YYYY-MM-DD):
-{{
-  "publication_date": "2025-01-15",
-  "start_date": "2025-02-01",
-  "end_date": "2025-12-31"
-}}
-
-Se não conseguires determinar uma data, usa null.
-Responde APENAS com JSON, sem texto adicional.
+Dados: {all_data_json}
 
-JSON:
-"""
+DATAS EM FALTA: {', '.join(missing_fields)}"""
         
         try:
-            response = self.client.chat.completions.create(
+            response = self._chat_completion(
                 model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
+                messages=[
+                    {"role": "system", "content": SYSTEM_DATES_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
                 temperature=0.1,
-                max_tokens=300
+                max_tokens=300,
+                response_format={"type": "json_object"}
             )
             
-            content = response.choices[0].message.content.strip()
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.startswith("```"):
-                content = content[3:]
-            if content.endswith("```"):
-                content = content[:-3]
-            content = content.strip()
-            
-            dates_json = json.loads(content)
+            dates_json = json.loads(response.choices[0].message.content)
             
             # Track API call cost
             usage_data = {
@@ -344,14 +571,24 @@ JSON:
             
             return {}
     
-    def extract_missing_budget(self, incentive: Incentive, raw_csv_data: Dict) -> Optional[float]:
+    def extract_missing_budget(
+        self, incentive: Incentive, raw_csv_data: Dict, all_data_json: Optional[str] = None
+    ) -> Optional[float]:
         """
         Extract missing budget from description or all_data.
         """
         csv_data = raw_csv_data or {}
-        all_data = csv_data.get('all_data', {})
         
         # First try to extract from all_data (deterministic)
+        budget = self._budget_from_all_data(csv_data.get('all_data', {})) or budget_from_text(incentive.description)
+        if budget:
+            return budget
+        
+        # If not found, try AI extraction
+        return self._extract_budget_with_ai(incentive, csv_data, all_data_json)
+    
+    def _budget_from_all_data(self, all_data: Dict) -> Optional[float]:
+        """Sum of dotacao in the estrutura field of all_data (no AI)"""
         # Check for dotacao in estrutura
         if 'estrutura' in all_data and isinstance(all_data['estrutura'], list):
             total_dotacao = 0
@@ -364,52 +601,33 @@ JSON:
             if total_dotacao > 0:
                 return total_dotacao
         
-        # If not found, try AI extraction
-        return self._extract_budget_with_ai(incentive)
+        return None
     
-    def _extract_budget_with_ai(self, incentive: Incentive) -> Optional[float]:
-        """Use AI to extract budget from text"""
-        csv_data = incentive.incentive_metadata.raw_csv_data if incentive.incentive_metadata else {}
+    def _extract_budget_with_ai(
+        self, incentive: Incentive, csv_data: Dict, all_data_json: Optional[str] = None
+    ) -> Optional[float]:
+        """Use AI to extract budget from text (csv_data: the caller's raw_csv_data, no lazy load of incentive_metadata)"""
+        if all_data_json is None:
+            all_data_json = all_data_prompt(csv_data.get('all_data'))
         
-        prompt = f"""
-Analisa este incentivo português e extrai o orçamento total disponível.
-
-INFORMAÇÃO:
+        prompt = f"""INFORMAÇÃO:
 Título: {incentive.title}
 Descrição: {incentive.description}
-Dados: {json.dumps(csv_data.get('all_data', {}), ensure_ascii=False)}
-
-Extrai o ORÇAMENTO TOTAL (dotação total disponível) em euros.
-
-Responde em JSON:
-{{
-  "total_budget": 1000000.50
-}}
-
-Se não conseguires determinar, usa null.
-Responde APENAS com JSON, sem texto adicional.
-
-JSON:
-"""
+Dados: {all_data_json}"""
         
         try:
-            response = self.client.chat.completions.create(
+            response = self._chat_completion(
                 model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
+                messages=[
+                    {"role": "system", "content": SYSTEM_BUDGET_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
                 temperature=0.1,
-                max_tokens=200
+                max_tokens=200,
+                response_format={"type": "json_object"}
             )
             
-            content = response.choices[0].message.content.strip()
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.startswith("```"):
-                content = content[3:]
-            if content.endswith("```"):
-                content = content[:-3]
-            content = content.strip()
-            
-            budget_json = json.loads(content)
+            budget_json = json.loads(response.choices[0].message.content)
             
             # Track API call cost
             usage_data = {
@@ -448,21 +666,25 @@ JSON:
             return None
     
     def _parse_datetime(self, date_str: str) -> Optional[datetime]:
-        """Parse datetime string with various formats"""
+        """
+        Parse datetime string with various formats.
+        
+        Always timezone-aware UTC (as_utc): offsets/"Z" are converted, naive values taken as UTC.
+        """
         if not date_str or date_str == '':
             return None
         
-        # Common datetime formats
-        formats = [
-            "%Y-%m-%dT%H:%M:%S",
-            "%Y-%m-%d %H:%M:%S",
-            "%Y-%m-%d",
-            "%d/%m/%Y",
-        ]
+        date_str = str(date_str).strip()
         
-        for fmt in formats:
+        # ISO 8601 (quase todos os valores do all_data e do modelo): parser em C, sem exceções por formato
+        try:
+            return as_utc(datetime.fromisoformat(date_str))
+        except ValueError:
+            pass
+        
+        for fmt in NON_ISO_DATETIME_FORMATS:
             try:
-                return datetime.strptime(str(date_str).split('+')[0].split('.')[0], fmt)
+                return as_utc(datetime.strptime(date_str, fmt))
             except ValueError:
                 continue
         
@@ -499,12 +721,14 @@ JSON:
             session.commit()
             
             fields_completed = []
-            raw_csv_data = metadata.raw_csv_data
+            raw_csv_data = metadata.raw_csv_data or {}
+            # Serializado uma vez para as até 3 chamadas AI deste incentivo
+            all_data_json = all_data_prompt(raw_csv_data.get('all_data'))
             
             # 1. Generate or convert ai_description
             if not incentive.ai_description:
                 logger.info(f"Generating AI description for {incentive_id}")
-                ai_desc = self.generate_ai_description(incentive, raw_csv_data)
+                ai_desc = self.generate_ai_description(incentive, raw_csv_data, all_data_json)
                 if ai_desc:
                     incentive.ai_description = ai_desc
                     fields_completed.append('ai_description')
@@ -512,7 +736,7 @@ JSON:
             # 2. Fill missing dates
             if not incentive.publication_date or not incentive.start_date or not incentive.end_date:
                 logger.info(f"Extracting missing dates for {incentive_id}")
-                dates = self.extract_missing_dates(incentive, raw_csv_data)
+                dates = self.extract_missing_dates(incentive, raw_csv_data, all_data_json)
                 
                 if 'publication_date' in dates and dates['publication_date']:
                     incentive.publication_date = dates['publication_date']
@@ -527,17 +751,17 @@ JSON:
             # 3. Fill missing budget
             if not incentive.total_budget:
                 logger.info(f"Extracting budget for {incentive_id}")
-                budget = self.extract_missing_budget(incentive, raw_csv_data)
+                budget = self.extract_missing_budget(incentive, raw_csv_data, all_data_json)
                 if budget:
                     incentive.total_budget = budget
                     fields_completed.append('total_budget')
             
             # Update metadata
             metadata.ai_processing_status = "completed"
-            metadata.ai_processing_date = datetime.utcnow()
+            metadata.ai_processing_date = datetime.now(timezone.utc)
             metadata.fields_completed_by_ai = fields_completed if fields_completed else []
             metadata.ai_processing_error = None
-            metadata.updated_at = datetime.utcnow()
+            metadata.updated_at = datetime.now(timezone.utc)
             
             session.commit()
             logger.info(f"Successfully processed incentive {incentive_id}. Completed fields: {fields_completed}")
@@ -557,6 +781,352 @@ JSON:
             
             return False
     
+    def process_incentive_group(self, session: Session, incentive_ids: List[str]) -> Dict[str, bool]:
+        """
+        Complete AI processing for a GROUP of incentives in a SINGLE OpenAI request.
+        
+        Same result as process_incentive_complete() for each incentive, but the AI fields
+        (ai_description, missing dates, missing budget) of all incentives are requested in one
+        numbered prompt, so the group consumes 1 request of the RPM quota instead of up to 3 per
+        incentive. Deterministic values (calendario / estrutura in all_data) are still used first.
+        
+        If the group call fails or returns an unusable answer, falls back to
+        process_incentive_complete() for each incentive.
+        
+        Returns:
+            Dict incentive_id -> success
+        """
+        rows = session.query(Incentive, IncentiveMetadata).join(
+            IncentiveMetadata, IncentiveMetadata.incentive_id == Incentive.incentive_id
+        ).filter(Incentive.incentive_id.in_(incentive_ids)).all()
+        
+        results = {str(incentive_id): False for incentive_id in incentive_ids}
+        for incentive_id in set(results) - {str(incentive.incentive_id) for incentive, _ in rows}:
+            logger.error(f"Incentive {incentive_id} (or its metadata) not found")
+        if not rows:
+            return results
+        
+        # Mark as processing
+        for _, metadata in rows:
+            metadata.ai_processing_status = "processing"
+        session.commit()
+        
+        # Deterministic values first, then what is still missing goes to the prompt
+        pending, entries = self._prepare_group(rows)
+        
+        ai_results = {}
+        if entries:
+            try:
+                response = self._chat_completion(**self._group_request(entries))
+                
+                self._track_group_call(
+                    "process_incentive_group",
+                    [incentive for incentive, _, _, _, ask in pending if ask],
+                    {
+                        "prompt_tokens": response.usage.prompt_tokens,
+                        "completion_tokens": response.usage.completion_tokens
+                    }
+                )
+                
+                ai_results = self._parse_group_answer(response.choices[0].message.content, len(entries))
+                
+            except Exception as e:
+                logger.error(f"Error processing incentive group of {len(rows)}, falling back to single mode: {e}")
+                
+                self._track_group_call(
+                    "process_incentive_group",
+                    [incentive for incentive, _, _, _, ask in pending if ask],
+                    {"prompt_tokens": 0, "completion_tokens": 0},
+                    success=False,
+                    error_message=str(e)
+                )
+                
+                for incentive, _, _, _, _ in pending:
+                    incentive_id = str(incentive.incentive_id)
+                    results[incentive_id] = self.process_incentive_complete(session, incentive_id)
+                return results
+        
+        return self._apply_group_results(session, pending, ai_results, results)
+    
+    def _prepare_group(self, rows: List[tuple]) -> tuple:
+        """
+        Fill what can be read from all_data and list what still needs AI for each (incentive, metadata).
+        
+        Returns:
+            (pending, entries): pending = [(incentive, metadata, dates, budget, ask)] in row order,
+            entries = numbered prompt blocks for the rows whose `ask` is not empty
+        """
+        pending = []
+        entries = []
+        for incentive, metadata in rows:
+            csv_data = metadata.raw_csv_data or {}
+            all_data = csv_data.get('all_data', {})
+            dates = {}
+            if not (incentive.publication_date and incentive.start_date and incentive.end_date):
+                dates = self._dates_from_all_data(all_data)
+                dates.update(self._dates_from_text(incentive, dates))
+            budget = None
+            if not incentive.total_budget:
+                budget = self._budget_from_all_data(all_data) or budget_from_text(incentive.description)
+            
+            ask = []
+            if not incentive.ai_description:
+                ask.append('ai_description')
+            ask.extend(self._missing_date_fields(incentive, dates))
+            if not incentive.total_budget and not budget:
+                ask.append('total_budget')
+            
+            pending.append((incentive, metadata, dates, budget, ask))
+            if ask:
+                entries.append(f"""
+[{len(entries) + 1}] ({', '.join(ask)})
+Título: {incentive.title}
+Descrição: {incentive.description}
+Programa: {csv_data.get('incentive_program', 'Desconhecido')}
+Descrição existente: {csv_data.get('ai_description', '')}
+Orçamento Total: €{incentive.total_budget if incentive.total_budget else 'Não especificado'}
+Dados: {all_data_prompt(all_data)}""")
+        
+        return pending, entries
+    
+    def _track_group_call(
+        self,
+        operation_type: str,
+        incentives: List[Incentive],
+        usage_data: Dict[str, int],
+        success: bool = True,
+        error_message: Optional[str] = None,
+        batch_api: bool = False
+    ) -> None:
+        """
+        Cost rows for a grouped request: one per incentive in the prompt, each with its share of
+        the usage (even split, remainders on the first ones), so per-incentive breakdowns include
+        grouped calls and the tokens/cost still add up to the request's usage.
+        """
+        shares = {
+            key: divmod(usage_data.get(key, 0), len(incentives))
+            for key in ("prompt_tokens", "completion_tokens")
+        }
+        for position, incentive in enumerate(incentives):
+            usage = {key: share + (position < remainder) for key, (share, remainder) in shares.items()}
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            self.cost_tracker.track_api_call(
+                operation_type=operation_type,
+                model_name="gpt-4o-mini",
+                usage_data=usage,
+                incentive_id=str(incentive.incentive_id),
+                cache_hit=False,
+                success=success,
+                error_message=error_message,
+                batch_api=batch_api
+            )
+    
+    def _group_request(self, entries: List[str]) -> Dict[str, Any]:
+        """chat.completions arguments for a numbered group prompt (JSON mode)"""
+        prompt = f"""INCENTIVOS:
+{"".join(entries)}
+
+Responde com EXATAMENTE {len(entries)} entradas em "results"."""
+        return {
+            "model": "gpt-4o-mini",
+            "messages": [
+                {"role": "system", "content": SYSTEM_GROUP_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.1,
+            "max_tokens": min(1500 * len(entries), 16000),
+            "response_format": {"type": "json_object"}
+        }
+    
+    def _parse_group_answer(self, content: str, expected: int) -> Dict[int, Dict]:
+        """{"results": [...]} answer -> position (1-based, prompt order) -> fields"""
+        answer = json.loads(content)["results"]
+        if len(answer) != expected:
+            raise ValueError(f"Expected {expected} results, got {len(answer)}")
+        return {position: item or {} for position, item in enumerate(answer, 1)}
+    
+    def _apply_group_results(
+        self,
+        session: Session,
+        pending: List[tuple],
+        ai_results: Dict[int, Dict],
+        results: Dict[str, bool]
+    ) -> Dict[str, bool]:
+        """Write deterministic + AI values of a prepared group, mark it completed and commit"""
+        # Apply results
+        position = 0
+        for incentive, metadata, dates, budget, ask in pending:
+            incentive_id = str(incentive.incentive_id)
+            fields_completed = []
+            
+            ai_result = {}
+            if ask:
+                position += 1
+                ai_result = ai_results.get(position, {})
+            
+            if 'ai_description' in ask and isinstance(ai_result.get('ai_description'), dict):
+                incentive.ai_description = ai_result['ai_description']
+                fields_completed.append('ai_description')
+            
+            for field in ('publication_date', 'start_date', 'end_date'):
+                value = dates.get(field)
+                if field in ask and ai_result.get(field):
+                    value = self._parse_datetime(ai_result[field])
+                if value:
+                    setattr(incentive, field, value)
+                    fields_completed.append(field)
+            
+            if 'total_budget' in ask and ai_result.get('total_budget'):
+                try:
+                    budget = float(ai_result['total_budget'])
+                except (ValueError, TypeError):
+                    budget = None
+            if budget:
+                incentive.total_budget = budget
+                fields_completed.append('total_budget')
+            
+            # Update metadata
+            metadata.ai_processing_status = "completed"
+            metadata.ai_processing_date = datetime.now(timezone.utc)
+            metadata.fields_completed_by_ai = fields_completed
+            metadata.ai_processing_error = None
+            metadata.updated_at = datetime.now(timezone.utc)
+            
+            results[incentive_id] = True
+            logger.info(f"Successfully processed incentive {incentive_id} (group). Completed fields: {fields_completed}")
+        
+        try:
+            session.commit()
+        except Exception as e:
+            logger.error(f"Error saving incentive group: {e}")
+            session.rollback()
+            return {incentive_id: False for incentive_id in results}
+        
+        return results
+    
+    def submit_batch(self, session: Session, incentive_ids: List[str], group_size: int = 8) -> Optional[str]:
+        """
+        Submit AI processing of many incentives to the OpenAI Batch API (half price, 24h window).
+        
+        Incentives are grouped exactly like process_incentive_group() (one request per group,
+        custom_id = group); groups that need no AI are completed right away. Submitted incentives
+        get status "submitted" plus ai_batch_id / ai_batch_custom_id, and collect_batch() applies
+        the answers once the batch is done.
+        
+        Returns:
+            OpenAI batch id, or None if nothing had to be sent
+        """
+        # Ordem determinística: collect_batch volta a montar os grupos pela mesma ordem
+        rows = session.query(Incentive, IncentiveMetadata).join(
+            IncentiveMetadata, IncentiveMetadata.incentive_id == Incentive.incentive_id
+        ).filter(Incentive.incentive_id.in_(incentive_ids)).order_by(Incentive.incentive_id).all()
+        
+        lines = []
+        submitted = []
+        for start in range(0, len(rows), group_size):
+            group = rows[start:start + group_size]
+            pending, entries = self._prepare_group(group)
+            if not entries:
+                self._apply_group_results(session, pending, {}, {})
+                continue
+            
+            custom_id = f"group-{start // group_size}"
+            lines.append(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._group_request(entries)
+            }, ensure_ascii=False))
+            submitted.append((custom_id, group))
+        
+        if not lines:
+            return None
+        
+        input_file = self.client.files.create(
+            file=("incentives_batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        
+        for custom_id, group in submitted:
+            for _, metadata in group:
+                metadata.ai_processing_status = "submitted"
+                metadata.ai_batch_id = batch.id
+                metadata.ai_batch_custom_id = custom_id
+                metadata.ai_processing_error = None
+        session.commit()
+        
+        logger.info(f"Submitted OpenAI batch {batch.id}: {len(lines)} requests, {sum(len(g) for _, g in submitted)} incentives")
+        return batch.id
+    
+    def collect_batch(self, session: Session, batch_id: str) -> Optional[Dict[str, bool]]:
+        """
+        Apply the results of a batch submitted with submit_batch().
+        
+        Returns:
+            None while the batch is still running; otherwise Dict incentive_id -> success
+            (groups without a usable answer are marked "failed" so reprocess-failed picks them up)
+        """
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status not in ("completed", "failed", "expired", "cancelled"):
+            return None
+        
+        # custom_id -> linha do ficheiro de output/erros
+        answers = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                for line in self.client.files.content(file_id).text.splitlines():
+                    if line.strip():
+                        item = json.loads(line)
+                        answers[item["custom_id"]] = item
+        
+        rows = session.query(Incentive, IncentiveMetadata).join(
+            IncentiveMetadata, IncentiveMetadata.incentive_id == Incentive.incentive_id
+        ).filter(
+            IncentiveMetadata.ai_batch_id == batch_id,
+            IncentiveMetadata.ai_processing_status == "submitted"
+        ).order_by(IncentiveMetadata.ai_batch_custom_id, Incentive.incentive_id).all()
+        
+        results = {}
+        for custom_id, group in itertools.groupby(rows, key=lambda row: row[1].ai_batch_custom_id):
+            group = list(group)
+            group_results = {str(incentive.incentive_id): False for incentive, _ in group}
+            item = answers.get(custom_id) or {}
+            
+            try:
+                response = item.get("response") or {}
+                if response.get("status_code") != 200:
+                    raise ValueError(item.get("error") or f"no answer (batch {batch.status})")
+                
+                body = response["body"]
+                pending, entries = self._prepare_group(group)
+                self._track_group_call(
+                    "process_incentive_group_batch",
+                    [incentive for incentive, _, _, _, ask in pending if ask] or [incentive for incentive, _ in group],
+                    body["usage"],
+                    batch_api=True
+                )
+                
+                ai_results = self._parse_group_answer(body["choices"][0]["message"]["content"], len(entries))
+                results.update(self._apply_group_results(session, pending, ai_results, group_results))
+                
+            except Exception as e:
+                logger.error(f"Batch {batch_id} request {custom_id} failed: {e}")
+                session.rollback()
+                for _, metadata in group:
+                    metadata.ai_processing_status = "failed"
+                    metadata.ai_processing_error = f"Batch {batch_id}: {e}"
+                session.commit()
+                results.update(group_results)
+        
+        logger.info(f"Collected OpenAI batch {batch_id} ({batch.status}): "
+                    f"{sum(results.values())} success, {len(results) - sum(results.values())} failed")
+        return results
+    
     def analyze_company_match(self, incentive: Incentive, company: Company, raw_csv_data: Dict) -> Dict[str, Any]:
         """
         Analyze how well a company matches an incentive (SINGLE mode).
@@ -567,6 +1137,36 @@ JSON:
         results = self.analyze_batch_match(incentive, [company], raw_csv_data)
         return results[0] if results else {"match_score": 0.0, "reasons": []}
     
+    def _deterministic_match(self, ai_desc: Dict, company: Company) -> Dict[str, Any]:
+        """
+        Eligibility checks that need no LLM (set membership against the incentive's ai_description).
+        
+        Returns:
+            cae_overlap: company CAE codes in eligible_cae_codes (sorted), None when the incentive
+            lists no eligible CAE codes;
+            size_match / region_match: True/False, None when the incentive does not restrict it
+        """
+        eligible_caes = {str(code) for code in ai_desc.get('eligible_cae_codes') or []}
+        eligible_sizes = {str(size).lower() for size in ai_desc.get('company_sizes') or []}
+        eligible_regions = {str(region).lower() for region in ai_desc.get('eligible_regions') or []}
+        
+        cae_overlap = size_match = region_match = None
+        if eligible_caes:
+            cae_overlap = sorted(eligible_caes & {str(code) for code in company.cae_primary_code or []})
+        if eligible_sizes:
+            size_match = (company.company_size or '').lower() in eligible_sizes
+        if eligible_regions:
+            region_match = (
+                any("todo o país" in region for region in eligible_regions)
+                or (company.region or '').lower() in eligible_regions
+            )
+        
+        return {
+            "cae_overlap": cae_overlap,
+            "size_match": size_match,
+            "region_match": region_match
+        }
+    
     def analyze_batch_match(
         self, 
         incentive: Incentive, 
@@ -581,8 +1181,8 @@ JSON:
         so the LLM has real CHOICE power (not just validation).
         
         Example: Pass 10 companies, LLM selects top 5.
-        
-       
+        With more than 2x select_top_n companies, only the 2x select_top_n meeting most of the
+        deterministic checks (_deterministic_match) go into the prompt.
         
         Args:
             incentive: Incentivo a avaliar
@@ -599,6 +1199,16 @@ JSON:
         csv_data = raw_csv_data or {}
         ai_desc = incentive.ai_description or {}
         
+        # Elegibilidade verificada em Python (CAE/tamanho/região): o LLM recebe os factos em vez de
+        # os verificar, e só as 2x select_top_n candidatas com mais critérios cumpridos
+        # (sort estável: em empate mantém a ordem do caller, já ordenada pelo UnifiedScorer)
+        checks = {company.company_id: self._deterministic_match(ai_desc, company) for company in companies}
+        if select_top_n and len(companies) > 2 * select_top_n:
+            companies = sorted(companies, key=lambda c: (
+                bool(checks[c.company_id]["cae_overlap"]),
+                (checks[c.company_id]["size_match"] is not False) + (checks[c.company_id]["region_match"] is not False)
+            ), reverse=True)[:2 * select_top_n]
+        
         # Build OPTIMIZED prompt with CRITICAL info only
         title = incentive.title[:200]
         summary = ai_desc.get('summary', incentive.description[:300])
@@ -614,17 +1224,23 @@ JSON:
         
         # Companies info (compact)
         companies_info = []
+        check_label = {True: "sim", False: "não", None: "sem restrição"}
         for i, comp in enumerate(companies, 1):
             comp_desc = (comp.trade_description_native or '')[:150]
-            cae_codes = comp.cae_primary_code or []
-            cae_codes_str = ', '.join(cae_codes) if cae_codes else 'N/A'
+            comp_cae_codes = comp.cae_primary_code or []
+            cae_codes_str = ', '.join(comp_cae_codes) if comp_cae_codes else 'N/A'
+            check = checks[comp.company_id]
+            cae_check = ', '.join(check["cae_overlap"]) if check["cae_overlap"] else check_label[
+                None if check["cae_overlap"] is None else False
+            ]
             companies_info.append(f"""
 {i}. {comp.company_name}
    CAE Label: {comp.cae_primary_label}
    CAE Codes: {cae_codes_str}
    Tamanho: {comp.company_size or 'N/A'}
    Região: {comp.region or 'N/A'}
-   Atividade: {comp_desc}""")
+   Atividade: {comp_desc}
+   Verificado: CAE elegível: {cae_check} | Tamanho elegível: {check_label[check["size_match"]]} | Região elegível: {check_label[check["region_match"]]}""")
         
         companies_text = "\n".join(companies_info)
         
@@ -649,67 +1265,34 @@ EMPRESAS CANDIDATAS:
 {companies_text}
 
 TAREFA: Avalia TODAS as {len(companies)} empresas e responde JSON com as {n_to_select} MELHORES (SEMPRE {n_to_select}, mesmo que sejam matches fracos):
-[
+{{"matches": [
   {{"company": "{companies[0].company_name}", "score": 0.95, "reasons": ["razão1", "razão2"]}},
   {{"company": "{companies[1].company_name if len(companies) > 1 else '...'}", "score": 0.88, "reasons": ["razão1", "razão2"]}},
   ... (SEMPRE {n_to_select} empresas no total)
-]
+]}}
 
 CRITÉRIOS DE AVALIAÇÃO:
-- CAE Code Match: Empresa tem CAE code que está EXATAMENTE na lista de elegíveis? (PESO ALTO)
-  Lista elegível: {cae_codes}
-  Só conta se o CAE code da empresa estiver EXATAMENTE nesta lista!
+- CAE Code Match: usa a linha "Verificado" (já comparada com a lista elegível) (PESO ALTO)
 - Setor Match: Atividade da empresa alinha com setores elegíveis? (PESO ALTO)  
-- Tamanho Match: Tamanho da empresa está na lista de elegíveis? (PESO MÉDIO)
-- Região Match: Região da empresa está na lista de elegíveis? (PESO MÉDIO)
+- Tamanho Match / Região Match: usa a linha "Verificado" (PESO MÉDIO)
 - Atividade Relevante: Descrição da atividade faz sentido para o incentivo? (PESO MÉDIO)
 
 IMPORTANTE: 
 1. SEMPRE retorna as {n_to_select} melhores empresas, mesmo que tenham scores baixos
-2. VERIFICA EXATAMENTE se o CAE code da empresa está na lista elegível antes de dizer que é elegível
-3. Se não estiver na lista, diz "CAE code não elegível" e dá score mais baixo
-4. NÃO inventes CAE codes elegíveis que não existem!
+2. A linha "Verificado" é a verdade sobre CAE, tamanho e região: não a contradigas
+3. Se "CAE elegível: não", diz "CAE code não elegível" e dá score mais baixo
 """
         
         try:
-            response = self.client.chat.completions.create(
+            response = self._chat_completion(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.1,
-                max_tokens=2000  # Increased for large batches
+                max_tokens=2000,  # Increased for large batches
+                response_format={"type": "json_object"}
             )
             
-            content = response.choices[0].message.content.strip()
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.startswith("```"):
-                content = content[3:]
-            if content.endswith("```"):
-                content = content[:-3]
-            content = content.strip()
-            
-            # Find the first complete JSON array/object
-            # Handle cases where LLM adds extra text after JSON
-            json_start = content.find('[')
-            if json_start == -1:
-                json_start = content.find('{')
-            
-            if json_start != -1:
-                # Find the matching closing bracket/brace
-                bracket_count = 0
-                json_end = json_start
-                for i, char in enumerate(content[json_start:], json_start):
-                    if char in '[{':
-                        bracket_count += 1
-                    elif char in ']}':
-                        bracket_count -= 1
-                        if bracket_count == 0:
-                            json_end = i + 1
-                            break
-                
-                content = content[json_start:json_end]
-            
-            results_json = json.loads(content)
+            results_json = json.loads(response.choices[0].message.content).get("matches", [])
             
             # Parse results: LLM retorna apenas as top N selecionadas
             # Precisamos mapear de volta para todas as companies originais
@@ -740,17 +1323,14 @@ IMPORTANTE:
                         corrected_reasons = []
                         corrected_score = score
                         
-                        # Verificar CAE codes elegíveis
-                        eligible_cae_codes = ai_desc.get('eligible_cae_codes', [])
+                        # CAE codes elegíveis (verificação determinística feita antes do prompt)
                         company_cae_codes = matched_company.cae_primary_code or []
+                        cae_overlap = checks[matched_company.company_id]["cae_overlap"]
                         
-                        # Verificar se algum CAE code da empresa está realmente elegível
-                        is_cae_eligible = any(str(code) in eligible_cae_codes for code in company_cae_codes)
-                        
-                        # Corrigir razões se o LLM mentiu sobre CAE codes
+                        # Corrigir razões se o LLM mentiu sobre CAE codes (sem lista elegível não há o que corrigir)
                         for reason in reasons:
                             if 'CAE code' in reason and 'elegível' in reason.lower():
-                                if not is_cae_eligible:
+                                if cae_overlap == []:
                                     # LLM mentiu - corrigir
                                     corrected_reasons.append(f"CAE code {company_cae_codes} NÃO é elegível")
                                     corrected_score = max(0.1, corrected_score - 0.3)  # Penalizar mentira
@@ -834,7 +1414,7 @@ Usa linguagem clara e adequada para negócios.
 """
         
         try:
-            response = self.client.chat.completions.create(
+            response = self._chat_completion(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.3,
@@ -861,15 +1441,14 @@ Usa linguagem clara e adequada para negócios.
             Dict com cae_codes, region, size
         """
         # Cache key baseado no nome da empresa
-        cache_key = f"company_inference_{company.company_name}"
+        cache_key = PromptCache.make_key("gpt-4o-mini", f"company_inference_{company.company_name}")
+        cached = self._prompt_cache.get(cache_key)
         
-        if cache_key in self._prompt_cache:
-            self._cache_hits += 1
-            logger.info(f"🔍 Cache HIT for '{company.company_name}' (cache size: {len(self._prompt_cache)})")
-            return self._prompt_cache[cache_key]
+        if cached is not None:
+            logger.info(f"🔍 Cache HIT for '{company.company_name}'")
+            return cached
         
-        self._cache_misses += 1
-        logger.info(f"🔍 Cache MISS for '{company.company_name}' - calling OpenAI API (hits: {self._cache_hits}, misses: {self._cache_misses})")
+        logger.info(f"🔍 Cache MISS for '{company.company_name}' - calling OpenAI API")
         
         prompt = f"""
 Analisa esta empresa portuguesa e retorna APENAS um JSON válido:
@@ -895,7 +1474,7 @@ REGRAS:
 """
         
         try:
-            response = self.client.chat.completions.create(
+            response = self._chat_completion(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.2,
@@ -926,8 +1505,8 @@ REGRAS:
                     result['size'] = 'N/A'
                 
                 # Cache do resultado
-                self._prompt_cache[cache_key] = result
-                logger.info(f"✅ Cached result for '{company.company_name}' (cache size: {len(self._prompt_cache)})")
+                self._prompt_cache.set(cache_key, result)
+                logger.info(f"✅ Cached result for '{company.company_name}'")
                 
                 return result
                 
@@ -954,38 +1533,37 @@ REGRAS:
         Returns:
             Dict with cache statistics including hits, misses, hit rate, and size
         """
-        total_requests = self._cache_hits + self._cache_misses
-        hit_rate = (self._cache_hits / total_requests * 100) if total_requests > 0 else 0
+        stats = self._prompt_cache.stats()
+        total_requests = stats["hits"] + stats["misses"]
+        hit_rate = (stats["hits"] / total_requests * 100) if total_requests > 0 else 0
         
         # Calculate estimated savings
         # Each cache hit saves ~$0.00045 (cost of ai_description generation)
-        estimated_savings = self._cache_hits * 0.00045
+        estimated_savings = stats["hits"] * 0.00045
         
         return {
-            "cache_hits": self._cache_hits,
-            "cache_misses": self._cache_misses,
+            "cache_hits": stats["hits"],
+            "cache_misses": stats["misses"],
             "total_requests": total_requests,
             "hit_rate_percentage": round(hit_rate, 2),
-            "cache_size": len(self._prompt_cache),
+            "cache_size": self._prompt_cache.size(),
             "estimated_savings_usd": round(estimated_savings, 4)
         }
     
     def clear_cache(self) -> int:
         """
-        Clear the memory cache.
+        Clear the prompt cache.
         
         Returns:
             Number of entries cleared
         """
-        size = len(self._prompt_cache)
-        self._prompt_cache.clear()
+        size = self._prompt_cache.clear()
         logger.info(f"🗑️ Cleared {size} entries from cache")
         return size
     
     def reset_stats(self):
         """Reset cache statistics counters"""
-        self._cache_hits = 0
-        self._cache_misses = 0
+        self._prompt_cache.reset_stats()
         logger.info("📊 Cache statistics reset")
     
     def process_incentive_structured_data(self, session: Session, incentive_id: str) -> bool:
@@ -1074,17 +1652,16 @@ REGRAS:
         """
         try:
             # Verificar cache primeiro
-            prompt_hash = hashlib.md5(prompt.encode()).hexdigest()
-            if prompt_hash in self._prompt_cache:
-                self._cache_hits += 1
+            prompt_hash = PromptCache.make_key("gpt-4o-mini", prompt, temperature=0.7, max_tokens=max_tokens)
+            cached = self._prompt_cache.get(prompt_hash)
+            if cached is not None:
                 logger.info(f"Cache HIT for text response (hash: {prompt_hash[:8]}...)")
-                return self._prompt_cache[prompt_hash]
+                return cached
             
-            self._cache_misses += 1
             logger.info(f"Cache MISS for text response (hash: {prompt_hash[:8]}...)")
             
             # Chamar API OpenAI
-            response = self.client.chat.completions.create(
+            response = self._chat_completion(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": "Você é um assistente especializado em incentivos públicos portugueses. Responda de forma útil, amigável e precisa."},
@@ -1098,7 +1675,7 @@ REGRAS:
             response_text = response.choices[0].message.content.strip()
             
             # Guardar no cache
-            self._prompt_cache[prompt_hash] = response_text
+            self._prompt_cache.set(prompt_hash, response_text)
             
             # Tracking de custos
             input_tokens = response.usage.prompt_tokens
@@ -1147,4 +1724,47 @@ REGRAS:
                     error_message=str(e)
                 )
             
-            return "Desculpe, não consegui gerar uma resposta. Pode reformular a pergunta?"
\ No newline at end of file
+            return "Desculpe, não consegui gerar uma resposta. Pode reformular a pergunta?"
+
+
+def _get_shared_state(api_key: str) -> Dict[str, Any]:
+    with _shared_state_lock:
+        state = _shared_state.get(api_key)
+        if state is None:
+            state = {
+                "client": openai.OpenAI(api_key=api_key, max_retries=0),
+                "rate_limiter": TokenBucket.from_env(),
+                "prompt_cache": PromptCache.from_env()
+            }
+            _shared_state[api_key] = state
+        return state
+
+
+def get_ai_processor(session: Session, api_key: Optional[str] = None) -> AIProcessor:
+    """
+    AIProcessor bound to `session`, built on the process-wide client/rate limiter/prompt cache.
+    
+    The shared state is created lazily on first use for each API key (OPENAI_API_KEY by
+    default) and kept for the life of the process, so warm caches and the HTTP connection
+    pool survive across requests and tasks.
+    """
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OpenAI API key not configured")
+    
+    state = _get_shared_state(api_key)
+    return AIProcessor(
+        api_key,
+        session,
+        client=state["client"],
+        rate_limiter=state["rate_limiter"],
+        prompt_cache=state["prompt_cache"]
+    )
+
+
+def close_ai_processors() -> None:
+    """Close the shared OpenAI clients (app shutdown)"""
+    with _shared_state_lock:
+        for state in _shared_state.values():
+            state["client"].close()
+        _shared_state.clear()
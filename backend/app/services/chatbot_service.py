@@ -12,15 +12,44 @@ import logging
 import json
 import re
 from typing import List, Dict, Any, Optional, Tuple
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, raiseload
 from sqlalchemy import or_, and_, func
-from app.db.models import Incentive, Company, IncentiveCompanyMatch, IncentiveMetadata
+from app.db.models import Incentive, Company, IncentiveCompanyMatch, IncentiveMetadata, AnalyticsSummary, AnalyticsSummaryDelta
 from app.services.ai_processor import AIProcessor
 from datetime import datetime
+from uuid import UUID
 
 logger = logging.getLogger(__name__)
 
 
+def get_analytics_totals(db: Session):
+    """
+    Totais globais (incentivos, empresas, matches, orçamento) numa única linha.
+    
+    Em PostgreSQL lê analytics_summary + os deltas ainda não somados (triggers, migrações
+    020/027); sem essa linha (ex: SQLite nos testes) calcula os agregados sobre as tabelas.
+    """
+    if db.bind.dialect.name == "postgresql":
+        def pending(column):
+            return db.query(func.coalesce(func.sum(column), 0)).scalar_subquery()
+        
+        summary = db.query(
+            (AnalyticsSummary.total_incentives + pending(AnalyticsSummaryDelta.incentives)).label('total_incentives'),
+            (AnalyticsSummary.total_companies + pending(AnalyticsSummaryDelta.companies)).label('total_companies'),
+            (AnalyticsSummary.total_matches + pending(AnalyticsSummaryDelta.matches)).label('total_matches'),
+            (AnalyticsSummary.total_budget + pending(AnalyticsSummaryDelta.budget)).label('total_budget')
+        ).filter(AnalyticsSummary.id == 1).first()
+        if summary is not None:
+            return summary
+    
+    return db.query(
+        db.query(func.count(Incentive.incentive_id)).scalar_subquery().label('total_incentives'),
+        db.query(func.count(Company.company_id)).scalar_subquery().label('total_companies'),
+        db.query(func.count(IncentiveCompanyMatch.match_id)).scalar_subquery().label('total_matches'),
+        db.query(func.sum(Incentive.total_budget)).scalar_subquery().label('total_budget')
+    ).one()
+
+
 class ChatbotContext:
     """Gestor de contexto da conversa"""
     
@@ -242,7 +271,7 @@ class ChatbotService:
                 sector_filters.append(
                     or_(
                         Incentive.description.ilike(f"%{sector}%"),
-                        Incentive.ai_description.op('->>')('sectors').ilike(f"%{sector}%")
+                        Incentive.ai_description.op('->>')('eligible_sectors').ilike(f"%{sector}%")
                     )
                 )
             query = query.filter(or_(*sector_filters))
@@ -317,12 +346,14 @@ class ChatbotService:
         # Se tem UUIDs específicos, buscar matches específicos
         if "uuids" in entities:
             logger.info(f"Busca de matches para UUID: {entities['uuids']}")
-            uuid = entities["uuids"][0]
+            uuid = UUID(entities["uuids"][0])
             
             # Verificar se é incentivo ou empresa
             incentive = self.db.query(Incentive).filter(Incentive.incentive_id == uuid).first()
             if incentive:
-                matches = self.db.query(IncentiveCompanyMatch).filter(
+                matches = self.db.query(IncentiveCompanyMatch).options(
+                    joinedload(IncentiveCompanyMatch.company), raiseload("*")
+                ).filter(
                     IncentiveCompanyMatch.incentive_id == uuid
                 ).order_by(IncentiveCompanyMatch.ranking_position).limit(5).all()
                 
@@ -342,7 +373,9 @@ class ChatbotService:
             
             company = self.db.query(Company).filter(Company.company_id == uuid).first()
             if company:
-                matches = self.db.query(IncentiveCompanyMatch).filter(
+                matches = self.db.query(IncentiveCompanyMatch).options(
+                    joinedload(IncentiveCompanyMatch.incentive), raiseload("*")
+                ).filter(
                     IncentiveCompanyMatch.company_id == uuid
                 ).order_by(IncentiveCompanyMatch.match_score.desc()).limit(5).all()
                 
@@ -408,7 +441,9 @@ class ChatbotService:
             
             if incentive:
                 logger.info(f"✅ Incentivo encontrado: {incentive.title}")
-                matches = self.db.query(IncentiveCompanyMatch).filter(
+                matches = self.db.query(IncentiveCompanyMatch).options(
+                    joinedload(IncentiveCompanyMatch.company), raiseload("*")
+                ).filter(
                     IncentiveCompanyMatch.incentive_id == incentive.incentive_id
                 ).order_by(IncentiveCompanyMatch.ranking_position).limit(5).all()
                 
@@ -457,14 +492,13 @@ class ChatbotService:
     
     async def _handle_analytics_query(self, entities: Dict, message: str) -> Dict[str, Any]:
         """Processa consultas analíticas"""
-        # Estatísticas gerais
-        total_incentives = self.db.query(func.count(Incentive.incentive_id)).scalar()
-        total_companies = self.db.query(func.count(Company.company_id)).scalar()
-        total_matches = self.db.query(func.count(IncentiveCompanyMatch.match_id)).scalar()
+        # Estatísticas gerais + orçamento total (linha de analytics_summary)
+        totals = get_analytics_totals(self.db)
         
-        # Orçamento total
-        total_budget_result = self.db.query(func.sum(Incentive.total_budget)).scalar()
-        total_budget = float(total_budget_result) if total_budget_result else 0
+        total_incentives = totals.total_incentives
+        total_companies = totals.total_companies
+        total_matches = totals.total_matches
+        total_budget = float(totals.total_budget) if totals.total_budget else 0
         
         return {
             "type": "analytics",
@@ -482,7 +516,7 @@ class ChatbotService:
         if "uuids" not in entities:
             return {"type": "error", "message": "ID não encontrado na mensagem"}
         
-        uuid = entities["uuids"][0]
+        uuid = UUID(entities["uuids"][0])
         
         # Buscar incentivo
         incentive = self.db.query(Incentive).filter(Incentive.incentive_id == uuid).first()
@@ -21,8 +21,9 @@ Vantagens:
 """
 
 import logging
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
 from app.db.models import Incentive, Company, IncentiveCompanyMatch
 from .ai_processor import AIProcessor
 from .unified_scorer import UnifiedScorer
@@ -47,7 +48,8 @@ class CompanyMatcherUnified:
         self, 
         session: Session, 
         incentive_id: str, 
-        limit: int = 5
+        limit: int = 5,
+        companies: Optional[List[Company]] = None
     ) -> List[Dict[str, Any]]:
         """
         Encontra as melhores empresas para um incentivo.
@@ -56,6 +58,7 @@ class CompanyMatcherUnified:
             session: Sessão da base de dados
             incentive_id: ID do incentivo
             limit: Número máximo de matches (padrão: 5)
+            companies: Empresas candidatas já carregadas (por omissão: todas, lidas da BD)
             
         Returns:
             Lista de matches com scores e razões
@@ -76,8 +79,8 @@ class CompanyMatcherUnified:
             logger.error(f"Incentive {incentive_id} not found")
             return []
         
-        # Get all companies
-        all_companies = session.query(Company).all()
+        # Get all companies (unless the caller already loaded them for a whole run)
+        all_companies = companies if companies is not None else session.query(Company).all()
         logger.info(f"Starting with {len(all_companies)} companies")
         
         return self._find_matches_unified(incentive, all_companies, limit)
@@ -229,19 +232,36 @@ class CompanyMatcherUnified:
                 IncentiveCompanyMatch.incentive_id == incentive_id
             ).delete()
             
-            # Save new matches
-            for match in matches:
-                db_match = IncentiveCompanyMatch(
-                    incentive_id=incentive_id,
-                    company_id=match['company_id'],
-                    match_score=match.get('llm_score', 0),
-                    match_reasons=match.get('llm_reasons', []),
-                    ranking_position=match.get('ranking_position', 0)
+            # Uma linha por empresa (a melhor posição, se o LLM a repetiu) e posições 1..n
+            # sem buracos: não sobra nada para uq_matches_incentive_company / _rank rejeitarem
+            unique_matches = {}
+            for match in sorted(matches, key=lambda m: m.get('ranking_position', 0)):
+                unique_matches.setdefault(str(match['company_id']), match)
+            
+            # Save new matches: one multi-row INSERT
+            saved = 0
+            if unique_matches:
+                dialect_insert = postgresql.insert if session.bind.dialect.name == "postgresql" else sqlite.insert
+                result = session.execute(
+                    dialect_insert(IncentiveCompanyMatch)
+                    .values([
+                        {
+                            "incentive_id": incentive_id,
+                            "company_id": match['company_id'],
+                            "match_score": match.get('llm_score', 0),
+                            "match_reasons": match.get('llm_reasons', []),
+                            "ranking_position": position
+                        }
+                        for position, match in enumerate(unique_matches.values(), start=1)
+                    ])
+                    .on_conflict_do_nothing()
                 )
-                session.add(db_match)
+                saved = result.rowcount
             
             session.commit()
-            logger.info(f"✅ Saved {len(matches)} matches for incentive {incentive_id}")
+            if saved != len(matches):
+                logger.warning(f"Incentive {incentive_id}: {len(matches) - saved} duplicate matches dropped")
+            logger.info(f"✅ Saved {saved} matches for incentive {incentive_id}")
             return True
             
         except Exception as e:
@@ -257,12 +277,17 @@ class CompanyMatcherUnified:
         """Reseta estatísticas do unified scorer."""
         self.unified_scorer.reset_stats()
     
-    def process_incentive_matches(self, session: Session, incentive_id: str) -> Dict[str, Any]:
+    def process_incentive_matches(
+        self,
+        session: Session,
+        incentive_id: str,
+        companies: Optional[List[Company]] = None
+    ) -> Dict[str, Any]:
         """Process and save matches for a specific incentive"""
         logger.info(f"Processing matches for incentive {incentive_id}")
         
         # Find top matches
-        matches = self.find_top_matches(session, incentive_id)
+        matches = self.find_top_matches(session, incentive_id, companies=companies)
         
         if not matches:
             return {
@@ -285,25 +310,29 @@ class CompanyMatcherUnified:
         """Process matches for all incentives in batches"""
         logger.info("Processing matches for all incentives")
         
-        # Get all incentives
-        incentives = session.query(Incentive).all()
-        total_incentives = len(incentives)
+        # Only the ids: find_top_matches loads each incentive when it gets to it
+        incentive_ids = [str(incentive_id) for (incentive_id,) in session.query(Incentive.incentive_id)]
+        total_incentives = len(incentive_ids)
+        
+        # The candidate companies are the same for every incentive: read them once per run
+        # instead of once per incentive (commits don't expire them, expire_on_commit=False)
+        companies = session.query(Company).all()
         
         results = []
         processed = 0
         
         for i in range(0, total_incentives, batch_size):
-            batch = incentives[i:i + batch_size]
+            batch = incentive_ids[i:i + batch_size]
             
-            for incentive in batch:
+            for incentive_id in batch:
                 try:
-                    result = self.process_incentive_matches(session, str(incentive.incentive_id))
+                    result = self.process_incentive_matches(session, incentive_id, companies=companies)
                     results.append(result)
                     processed += 1
                 except Exception as e:
-                    logger.error(f"Error processing incentive {incentive.incentive_id}: {e}")
+                    logger.error(f"Error processing incentive {incentive_id}: {e}")
                     results.append({
-                        "incentive_id": str(incentive.incentive_id),
+                        "incentive_id": incentive_id,
                         "error": str(e)
                     })
         
@@ -5,13 +5,19 @@ Rastreia tokens, custos e estatísticas de uso.
 
 from typing import Dict, Optional, Any
 from datetime import datetime
-from decimal import Decimal
 import logging
 from sqlalchemy.orm import Session
 from app.db.models import AICostTracking
 
 logger = logging.getLogger(__name__)
 
+# Custos são guardados na BD como inteiros em micro-USD (milionésimos de dólar)
+MICRO_USD_PER_USD = 1_000_000
+
+
+def to_micro_usd(cost: float) -> int:
+    return int(round(cost * MICRO_USD_PER_USD))
+
 
 class CostTracker:
     """
@@ -38,6 +44,9 @@ class CostTracker:
         }
     }
     
+    # Batch API: metade do preço dos pedidos síncronos
+    BATCH_API_DISCOUNT = 0.5
+    
     def __init__(self, session: Session):
         self.session = session
         self._in_memory_stats = {
@@ -57,7 +66,8 @@ class CostTracker:
         incentive_id: Optional[str] = None,
         cache_hit: bool = False,
         success: bool = True,
-        error_message: Optional[str] = None
+        error_message: Optional[str] = None,
+        batch_api: bool = False
     ) -> Dict[str, Any]:
         """
         Registra uma chamada à API e calcula o custo.
@@ -70,6 +80,7 @@ class CostTracker:
             cache_hit: Se foi um cache hit (custo = 0)
             success: Se a chamada teve sucesso
             error_message: Mensagem de erro (se aplicável)
+            batch_api: Se veio da Batch API (custo com BATCH_API_DISCOUNT)
         
         Returns:
             Dict com estatísticas do custo
@@ -93,6 +104,9 @@ class CostTracker:
             # Calcular custo (preço por 1M tokens)
             input_cost = (input_tokens / 1_000_000) * pricing["input"]
             output_cost = (output_tokens / 1_000_000) * pricing["output"]
+            if batch_api:
+                input_cost *= self.BATCH_API_DISCOUNT
+                output_cost *= self.BATCH_API_DISCOUNT
             total_cost = input_cost + output_cost
         
         # Criar registro na BD
@@ -103,9 +117,9 @@ class CostTracker:
             input_tokens=input_tokens,
             output_tokens=output_tokens,
             total_tokens=total_tokens,
-            input_cost=Decimal(str(round(input_cost, 6))),
-            output_cost=Decimal(str(round(output_cost, 6))),
-            total_cost=Decimal(str(round(total_cost, 6))),
+            input_cost_micro_usd=to_micro_usd(input_cost),
+            output_cost_micro_usd=to_micro_usd(output_cost),
+            total_cost_micro_usd=to_micro_usd(total_cost),
             cache_hit=cache_hit,
             success=success,
             error_message=error_message
@@ -199,7 +213,7 @@ class CostTracker:
         # Query agregada
         result = self.session.query(
             func.count(AICostTracking.tracking_id).label('total_calls'),
-            func.sum(AICostTracking.total_cost).label('total_cost'),
+            func.sum(AICostTracking.total_cost_micro_usd).label('total_cost_micro_usd'),
             func.sum(AICostTracking.input_tokens).label('total_input_tokens'),
             func.sum(AICostTracking.output_tokens).label('total_output_tokens'),
             func.sum(AICostTracking.total_tokens).label('total_tokens'),
@@ -207,27 +221,27 @@ class CostTracker:
         ).first()
         
         total_calls = result.total_calls or 0
-        total_cost = float(result.total_cost or 0.0)
+        total_cost = (result.total_cost_micro_usd or 0) / MICRO_USD_PER_USD
         cache_hits = result.cache_hits or 0
         
         # Query por tipo de operação
         by_operation = self.session.query(
             AICostTracking.operation_type,
             func.count(AICostTracking.tracking_id).label('calls'),
-            func.sum(AICostTracking.total_cost).label('cost'),
+            func.sum(AICostTracking.total_cost_micro_usd).label('cost_micro_usd'),
             func.sum(AICostTracking.total_tokens).label('tokens')
         ).group_by(AICostTracking.operation_type).all()
         
-        operations_breakdown = [
-            {
+        operations_breakdown = []
+        for op in by_operation:
+            cost = (op.cost_micro_usd or 0) / MICRO_USD_PER_USD
+            operations_breakdown.append({
                 "operation": op.operation_type,
                 "calls": op.calls,
-                "cost": float(op.cost or 0.0),
+                "cost": cost,
                 "tokens": int(op.tokens or 0),
-                "avg_cost_per_call": float(op.cost or 0.0) / op.calls if op.calls > 0 else 0.0
-            }
-            for op in by_operation
-        ]
+                "avg_cost_per_call": cost / op.calls if op.calls > 0 else 0.0
+            })
         
         return {
             "all_time": {
@@ -1,15 +1,36 @@
 import pandas as pd
+import io
 import json
+import math
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Dict, Any
 from sqlalchemy.orm import Session
 from app.db.database import SessionLocal
-from app.db.models import Incentive, IncentiveMetadata, Company
+from app.db.models import Incentive, IncentiveMetadata, Company, uuid7
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Colunas do companies.csv carregadas via COPY
+COMPANY_CSV_COLUMNS = ['company_name', 'cae_primary_label', 'trade_description_native', 'website']
+# Linhas do CSV lidas/enviadas por cada COPY
+COPY_CHUNK_SIZE = 50000
+# Linhas do CSV por bulk insert (ORM) - um commit por chunk
+INSERT_CHUNK_SIZE = 10000
+
+
+def copy_text_value(value) -> str:
+    """One field of COPY's text format: \\N for NULL, backslash/tab/newline/CR escaped"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "\\N"
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
 
 class DataImporter:
     def __init__(self):
@@ -31,7 +52,13 @@ class DataImporter:
         if pd.isna(date_str) or date_str == "":
             return None
         
-        # Try dateutil parser first (handles most formats including +00 timezone)
+        # ISO 8601 (the CSV dates, e.g. "2025-09-12 18:00:00+00"): C parser, same result as dateutil
+        try:
+            return datetime.fromisoformat(str(date_str))
+        except ValueError:
+            pass
+        
+        # Then dateutil parser (handles most other formats)
         try:
             from dateutil import parser
             return parser.parse(str(date_str))
@@ -59,27 +86,52 @@ class DataImporter:
         """Import companies from CSV file"""
         logger.info(f"Importing companies from {csv_path}")
         
-        df = pd.read_csv(csv_path)
+        # PostgreSQL: bulk load with COPY (ORM path kept for other databases, e.g. tests)
+        if self.session.get_bind().dialect.name == "postgresql":
+            return self._copy_companies(csv_path)
+        
         imported_count = 0
         
-        for _, row in df.iterrows():
-            try:
-                company = Company(
-                    company_name=row['company_name'],
-                    cae_primary_label=row.get('cae_primary_label', ''),
-                    trade_description_native=row.get('trade_description_native', ''),
-                    website=row.get('website', ''),
-                )
-                
-                self.session.add(company)
-                imported_count += 1
-                
-                if imported_count % 1000 == 0:
-                    logger.info(f"Imported {imported_count} companies...")
-                    
-            except Exception as e:
-                logger.error(f"Error importing company {row.get('company_name', 'Unknown')}: {e}")
-                continue
+        for chunk in pd.read_csv(csv_path, chunksize=INSERT_CHUNK_SIZE, usecols=lambda column: column in COMPANY_CSV_COLUMNS):
+            # Column-wise conversion (no Series per row as with iterrows); NaN -> None (NULL)
+            chunk = chunk.reindex(columns=COMPANY_CSV_COLUMNS).astype(object)
+            records = chunk.where(chunk.notna(), None).to_dict('records')
+            
+            # One multi-row INSERT per chunk instead of one unit-of-work entry per row
+            self.session.bulk_insert_mappings(Company, records)
+            self.session.commit()
+            imported_count += len(records)
+            logger.info(f"Imported {imported_count} companies...")
+        
+        logger.info(f"Successfully imported {imported_count} companies")
+        return imported_count
+    
+    def _copy_companies(self, csv_path: str) -> int:
+        """
+        Load companies with COPY ... FROM STDIN, COPY_CHUNK_SIZE rows at a time, in one transaction.
+        
+        The CSV is streamed through pandas so rows without company_name are dropped and each row
+        gets its uuid7 company_id (generated client-side, like the ORM default).
+        """
+        cursor = self.session.connection().connection.cursor()
+        imported_count = 0
+        
+        for chunk in pd.read_csv(csv_path, chunksize=COPY_CHUNK_SIZE, usecols=lambda column: column in COMPANY_CSV_COLUMNS):
+            chunk = chunk.reindex(columns=COMPANY_CSV_COLUMNS)
+            chunk = chunk[chunk['company_name'].notna() & (chunk['company_name'].astype(str).str.strip() != '')]
+            chunk.insert(0, 'company_id', [str(uuid7()) for _ in range(len(chunk))])
+            
+            # Unquoted empty fields (NaN) are read by COPY as NULL
+            buffer = io.StringIO()
+            chunk.to_csv(buffer, index=False, header=False)
+            buffer.seek(0)
+            
+            cursor.copy_expert(
+                f"COPY companies (company_id, {', '.join(COMPANY_CSV_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+            imported_count += len(chunk)
+            logger.info(f"Imported {imported_count} companies...")
         
         self.session.commit()
         logger.info(f"Successfully imported {imported_count} companies")
@@ -89,10 +141,24 @@ class DataImporter:
         """Import incentives from CSV file"""
         logger.info(f"Importing incentives from {csv_path}")
         
-        df = pd.read_csv(csv_path)
         imported_count = 0
         
-        for _, row in df.iterrows():
+        for chunk in pd.read_csv(csv_path, chunksize=INSERT_CHUNK_SIZE):
+            imported_count += self._import_incentives_chunk(chunk)
+            logger.info(f"Imported {imported_count} incentives...")
+        
+        logger.info(f"Successfully imported {imported_count} incentives")
+        return imported_count
+    
+    def _import_incentives_chunk(self, chunk: pd.DataFrame) -> int:
+        """
+        Parse one CSV chunk and insert it with two bulk inserts (incentives + metadata)
+        and a single commit. incentive_id is generated here (uuid7), so no per-row flush is needed.
+        """
+        incentives = []
+        metadata_rows = []
+        
+        for _, row in chunk.iterrows():
             try:
                 # Parse JSON fields
                 document_urls = self.parse_json_field(row.get('document_urls', ''))
@@ -126,19 +192,18 @@ class DataImporter:
                         ai_description_data = None
                 
                 # 1. Create incentive (APENAS 10 campos do enunciado)
-                incentive = Incentive(
-                    title=row['title'],
-                    description=row.get('description', ''),
-                    ai_description=ai_description_data,
-                    document_urls=document_urls,
-                    publication_date=publication_date,
-                    start_date=start_date,
-                    end_date=end_date,
-                    total_budget=total_budget,
-                    source_link=row.get('source_link', ''),
-                )
-                self.session.add(incentive)
-                self.session.flush()  # Para obter incentive_id
+                incentive = {
+                    'incentive_id': uuid7(),
+                    'title': row['title'],
+                    'description': row.get('description', ''),
+                    'ai_description': ai_description_data,
+                    'document_urls': document_urls,
+                    'publication_date': publication_date,
+                    'start_date': start_date,
+                    'end_date': end_date,
+                    'total_budget': total_budget,
+                    'source_link': row.get('source_link', ''),
+                }
                 
                 # 2. Create metadata (APENAS campos únicos - sem duplicação)
                 # Guardamos os 10 campos que NÃO existem na tabela incentives
@@ -173,48 +238,72 @@ class DataImporter:
                 # Determine if AI processing is needed
                 needs_ai = self._check_needs_ai_processing(incentive, row)
                 
-                metadata = IncentiveMetadata(
-                    incentive_id=incentive.incentive_id,
-                    raw_csv_data=raw_csv_data,
-                    ai_processing_status="pending" if needs_ai else "completed",
-                    fields_completed_by_ai=[],
-                    created_at=datetime.now(),
-                    updated_at=datetime.now()
-                )
-                self.session.add(metadata)
-                
-                imported_count += 1
-                
-                if imported_count % 100 == 0:
-                    logger.info(f"Imported {imported_count} incentives...")
-                    self.session.commit()  # Commit in batches for better performance
+                incentives.append(incentive)
+                metadata_rows.append({
+                    'incentive_id': incentive['incentive_id'],
+                    'raw_csv_data': raw_csv_data,
+                    'ai_processing_status': "pending" if needs_ai else "completed",
+                    'fields_completed_by_ai': [],
+                    'created_at': datetime.now(timezone.utc),
+                    'updated_at': datetime.now(timezone.utc)
+                })
                     
             except Exception as e:
                 logger.error(f"Error importing incentive {row.get('title', 'Unknown')}: {e}")
                 continue
         
-        self.session.commit()
-        logger.info(f"Successfully imported {imported_count} incentives")
-        return imported_count
+        try:
+            # PostgreSQL: COPY (no INSERT to parse/plan); ORM bulk insert for other databases (tests)
+            if self.session.get_bind().dialect.name == "postgresql":
+                self._copy_rows("incentives", incentives)
+                self._copy_rows("incentives_metadata", metadata_rows)
+            else:
+                self.session.bulk_insert_mappings(Incentive, incentives)
+                self.session.bulk_insert_mappings(IncentiveMetadata, metadata_rows)
+            self.session.commit()
+        except Exception as e:
+            logger.error(f"Error inserting chunk of {len(incentives)} incentives: {e}")
+            self.session.rollback()
+            return 0
+        
+        return len(incentives)
+    
+    def _copy_rows(self, table: str, rows: List[Dict[str, Any]]):
+        """
+        COPY ... FROM STDIN (text format) of already-built column dicts, inside the session's
+        transaction. dict/list values go in as JSON text (cast to jsonb by COPY), None/NaN as NULL.
+        """
+        if not rows:
+            return
+        
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(copy_text_value(row[column]) for column in columns))
+            buffer.write("\n")
+        buffer.seek(0)
+        
+        cursor = self.session.connection().connection.cursor()
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
     
-    def _check_needs_ai_processing(self, incentive: Incentive, row: pd.Series) -> bool:
-        """Check if an incentive needs AI processing"""
+    def _check_needs_ai_processing(self, incentive: Dict[str, Any], row: pd.Series) -> bool:
+        """Check if an incentive (column values about to be inserted) needs AI processing"""
         needs_ai = False
         
         # Check if ai_description is missing or needs conversion
         ai_desc = row.get('ai_description', '')
-        if pd.isna(ai_desc) or ai_desc == '' or not incentive.ai_description:
+        if pd.isna(ai_desc) or ai_desc == '' or not incentive['ai_description']:
             needs_ai = True
         
         # Check if critical dates are missing
-        if not incentive.publication_date or not incentive.start_date or not incentive.end_date:
+        if not incentive['publication_date'] or not incentive['start_date'] or not incentive['end_date']:
             # Try to find in all_data first
             all_data = self.parse_json_field(row.get('all_data', ''))
             if not all_data or 'calendario' not in all_data:
                 needs_ai = True
         
         # Check if total_budget is missing
-        if not incentive.total_budget:
+        if not incentive['total_budget']:
             # Try to find in all_data first
             all_data = self.parse_json_field(row.get('all_data', ''))
             if not all_data or 'dotacao' not in all_data:
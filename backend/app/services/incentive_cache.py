@@ -0,0 +1,117 @@
+"""
+Cache de respostas dos endpoints GET /incentives/{id}, /summary e /matches.
+
+LRU com TTL por processo: os dados de um incentivo só mudam quando é (re)processado
+por IA ou quando os matches são recalculados, e esses endpoints invalidam a entrada.
+
+As invalidações são publicadas no Redis (REDIS_URL): os jobs correm no worker Celery,
+noutro processo, e cada processo da API subscreve o canal (start_listener) para largar
+a sua cópia. Sem Redis configurado a invalidação é só local (scripts, testes).
+"""
+
+import os
+import time
+import threading
+import logging
+from typing import Any, Optional
+
+import redis
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "incentive_cache:invalidate"
+# Mensagem de invalidação de todo o cache (as restantes são um incentive_id)
+INVALIDATE_ALL = "*"
+
+
+class IncentiveCache:
+    """
+    Cache (endpoint, incentive_id) -> resposta já serializada (dict).
+
+    Thread-safe: os handlers síncronos correm na threadpool do FastAPI.
+    Erros de Redis nunca fazem falhar o pedido/job: são logados.
+    """
+
+    # Endpoints em cache (parte da chave)
+    ENDPOINTS = ("get", "summary", "matches")
+
+    def __init__(self, maxsize: int = 10000, ttl: int = 300, redis_client: Optional[redis.Redis] = None):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.redis = redis_client
+        self._listener = None
+
+    @classmethod
+    def from_env(cls) -> "IncentiveCache":
+        """Invalidations over REDIS_URL (same instance as the Celery broker); local only if unset"""
+        redis_url = os.getenv("REDIS_URL")
+        if not redis_url:
+            return cls()
+        return cls(redis_client=redis.Redis.from_url(redis_url))
+
+    def get(self, endpoint: str, incentive_id: Any) -> Optional[dict]:
+        with self._lock:
+            return self._cache.get((endpoint, str(incentive_id)))
+
+    def set(self, endpoint: str, incentive_id: Any, response: dict) -> None:
+        with self._lock:
+            self._cache[(endpoint, str(incentive_id))] = response
+
+    def invalidate(self, incentive_id: Any) -> None:
+        """Drop every cached response for one incentive, in every process"""
+        self._drop(str(incentive_id))
+        self._publish(str(incentive_id))
+
+    def clear(self) -> None:
+        """Drop everything, in every process (after batch jobs that touch many incentives)"""
+        self._drop(INVALIDATE_ALL)
+        self._publish(INVALIDATE_ALL)
+
+    def _drop(self, target: str) -> None:
+        with self._lock:
+            if target == INVALIDATE_ALL:
+                self._cache.clear()
+                return
+            for endpoint in self.ENDPOINTS:
+                self._cache.pop((endpoint, target), None)
+
+    def _publish(self, target: str) -> None:
+        if self.redis is None:
+            return
+        try:
+            self.redis.publish(INVALIDATION_CHANNEL, target)
+        except redis.RedisError as e:
+            logger.warning(f"Incentive cache invalidation not published: {e}")
+
+    def _on_message(self, message: dict) -> None:
+        self._drop(message["data"].decode())
+
+    def _on_listener_error(self, error: Exception, pubsub, thread) -> None:
+        # Mensagens perdidas enquanto o Redis esteve em baixo: larga tudo (o TTL limita o resto)
+        logger.warning(f"Incentive cache invalidation listener error: {error}")
+        self._drop(INVALIDATE_ALL)
+        time.sleep(1)
+
+    def start_listener(self) -> None:
+        """Apply invalidations published by other processes (API processes, at startup)"""
+        if self.redis is None or self._listener is not None:
+            return
+        try:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{INVALIDATION_CHANNEL: self._on_message})
+        except redis.RedisError as e:
+            logger.warning(f"Incentive cache invalidation listener not started: {e}")
+            return
+        self._listener = pubsub.run_in_thread(
+            sleep_time=1.0, daemon=True, exception_handler=self._on_listener_error
+        )
+
+    def stop_listener(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+
+# Instância partilhada pelo processo
+incentive_cache = IncentiveCache.from_env()
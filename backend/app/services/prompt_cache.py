@@ -0,0 +1,145 @@
+"""
+Cache persistente de respostas AI (prompts idênticos) em Redis.
+
+Partilhada por todos os processos (API e worker Celery) e sobrevive a restarts,
+por isso /data/cache/stats reflete a taxa de hits real. Sem Redis configurado
+usa um LRU local ao processo (scripts, testes), limitado a LOCAL_MAX_ENTRIES.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+import redis
+from cachetools import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+# GET + contagem de hit/miss numa só ida ao Redis
+_GET_AND_COUNT = """
+local value = redis.call('GET', KEYS[1])
+if value then
+    redis.call('HINCRBY', KEYS[2], 'hits', 1)
+else
+    redis.call('HINCRBY', KEYS[2], 'misses', 1)
+end
+return value
+"""
+
+
+class PromptCache:
+    """
+    sha256(model + prompt com espaços normalizados + params) -> resultado JSON, com TTL.
+
+    Erros de Redis nunca fazem falhar o processamento: contam como miss e são logados.
+    """
+
+    KEY_PREFIX = "prompt:"
+    STATS_KEY = "cache:stats"
+    DEFAULT_TTL_SECONDS = 30 * 24 * 3600  # 30 dias
+    # Sem Redis não há TTL: num worker de longa duração o fallback local descarta
+    # as entradas menos usadas recentemente em vez de crescer sem limite
+    LOCAL_MAX_ENTRIES = 10000
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        ttl: int = DEFAULT_TTL_SECONDS,
+        local_max_entries: int = LOCAL_MAX_ENTRIES
+    ):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.local_max_entries = local_max_entries
+        # Partilhado pelas threads de run_ai_batch (estado por processo): acesso sob _local_lock
+        self._local = LRUCache(maxsize=local_max_entries)
+        self._local_lock = threading.Lock()
+        self._local_stats = {"hits": 0, "misses": 0}
+        self._get_script = redis_client.register_script(_GET_AND_COUNT) if redis_client else None
+
+    @classmethod
+    def from_env(cls) -> "PromptCache":
+        """Redis from REDIS_URL (same instance as the Celery broker); local LRU if unset"""
+        redis_url = os.getenv("REDIS_URL")
+        if not redis_url:
+            return cls()
+        return cls(redis.Redis.from_url(redis_url))
+
+    @staticmethod
+    def make_key(model: str, prompt: str, **params) -> str:
+        # Espaços/quebras de linha normalizados: o mesmo texto do CSV com outra formatação
+        # (re-scraping, \r\n, espaços duplos) reutiliza a resposta em vez de ser um miss
+        prompt = " ".join(prompt.split())
+        payload = model + prompt + json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        if self.redis is None:
+            with self._local_lock:
+                value = self._local.get(key)
+                self._local_stats["hits" if value is not None else "misses"] += 1
+            return value
+
+        try:
+            value = self._get_script(keys=[self.KEY_PREFIX + key, self.STATS_KEY])
+        except redis.RedisError as e:
+            logger.warning(f"Prompt cache unavailable (get): {e}")
+            return None
+        return json.loads(value) if value is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        if self.redis is None:
+            with self._local_lock:
+                self._local[key] = value
+            return
+
+        try:
+            self.redis.setex(self.KEY_PREFIX + key, self.ttl, json.dumps(value, default=str))
+        except redis.RedisError as e:
+            logger.warning(f"Prompt cache unavailable (set): {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Hits/misses across every process using this Redis"""
+        if self.redis is None:
+            with self._local_lock:
+                return dict(self._local_stats)
+
+        raw = self.redis.hgetall(self.STATS_KEY)
+        return {
+            "hits": int(raw.get(b"hits", 0)),
+            "misses": int(raw.get(b"misses", 0))
+        }
+
+    def size(self) -> int:
+        if self.redis is None:
+            return len(self._local)
+        return sum(1 for _ in self.redis.scan_iter(match=self.KEY_PREFIX + "*", count=1000))
+
+    def clear(self) -> int:
+        """Delete every cached response; returns the number of entries removed"""
+        if self.redis is None:
+            with self._local_lock:
+                size = len(self._local)
+                self._local.clear()
+            return size
+
+        removed = 0
+        keys = []
+        for key in self.redis.scan_iter(match=self.KEY_PREFIX + "*", count=1000):
+            keys.append(key)
+            if len(keys) >= 1000:
+                removed += self.redis.unlink(*keys)
+                keys = []
+        if keys:
+            removed += self.redis.unlink(*keys)
+        return removed
+
+    def reset_stats(self) -> None:
+        if self.redis is None:
+            with self._local_lock:
+                self._local_stats = {"hits": 0, "misses": 0}
+            return
+        self.redis.delete(self.STATS_KEY)
@@ -0,0 +1,83 @@
+"""
+Rate limiter para chamadas OpenAI API.
+Token bucket (RPM + TPM) partilhado por todos os workers de um batch.
+"""
+
+import os
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Throttle proativo de pedidos/minuto e tokens/minuto.
+
+    Os dois "baldes" são recarregados continuamente (capacidade/60 por segundo) e cada
+    chamada reserva 1 pedido + os tokens estimados antes de ir à API. Assim um batch
+    concorrente fica abaixo do limite da conta em vez de bater no 429 e esperar pelo retry.
+
+    Thread-safe: os workers do batch correm em threads (asyncio.to_thread).
+    """
+
+    # Margem para não encostar ao limite real da conta
+    HEADROOM = 0.95
+
+    def __init__(self, rpm: int, tpm: int):
+        self.max_requests = rpm * self.HEADROOM
+        self.max_tokens = tpm * self.HEADROOM
+        self.available_requests = self.max_requests
+        self.available_tokens = self.max_tokens
+        self._last_refill = time.monotonic()
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_env(cls) -> "TokenBucket":
+        """
+        Build from OPENAI_RPM / OPENAI_TPM (defaults: gpt-4o-mini tier 1 limits).
+
+        O balde é por processo: os limites da conta são divididos por OPENAI_RATE_LIMIT_PROCESSES,
+        o número de processos que usam a key (API + filhos do worker Celery, --concurrency).
+        """
+        processes = max(1, int(os.getenv("OPENAI_RATE_LIMIT_PROCESSES", "1")))
+        return cls(
+            rpm=int(os.getenv("OPENAI_RPM", "500")) / processes,
+            tpm=int(os.getenv("OPENAI_TPM", "200000")) / processes
+        )
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self.available_requests = min(self.max_requests, self.available_requests + self.max_requests * elapsed / 60)
+        self.available_tokens = min(self.max_tokens, self.available_tokens + self.max_tokens * elapsed / 60)
+
+    def acquire(self, estimated_tokens: int) -> None:
+        """Block until one request and `estimated_tokens` tokens are available, then reserve them"""
+        # Um pedido maior que o balde inteiro nunca caberia: limita à capacidade
+        estimated_tokens = min(estimated_tokens, self.max_tokens)
+
+        with self._condition:
+            while True:
+                self._refill()
+                if self.available_requests >= 1 and self.available_tokens >= estimated_tokens:
+                    self.available_requests -= 1
+                    self.available_tokens -= estimated_tokens
+                    return
+
+                # Tempo até haver capacidade suficiente (o que faltar mais)
+                wait = max(
+                    (1 - self.available_requests) * 60 / self.max_requests,
+                    (estimated_tokens - self.available_tokens) * 60 / self.max_tokens,
+                    0.01
+                )
+                self._condition.wait(timeout=wait)
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Return (or charge) the difference between the reserved estimate and response.usage"""
+        estimated_tokens = min(estimated_tokens, self.max_tokens)
+        with self._condition:
+            self.available_tokens = min(self.max_tokens, self.available_tokens + estimated_tokens - actual_tokens)
+            self._condition.notify_all()
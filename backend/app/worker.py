@@ -0,0 +1,48 @@
+"""
+Celery tasks (executadas pelo serviço worker).
+
+Cada task é um wrapper fino sobre a função de background correspondente em
+app.api.data_management; a API só faz enqueue pelo nome da task.
+A OpenAI API key é lida do ambiente do worker (não viaja pelo broker).
+"""
+
+import os
+from app.celery_app import celery_app
+from app.api.data_management import (
+    import_data_task,
+    process_all_matches_task,
+    process_ai_batch_task,
+    reprocess_failed_task,
+    poll_ai_batches_task,
+    fold_analytics_summary_task,
+)
+
+
+@celery_app.task(name="data.import")
+def import_data(companies_path: str, incentives_path: str):
+    return import_data_task(companies_path, incentives_path)
+
+
+@celery_app.task(name="data.process_all_matches")
+def process_all_matches():
+    return process_all_matches_task(os.getenv("OPENAI_API_KEY"))
+
+
+@celery_app.task(name="data.process_ai_batch")
+def process_ai_batch(limit: int = None, only_pending: bool = True, mode: str = "realtime"):
+    return process_ai_batch_task(os.getenv("OPENAI_API_KEY"), limit, only_pending, mode)
+
+
+@celery_app.task(name="data.reprocess_failed")
+def reprocess_failed(limit: int = None, mode: str = "realtime"):
+    return reprocess_failed_task(os.getenv("OPENAI_API_KEY"), limit, mode)
+
+
+@celery_app.task(name="data.poll_ai_batches")
+def poll_ai_batches():
+    return poll_ai_batches_task(os.getenv("OPENAI_API_KEY"))
+
+
+@celery_app.task(name="data.fold_analytics_summary")
+def fold_analytics_summary():
+    return fold_analytics_summary_task()
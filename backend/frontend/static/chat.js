@@ -0,0 +1,173 @@
+const API_BASE = '/chatbot';
+const JSON_HEADERS = { 'Content-Type': 'application/json; charset=utf-8' };
+let isLoading = false;
+
+// Elementos DOM
+const chatMessages = document.getElementById('chatMessages');
+const messageInput = document.getElementById('messageInput');
+const sendButton = document.getElementById('sendButton');
+const chatForm = document.getElementById('chatForm');
+const typingIndicator = document.getElementById('typingIndicator');
+const incentiveItemTpl = document.getElementById('incentiveItemTpl');
+const companyItemTpl = document.getElementById('companyItemTpl');
+
+// Event listeners
+chatForm.addEventListener('submit', handleSubmit);
+messageInput.addEventListener('keypress', handleKeyPress);
+
+function handleKeyPress(e) {
+    if (e.key === 'Enter' && !e.shiftKey) {
+        e.preventDefault();
+        handleSubmit(e);
+    }
+}
+
+function handleSubmit(e) {
+    e.preventDefault();
+    const message = messageInput.value.trim();
+    if (message && !isLoading) {
+        sendMessage(message);
+        messageInput.value = '';
+    }
+}
+
+function sendQuickMessage(message) {
+    if (!isLoading) {
+        sendMessage(message);
+    }
+}
+
+async function sendMessage(message) {
+    if (isLoading) return;
+
+    isLoading = true;
+    sendButton.disabled = true;
+
+    // Adicionar mensagem do usuário
+    addMessage('user', message);
+
+    // Mostrar indicador de digitação
+    showTypingIndicator();
+
+    try {
+        const response = await fetch(`${API_BASE}/message`, {
+            method: 'POST',
+            headers: JSON_HEADERS,
+            body: JSON.stringify({ message, user_id: 'web_user' })
+        });
+
+        const data = await response.json();
+
+        if (data.success) {
+            addMessage('bot', data.response, data.data, data.intent);
+        } else {
+            addMessage('bot', 'Desculpe, ocorreu um erro ao processar sua mensagem.', null, 'error');
+        }
+
+    } catch (error) {
+        console.error('Error:', error);
+        addMessage('bot', 'Desculpe, ocorreu um erro de conexão. Tente novamente.', null, 'error');
+    } finally {
+        hideTypingIndicator();
+        isLoading = false;
+        sendButton.disabled = false;
+        messageInput.focus();
+    }
+}
+
+// Clona um template de item e preenche-o como texto (sem parse de HTML nem injeção de markup)
+function dataItem(template, title, detail, extra) {
+    const node = template.content.cloneNode(true);
+    node.querySelector('.t').textContent = title;
+    node.querySelector('.d').textContent = detail;
+    node.querySelector('.b').textContent = extra;
+    return node;
+}
+
+function addMessage(sender, content, data = null, intent = null) {
+    const messageDiv = document.createElement('div');
+    messageDiv.className = `message ${sender}`;
+
+    const avatar = document.createElement('div');
+    avatar.className = 'message-avatar';
+    avatar.textContent = sender === 'user' ? '👤' : '🤖';
+
+    const contentDiv = document.createElement('div');
+    contentDiv.className = 'message-content';
+    contentDiv.textContent = content;
+
+    // Adicionar dados relacionados se existirem
+    if (data && data.length > 0) {
+        const dataDiv = document.createElement('div');
+        dataDiv.className = 'data-display';
+
+        // Itens montados num fragmento e inseridos de uma só vez
+        const fragment = document.createDocumentFragment();
+
+        if (intent === 'incentive_query' || intent === 'incentives_list') {
+            data.forEach(item => {
+                fragment.appendChild(dataItem(
+                    incentiveItemTpl,
+                    item.title,
+                    item.description ? item.description.substring(0, 100) + '...' : '',
+                    item.total_budget ? `💰 Orçamento: €${item.total_budget.toLocaleString()}` : ''
+                ));
+            });
+            dataDiv.appendChild(fragment);
+            dataDiv.insertAdjacentHTML('afterbegin', '<strong>📋 Incentivos encontrados:</strong>');
+        } else if (intent === 'company_query' || intent === 'companies_list') {
+            data.forEach(item => {
+                fragment.appendChild(dataItem(
+                    companyItemTpl,
+                    item.company_name,
+                    item.cae_primary_label || '',
+                    item.website ? `🌐 ${item.website}` : ''
+                ));
+            });
+            dataDiv.appendChild(fragment);
+            dataDiv.insertAdjacentHTML('afterbegin', '<strong>🏢 Empresas encontradas:</strong>');
+        } else if (intent === 'analytics') {
+            dataDiv.innerHTML = `
+                <strong>📊 Estatísticas:</strong><br>
+                📋 Incentivos: ${data.total_incentives}<br>
+                🏢 Empresas: ${data.total_companies}<br>
+                🔗 Correspondências: ${data.total_matches}<br>
+                💰 Orçamento Total: €${data.total_budget.toLocaleString()}
+            `;
+        }
+
+        contentDiv.appendChild(dataDiv);
+    }
+
+    messageDiv.appendChild(avatar);
+    messageDiv.appendChild(contentDiv);
+
+    chatMessages.appendChild(messageDiv);
+    scrollToBottom();
+}
+
+// Ler scrollHeight logo após mexer no DOM força um layout síncrono: adia para o próximo
+// frame e junta vários pedidos do mesmo frame num só
+let scrollPending = false;
+function scrollToBottom() {
+    if (scrollPending) return;
+    scrollPending = true;
+    requestAnimationFrame(() => {
+        scrollPending = false;
+        chatMessages.scrollTop = chatMessages.scrollHeight;
+    });
+}
+
+function showTypingIndicator() {
+    typingIndicator.style.display = 'block';
+    scrollToBottom();
+}
+
+function hideTypingIndicator() {
+    typingIndicator.style.display = 'none';
+}
+
+// Focar no input quando a página carrega
+window.addEventListener('load', () => {
+    messageInput.focus();
+});
@@ -161,10 +161,10 @@ def test_5_incentives_200_companies():
 def get_total_cost(db: Session) -> float:
     """Obtém o custo total atual da base de dados"""
     try:
-        total_cost = db.query(AICostTracking).with_entities(
-            db.func.sum(AICostTracking.total_cost)
+        total_cost_micro_usd = db.query(AICostTracking).with_entities(
+            db.func.sum(AICostTracking.total_cost_micro_usd)
         ).scalar()
-        return float(total_cost) if total_cost else 0.0
+        return total_cost_micro_usd / 1_000_000 if total_cost_micro_usd else 0.0
     except:
         return 0.0
 
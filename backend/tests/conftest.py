@@ -111,7 +111,6 @@ def sample_company_data():
 @pytest.fixture
 def create_incentive(db_session: Session, sample_incentive_data):
     """Create a test incentive in the database"""
-    import uuid
     incentive = Incentive(**sample_incentive_data)
     db_session.add(incentive)
     db_session.commit()
@@ -119,7 +118,6 @@ def create_incentive(db_session: Session, sample_incentive_data):
     
     # Create metadata
     metadata = IncentiveMetadata(
-        metadata_id=uuid.uuid4(),
         incentive_id=incentive.incentive_id,
         raw_csv_data={"test": "data"},
         ai_processing_status="completed"
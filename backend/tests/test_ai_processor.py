@@ -0,0 +1,126 @@
+"""
+AI Processor Tests
+Unit tests for the prompt building and rule-based extraction helpers of the AI processor
+"""
+
+import json
+import uuid
+import pytest
+from datetime import datetime, timezone
+
+from app.db.models import Company, Incentive
+from app.services.ai_processor import AIProcessor, all_data_prompt, budget_from_text, dates_from_text, slim_all_data
+
+
+@pytest.mark.unit
+class TestSlimAllData:
+    """Test all_data is reduced to the fields worth sending to the model"""
+
+    def test_drops_attachments_ids_and_nulls(self):
+        """Test documentos, scraping provenance, *Id keys and nulls are removed at every level"""
+        all_data = {
+            "calendario": {"dataFim": "2025-09-12T18:00:00", "tempoMedioDecisaoFinal": 60},
+            "estrutura": [{"dotacao": 1500000, "fundoId": 101, "fundoDesignacao": "FSE+", "estrategiaDesignacao": None}],
+            "documentos": [{"path": "avisos/2025/7/aviso.pdf"}],
+            "scraped_at": "2025-10-01",
+        }
+        assert slim_all_data(all_data) == {
+            "calendario": {"dataFim": "2025-09-12T18:00:00", "tempoMedioDecisaoFinal": 60},
+            "estrutura": [{"dotacao": 1500000, "fundoDesignacao": "FSE+"}],
+        }
+
+    def test_truncates_long_strings_and_dumps_compact_json(self):
+        """Test long texts are cut and the prompt JSON has no separator whitespace"""
+        prompt = all_data_prompt({"aviso": {"designacaoPT": "x" * 2000}})
+        assert ", " not in prompt and '": ' not in prompt
+        assert len(json.loads(prompt)["aviso"]["designacaoPT"]) == 501
+
+    def test_missing_all_data_is_an_empty_object(self):
+        """Test incentives without all_data still get a valid prompt field"""
+        assert all_data_prompt(None) == "{}"
+
+
+@pytest.mark.unit
+class TestTextExtraction:
+    """Test dates and budget are read from the description before asking the model"""
+
+    def test_dates_next_to_keywords_and_ranges(self):
+        """Test publication/start/end dates are taken from keywords and "de X a Y" ranges"""
+        text = "Data de publicação: 12/09/2025. Candidaturas de 01/10/2025 a 31/12/2025."
+        assert dates_from_text(text) == {
+            "publication_date": datetime(2025, 9, 12, tzinfo=timezone.utc),
+            "start_date": datetime(2025, 10, 1, tzinfo=timezone.utc),
+            "end_date": datetime(2025, 12, 31, tzinfo=timezone.utc),
+        }
+        assert dates_from_text("Prazo limite: 15 de novembro de 2025") == {"end_date": datetime(2025, 11, 15, tzinfo=timezone.utc)}
+
+    def test_dates_without_keyword_are_left_to_the_model(self):
+        """Test a date with no keyword around it is not guessed"""
+        assert dates_from_text("Aviso 2025-03-04 sem contexto") == {}
+
+    def test_budget_amounts_and_units(self):
+        """Test Portuguese number formats and units after a dotação/orçamento keyword"""
+        assert budget_from_text("A dotação é de 1,5 milhões de euros") == 1_500_000
+        assert budget_from_text("orçamento total de €2.000.000,00") == 2_000_000
+        assert budget_from_text("dotação global: 500 mil euros") == 500_000
+        assert budget_from_text("apoio até 50.000 € por projeto") is None
+
+
+@pytest.mark.unit
+class TestParseDatetime:
+    """Test dates from all_data and the model follow the timestamptz (UTC) convention"""
+
+    def test_offsets_are_converted_to_utc(self):
+        """Test "Z" and explicit offsets become aware UTC datetimes"""
+        processor = AIProcessor(api_key="test", session=None)
+        assert processor._parse_datetime("2025-09-12T18:00:00Z") == datetime(2025, 9, 12, 18, tzinfo=timezone.utc)
+        assert processor._parse_datetime("2025-09-12T18:00:00.5+01:00") == datetime(
+            2025, 9, 12, 17, 0, 0, 500000, tzinfo=timezone.utc
+        )
+
+    def test_naive_values_are_taken_as_utc(self):
+        """Test dates without offset (ISO or dd/mm/yyyy) are UTC and garbage is None"""
+        processor = AIProcessor(api_key="test", session=None)
+        assert processor._parse_datetime("2025-09-12") == datetime(2025, 9, 12, tzinfo=timezone.utc)
+        assert processor._parse_datetime("12/09/2025") == datetime(2025, 9, 12, tzinfo=timezone.utc)
+        assert processor._parse_datetime("em breve") is None
+
+
+@pytest.mark.unit
+class TestDeterministicMatch:
+    """Test the eligibility checks done before the batch match prompt"""
+
+    def test_cae_size_and_region_checks(self):
+        """Test CAE overlap, size and region are checked without the model"""
+        processor = AIProcessor(api_key="test", session=None)
+        ai_desc = {"eligible_cae_codes": ["62010", "62020"], "company_sizes": ["PME"], "eligible_regions": ["Norte"]}
+        company = Company(company_name="Soft", cae_primary_code=["62020", "47110"], company_size="pme", region="Lisboa")
+        assert processor._deterministic_match(ai_desc, company) == {
+            "cae_overlap": ["62020"], "size_match": True, "region_match": False
+        }
+
+    def test_unrestricted_criteria_are_none(self):
+        """Test criteria the incentive does not restrict are neither a match nor a miss"""
+        processor = AIProcessor(api_key="test", session=None)
+        company = Company(company_name="Loja", cae_primary_code=None, region="Algarve")
+        assert processor._deterministic_match({"eligible_regions": ["Todo o país"]}, company) == {
+            "cae_overlap": None, "size_match": None, "region_match": True
+        }
+
+
+@pytest.mark.unit
+class TestGroupCostTracking:
+    """Test grouped requests are attributed to the incentives in the prompt"""
+
+    def test_usage_is_split_per_incentive(self):
+        """Test one cost row per incentive whose tokens add up to the request usage"""
+        calls = []
+        processor = AIProcessor(api_key="test", session=None)
+        processor.cost_tracker.track_api_call = lambda **kwargs: calls.append(kwargs)
+        incentives = [Incentive(incentive_id=uuid.uuid4()) for _ in range(3)]
+
+        processor._track_group_call("process_incentive_group", incentives, {"prompt_tokens": 1000, "completion_tokens": 301})
+
+        assert [call["incentive_id"] for call in calls] == [str(incentive.incentive_id) for incentive in incentives]
+        assert [call["usage_data"]["completion_tokens"] for call in calls] == [101, 100, 100]
+        assert sum(call["usage_data"]["total_tokens"] for call in calls) == 1301
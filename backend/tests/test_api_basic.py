@@ -4,6 +4,7 @@ Simplified test suite for basic functionality
 """
 
 import pytest
+from types import SimpleNamespace
 from fastapi.testclient import TestClient
 
 
@@ -44,6 +45,12 @@ class TestBasicAPI:
         assert "capabilities" in data["help"]
         assert "example_queries" in data["help"]
     
+    def test_chatbot_help_not_modified(self, client: TestClient):
+        """Test help endpoint honours its ETag with a 304"""
+        etag = client.get("/chatbot/help").headers["etag"]
+        response = client.get("/chatbot/help", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+    
     def test_check_data_files(self, client: TestClient):
         """Test checking if data files exist"""
         response = client.get("/data/files/status")
@@ -100,6 +107,33 @@ class TestInputValidation:
         response = client.get("/companies/search/by-activity")
         assert response.status_code == 422
     
+    def test_invalid_uuid_path_parameters(self, client: TestClient):
+        """Test malformed IDs are rejected before reaching the database"""
+        response = client.get("/companies/not-a-uuid")
+        assert response.status_code == 422
+        
+        response = client.get("/incentives/not-a-uuid/matches")
+        assert response.status_code == 422
+    
+    def test_process_ai_batch_route(self, client: TestClient, monkeypatch):
+        """Test /data/process-ai/batch reaches the batch handler (not /process-ai/{incentive_id})"""
+        response = client.post("/data/process-ai/batch?mode=bogus")
+        assert response.status_code == 422
+        
+        from app.celery_app import celery_app
+        sent = []
+        
+        def send_task(name, **kwargs):
+            sent.append((name, kwargs))
+            return SimpleNamespace(id="t1")
+        
+        monkeypatch.setenv("OPENAI_API_KEY", "test")
+        monkeypatch.setattr(celery_app, "send_task", send_task)
+        response = client.post("/data/process-ai/batch?mode=async_batch&limit=5")
+        assert response.status_code == 200
+        assert response.json()["task_id"] == "t1"
+        assert sent == [("data.process_ai_batch", {"kwargs": {"limit": 5, "only_pending": True, "mode": "async_batch"}})]
+    
     def test_list_companies_search_no_results(self, client: TestClient):
         """Test search with no results"""
         response = client.get("/companies/?search=NonExistent")
@@ -127,3 +161,38 @@ class TestInputValidation:
         assert isinstance(data["total"], int)
         assert isinstance(data["companies"], list)
 
+
+@pytest.mark.unit
+class TestIncentiveListItem:
+    """Test the row contract of GET /incentives/ (shared with page_json on PostgreSQL)"""
+    
+    def test_zero_budget_is_null(self, db_session, sample_incentive_data):
+        """Test a total_budget of 0 is listed as null, like GET /incentives/{id}"""
+        from app.api.incentives import LIST_COLUMNS, incentive_list_item
+        from app.db.models import Incentive
+        
+        db_session.add(Incentive(**{**sample_incentive_data, "total_budget": 0}))
+        db_session.flush()
+        
+        row = db_session.query(*LIST_COLUMNS).one()
+        assert incentive_list_item(row)["total_budget"] is None
+    
+    def test_page_json_builds_rows_like_list_item(self):
+        """Test the PostgreSQL page rows are built field by field (NULLIF budget, isoformat dates)"""
+        from sqlalchemy.dialects import postgresql
+        from sqlalchemy.orm import Query
+        from app.api.incentives import LIST_COLUMNS, page_json
+        
+        captured = {}
+        
+        class FakeSession:
+            def query(self, *columns):
+                captured["query"] = Query(columns)
+                return SimpleNamespace(one=lambda: None)
+        
+        page_json(FakeSession(), Query(LIST_COLUMNS).limit(10))
+        sql = str(captured["query"].statement.compile(dialect=postgresql.dialect()))
+        assert "json_build_object" in sql
+        assert "nullif(incentives.total_budget" in sql
+        assert "to_char(timezone(" in sql
+
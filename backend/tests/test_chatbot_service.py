@@ -0,0 +1,47 @@
+"""
+Chatbot Service Tests
+Unit tests for the database access patterns of ChatbotService
+"""
+
+import asyncio
+import pytest
+from sqlalchemy import event
+
+from app.db.models import Company, IncentiveCompanyMatch
+from app.services.chatbot_service import ChatbotService
+
+
+@pytest.mark.unit
+class TestMatchQueryLoading:
+    """Test match answers load their related rows eagerly (no N+1)"""
+
+    def test_incentive_matches_use_a_fixed_number_of_queries(self, db_session, create_incentive):
+        """Test listing an incentive's matches costs 2 SELECTs whatever the number of matches"""
+        incentive_id = create_incentive.incentive_id
+        for position in range(1, 6):
+            company = Company(company_name=f"Empresa {position}")
+            db_session.add(company)
+            db_session.flush()
+            db_session.add(IncentiveCompanyMatch(
+                incentive_id=incentive_id,
+                company_id=company.company_id,
+                match_score=1 - position / 10,
+                ranking_position=position
+            ))
+        db_session.commit()
+        db_session.expunge_all()
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db_session.bind, "before_cursor_execute", listener)
+        try:
+            chatbot = ChatbotService(ai_processor=None, db_session=db_session)
+            result = asyncio.run(chatbot._handle_match_query(
+                {"uuids": [str(incentive_id)]}, "matches"
+            ))
+        finally:
+            event.remove(db_session.bind, "before_cursor_execute", listener)
+
+        assert result["type"] == "incentive_matches"
+        assert [m["company_name"] for m in result["data"]] == [f"Empresa {p}" for p in range(1, 6)]
+        assert len(statements) == 2
@@ -0,0 +1,34 @@
+"""
+Database Model Tests
+Unit tests for helpers defined alongside the SQLAlchemy models
+"""
+
+import time
+import pytest
+
+from app.db.models import uuid7
+
+
+@pytest.mark.unit
+class TestUUID7:
+    """Test time-ordered primary key generation"""
+
+    def test_uuid7_version_and_variant(self):
+        """Test generated UUIDs are RFC 9562 version 7"""
+        value = uuid7()
+        assert value.version == 7
+        assert value.variant == "specified in RFC 4122"
+
+    def test_uuid7_embeds_current_timestamp(self):
+        """Test the 48-bit prefix is the current Unix time in ms"""
+        before = time.time_ns() // 1_000_000
+        value = uuid7()
+        after = time.time_ns() // 1_000_000
+        assert before <= value.int >> 80 <= after
+
+    def test_uuid7_is_time_ordered(self):
+        """Test UUIDs generated in different milliseconds sort by creation time"""
+        first = uuid7()
+        time.sleep(0.002)
+        second = uuid7()
+        assert first < second
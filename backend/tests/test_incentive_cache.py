@@ -0,0 +1,59 @@
+"""
+Incentive Cache Tests
+Unit tests for the per-process cache of incentive GET responses and its invalidation
+"""
+
+import uuid
+import pytest
+import redis
+
+from app.services.incentive_cache import IncentiveCache, INVALIDATE_ALL
+
+
+@pytest.mark.unit
+class TestIncentiveCache:
+    """Test cache hits and invalidation"""
+
+    def test_set_and_get_by_endpoint(self):
+        """Test responses are cached per (endpoint, incentive_id)"""
+        cache = IncentiveCache()
+        incentive_id = uuid.uuid4()
+        cache.set("get", incentive_id, {"title": "A"})
+        assert cache.get("get", incentive_id) == {"title": "A"}
+        assert cache.get("get", str(incentive_id)) == {"title": "A"}
+        assert cache.get("matches", incentive_id) is None
+
+    def test_invalidate_drops_all_endpoints(self):
+        """Test invalidating an incentive removes every cached endpoint for it only"""
+        cache = IncentiveCache()
+        incentive_id, other_id = uuid.uuid4(), uuid.uuid4()
+        for endpoint in IncentiveCache.ENDPOINTS:
+            cache.set(endpoint, incentive_id, {"endpoint": endpoint})
+        cache.set("get", other_id, {"title": "B"})
+
+        cache.invalidate(incentive_id)
+
+        assert all(cache.get(endpoint, incentive_id) is None for endpoint in IncentiveCache.ENDPOINTS)
+        assert cache.get("get", other_id) == {"title": "B"}
+
+    def test_published_invalidations_drop_local_entries(self):
+        """Test invalidations received from other processes (worker jobs) are applied"""
+        cache = IncentiveCache()
+        incentive_id, other_id = uuid.uuid4(), uuid.uuid4()
+        cache.set("get", incentive_id, {"title": "A"})
+        cache.set("get", other_id, {"title": "B"})
+
+        cache._on_message({"data": str(incentive_id).encode()})
+        assert cache.get("get", incentive_id) is None
+        assert cache.get("get", other_id) == {"title": "B"}
+
+        cache._on_message({"data": INVALIDATE_ALL.encode()})
+        assert cache.get("get", other_id) is None
+
+    def test_unreachable_redis_still_invalidates_locally(self):
+        """Test Redis errors never break the request or job invalidating the cache"""
+        cache = IncentiveCache(redis_client=redis.Redis(host="localhost", port=1, socket_connect_timeout=0.1))
+        cache.set("get", "x", {"title": "A"})
+        cache.clear()
+        cache.start_listener()
+        assert cache.get("get", "x") is None
@@ -0,0 +1,53 @@
+"""
+Prompt Cache Tests
+Unit tests for the AI prompt/result cache (local fallback and Redis fail-open)
+"""
+
+import pytest
+import redis
+
+from app.services.prompt_cache import PromptCache
+
+
+@pytest.mark.unit
+class TestPromptCache:
+    """Test keys, hit/miss stats and behaviour without Redis"""
+
+    def test_key_depends_on_model_prompt_and_params(self):
+        """Test identical requests share a key and any difference changes it"""
+        key = PromptCache.make_key("gpt-4o-mini", "prompt", temperature=0.1, max_tokens=500)
+        assert key == PromptCache.make_key("gpt-4o-mini", "prompt", max_tokens=500, temperature=0.1)
+        assert key != PromptCache.make_key("gpt-4o", "prompt", temperature=0.1, max_tokens=500)
+        assert key != PromptCache.make_key("gpt-4o-mini", "prompt", temperature=0.7, max_tokens=500)
+
+    def test_key_ignores_whitespace_formatting(self):
+        """Test the same text with different line breaks/spacing shares a key"""
+        key = PromptCache.make_key("gpt-4o-mini", "Converte:\n  Apoio a PMEs\r\n", max_tokens=800)
+        assert key == PromptCache.make_key("gpt-4o-mini", "Converte: Apoio  a PMEs", max_tokens=800)
+        assert key != PromptCache.make_key("gpt-4o-mini", "Converte: Apoio a PME", max_tokens=800)
+
+    def test_local_cache_counts_hits_and_misses(self):
+        """Test the in-process fallback stores results and tracks stats"""
+        cache = PromptCache()
+        assert cache.get("k") is None
+        cache.set("k", {"answer": 42})
+        assert cache.get("k") == {"answer": 42}
+        assert cache.stats() == {"hits": 1, "misses": 1}
+        assert cache.clear() == 1
+
+    def test_local_cache_evicts_least_recently_used(self):
+        """Test the in-process fallback is bounded and keeps recently read entries"""
+        cache = PromptCache(local_max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.size() == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+
+    def test_unreachable_redis_is_a_miss(self):
+        """Test Redis errors never break processing"""
+        cache = PromptCache(redis.Redis(host="localhost", port=1, socket_connect_timeout=0.1))
+        cache.set("k", "value")
+        assert cache.get("k") is None
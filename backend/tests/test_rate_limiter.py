@@ -0,0 +1,46 @@
+"""
+Rate Limiter Tests
+Unit tests for the OpenAI RPM/TPM token bucket
+"""
+
+import time
+import pytest
+
+from app.services.rate_limiter import TokenBucket
+
+
+@pytest.mark.unit
+class TestTokenBucket:
+    """Test proactive request/token throttling"""
+
+    def test_acquire_reserves_request_and_tokens(self):
+        """Test acquire consumes one request and the estimated tokens"""
+        bucket = TokenBucket(rpm=100, tpm=10000)
+        bucket.acquire(1000)
+        assert bucket.available_requests == pytest.approx(94, abs=0.1)
+        assert bucket.available_tokens == pytest.approx(8500, abs=5)
+
+    def test_reconcile_returns_unused_tokens(self):
+        """Test over-estimated reservations are given back after the response"""
+        bucket = TokenBucket(rpm=100, tpm=10000)
+        bucket.acquire(1000)
+        bucket.reconcile(estimated_tokens=1000, actual_tokens=200)
+        assert bucket.available_tokens == pytest.approx(9300, abs=5)
+
+    def test_acquire_waits_when_requests_exhausted(self):
+        """Test acquire blocks until the request bucket refills"""
+        bucket = TokenBucket(rpm=1200, tpm=1_000_000)
+        bucket.available_requests = 0
+        start = time.monotonic()
+        bucket.acquire(10)
+        # 1140 effective RPM -> one request every ~53ms
+        assert time.monotonic() - start >= 0.04
+
+    def test_from_env_splits_limits_between_processes(self, monkeypatch):
+        """Test each process gets its share of the account limits"""
+        monkeypatch.setenv("OPENAI_RPM", "600")
+        monkeypatch.setenv("OPENAI_TPM", "300000")
+        monkeypatch.setenv("OPENAI_RATE_LIMIT_PROCESSES", "3")
+        bucket = TokenBucket.from_env()
+        assert bucket.max_requests == pytest.approx(200 * TokenBucket.HEADROOM)
+        assert bucket.max_tokens == pytest.approx(100000 * TokenBucket.HEADROOM)